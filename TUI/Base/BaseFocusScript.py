@@ -118,6 +118,14 @@ History:
                     (or, as before, if boresight was restored).
 2009-03-02 ROwen    Added a brief header for PR 777 diagnostic output.
 2010-03-12 ROwen    Changed to use Models.getModel.
+2026-10-19 JParejko Moved polyfitw to TUI.Base.PolyFit, which uses numpy.linalg.lstsq on scaled focus positions.
+2026-10-19 JParejko Added an adaptive focus sweep (the new Adaptive Sweep checkbox, off by default):
+                    focus positions are chosen from the data so far using TUI.Base.FocusFit,
+                    and the sweep stops once the best focus is known well enough,
+                    so it usually needs fewer exposures than the fixed sweep.
+                    If the adaptive sweep does not give an acceptable fit, the fixed sweep is run,
+                    skipping focus positions that have already been measured.
+                    Split waitFocusSweep into waitAdaptiveFocusSweep, waitMeasureFocus and fitFocusSweep.
 """
 import inspect
 import math
@@ -128,6 +136,8 @@ import RO.Wdg
 import RO.CnvUtil
 import RO.Constants
 import RO.StringUtil
+import TUI.Base.FocusFit
+import TUI.Base.PolyFit
 import TUI.Models
 import TUI.Inst.ExposeModel
 
@@ -254,6 +264,9 @@ class BaseFocusScript(object):
     FocGraphMargin = 5 # margin on graph for x axis limits, in um
     MaxFocSigmaFac = 0.5 # maximum allowed sigma of best fit focus as a multiple of focus range
     MinFocusIncr = 50 # minimum focus increment, in um
+    DefAdaptiveSweep = False # default for the Adaptive Sweep checkbox; subclasses may override
+    AdaptiveFocSigmaFac = 0.015 # adaptive sweep stops when std. dev. of best focus <= this * focus range
+    AdaptiveMinSpacingFac = 0.05 # minimum spacing of adaptive sweep focus positions, as a fraction of focus range
     def __init__(self,
         sr,
         gcamActor,
@@ -442,6 +455,16 @@ class BaseFocusScript(object):
         )
         self.gr.gridWdg(None, self.moveBestFocus, colSpan = 3, sticky="w")
         
+        self.adaptiveSweepWdg = RO.Wdg.Checkbutton(
+            master = sr.master,
+            text = "Adaptive Sweep",
+            defValue = self.DefAdaptiveSweep,
+            relief = "flat",
+            helpText = "Choose focus positions as the sweep goes and stop when best focus is known well enough?",
+            helpURL = self.helpURL,
+        )
+        self.gr.gridWdg(None, self.adaptiveSweepWdg, colSpan = 3, sticky="w")
+        
         graphCol =  self.gr.getNextCol()
         graphRowSpan = self.gr.getNextRow()
 
@@ -713,6 +736,8 @@ class BaseFocusScript(object):
         self.instLim = None
         self.cmdMode = None
         self.focPosToRestore = None
+        self.sweepMeasNum = 0 # number of focus sweep measurements so far
+        self.sweepCenterFocPos = None
         self.expTime = None
         self.absStarPos = None
         self.relStarPos = None
@@ -1125,57 +1150,21 @@ class BaseFocusScript(object):
             severity=RO.Constants.sevWarning)
         sr.value = StarMeas()
     
-    def waitFocusSweep(self):
-        """Conduct a focus sweep.
+    def fitFocusSweep(self, focPosFWHMList, startFocPos, endFocPos, extremeFocPos, extremeFWHM):
+        """Fit a parabola to focus sweep data, log and graph the fit and check it.
         
-        Sets sr.value to True if successful.
+        Inputs:
+        - focPosFWHMList: list of (focus position (um), measured FWHM (binned pixels))
+        - startFocPos, endFocPos: focus range of the sweep (um)
+        - extremeFocPos, extremeFWHM: extremes of focus position and FWHM (Extremes objects);
+            updated with the best focus and FWHM
+        
+        Returns (bestEstFocPos, bestEstFWHM).
+        Raises sr.ScriptError if there are too few measurements or the fit is unacceptable.
         """
         sr = self.sr
+        focusRange = abs(endFocPos - startFocPos)
 
-        focPosFWHMList = []
-        self.logWdg.addMsg("===== Sweep =====")
-        self.clearGraph()
-
-        centerFocPos = float(self.getEntryNum(self.centerFocPosWdg))
-        focusRange = float(self.getEntryNum(self.focusRangeWdg))
-        startFocPos = centerFocPos - (focusRange / 2.0)
-        endFocPos = startFocPos + focusRange
-        numFocPos = self.getEntryNum(self.numFocusPosWdg)
-        if numFocPos < 3:
-            raise sr.ScriptError("need at least three focus positions")
-        focusIncr = self.focusIncrWdg.getNum()
-        if focusIncr < self.MinFocusIncr:
-            raise sr.ScriptError("focus increment too small (< %s %s)" % (self.MinFocusIncr, MicronStr))
-        numExpPerFoc = 1
-        self.focDir = (endFocPos > startFocPos)
-        
-        extremeFocPos = Extremes(startFocPos)
-        extremeFocPos.addVal(endFocPos)
-        extremeFWHM = Extremes()
-        self.setGraphRange(extremeFocPos=extremeFocPos)
-        numMeas = 0
-        self.focPosToRestore = centerFocPos
-        for focInd in range(numFocPos):
-            focPos = float(startFocPos + (focInd*focusIncr))
-
-            doBacklashComp = (focInd == 0)
-            yield self.waitSetFocus(focPos, doBacklashComp)
-            sr.showMsg("Exposing for %s sec at focus %0.0f %s" % \
-                (self.expTime, focPos, MicronStr))
-            yield self.waitCentroid()
-            starMeas = sr.value
-            if sr.debug:
-                starMeas.fwhm = 0.0001 * (focPos - centerFocPos) ** 2
-                starMeas.fwhm += random.gauss(1.0, 0.25)
-            extremeFWHM.addVal(starMeas.fwhm)
-
-            self.logStarMeas("Sw %d" % (focInd+1,), focPos, starMeas)
-            
-            if starMeas.fwhm != None:
-                focPosFWHMList.append((focPos, starMeas.fwhm))
-                self.graphFocusMeas(focPosFWHMList, extremeFWHM=extremeFWHM)
-        
-        # Fit a curve to the data
         numMeas = len(focPosFWHMList)
         if numMeas < 3:
             raise sr.ScriptError("need at least 3 measurements to fit best focus")
@@ -1184,10 +1173,10 @@ class BaseFocusScript(object):
         fwhmArr  = numpy.array(fwhmList, dtype=float)
         weightArr = numpy.ones(numMeas, dtype=float)
         if numMeas > 3:
-            coeffs, dumYFit, dumYBand, fwhmSigma, dumCorrMatrix = polyfitw(focPosArr, fwhmArr, weightArr, 2, True)
+            coeffs, dumYFit, dumYBand, fwhmSigma, dumCorrMatrix = TUI.Base.PolyFit.polyfitw(focPosArr, fwhmArr, weightArr, 2, True)
         elif numMeas == 3:
             # too few points to measure fwhmSigma
-            coeffs = polyfitw(focPosArr, fwhmArr, weightArr, 2, False)
+            coeffs = TUI.Base.PolyFit.polyfitw(focPosArr, fwhmArr, weightArr, 2, False)
             fwhmSigma = None
         
         # Make sure fit curve has a minimum
@@ -1223,9 +1212,119 @@ class BaseFocusScript(object):
                 raise sr.ScriptError("focus std. dev. too large: %0.0f > %0.0f" % (focSigma, maxFocSigma))
         
         # check that estimated best focus is in sweep range
-        if not startFocPos <= bestEstFocPos <= endFocPos:
+        if not min(startFocPos, endFocPos) <= bestEstFocPos <= max(startFocPos, endFocPos):
             raise sr.ScriptError("best focus=%0.0f out of sweep range" % (bestEstFocPos,))
 
+        return bestEstFocPos, bestEstFWHM
+
+    def waitAdaptiveFocusSweep(self, focPosFWHMList, extremeFWHM, startFocPos, endFocPos, maxNumFocPos):
+        """Measure FWHM at focus positions chosen from the data so far.
+        
+        Measures at the start, center and end of the focus range, then at positions chosen by
+        TUI.Base.FocusFit.getNextFocPos until the estimated standard deviation of best focus
+        is at most AdaptiveFocSigmaFac * focus range, or maxNumFocPos positions have been measured,
+        or no suitable focus position remains.
+        
+        Inputs:
+        - focPosFWHMList: list of (focus position, FWHM); measurements are appended
+        - extremeFWHM: extremes of FWHM (an Extremes object)
+        - startFocPos, endFocPos: focus range of the sweep (um)
+        - maxNumFocPos: maximum number of focus positions to measure
+        """
+        sr = self.sr
+        focusRange = abs(endFocPos - startFocPos)
+        minFocPos = min(startFocPos, endFocPos)
+        maxFocPos = max(startFocPos, endFocPos)
+        targetFocSigma = self.AdaptiveFocSigmaFac * focusRange
+        minSpacing = self.AdaptiveMinSpacingFac * focusRange
+
+        for focInd, focPos in enumerate((startFocPos, (startFocPos + endFocPos) / 2.0, endFocPos)):
+            yield self.waitMeasureFocus(focPos, focPosFWHMList, extremeFWHM, doBacklashComp = (focInd == 0))
+        prevFocPos = endFocPos
+        numFocPos = 3
+
+        while numFocPos < maxNumFocPos:
+            if len(focPosFWHMList) < 3:
+                return
+            focList, fwhmList = zip(*focPosFWHMList)
+            if len(focPosFWHMList) > 3:
+                focFit = TUI.Base.FocusFit.fitFocus(focList, fwhmList)
+                if focFit.bestFocSigma <= targetFocSigma and minFocPos <= focFit.bestFocPos <= maxFocPos:
+                    self.logWdg.addMsg(u"Adaptive: \N{GREEK SMALL LETTER SIGMA} %0.0f <= %0.0f after %d" % \
+                        (focFit.bestFocSigma, targetFocSigma, numFocPos))
+                    return
+
+            focPos = TUI.Base.FocusFit.getNextFocPos(focList, fwhmList, minFocPos, maxFocPos, minSpacing)
+            if focPos is None:
+                return
+            focPos = float(round(focPos))
+            # the fixed sweep only needs backlash compensation for its first move,
+            # but an adaptive sweep may reverse direction
+            doBacklashComp = (focPos < prevFocPos) == bool(self.focDir)
+            yield self.waitMeasureFocus(focPos, focPosFWHMList, extremeFWHM, doBacklashComp = doBacklashComp)
+            prevFocPos = focPos
+            numFocPos += 1
+
+    def waitFocusSweep(self):
+        """Conduct a focus sweep.
+        
+        If Adaptive Sweep is checked, first try an adaptive sweep (see waitAdaptiveFocusSweep);
+        if that fails to give an acceptable fit, fall back to the fixed sweep
+        (keeping the measurements of the adaptive sweep).
+        
+        Sets sr.value to True if successful.
+        """
+        sr = self.sr
+
+        focPosFWHMList = []
+        self.logWdg.addMsg("===== Sweep =====")
+        self.clearGraph()
+
+        centerFocPos = float(self.getEntryNum(self.centerFocPosWdg))
+        focusRange = float(self.getEntryNum(self.focusRangeWdg))
+        startFocPos = centerFocPos - (focusRange / 2.0)
+        endFocPos = startFocPos + focusRange
+        numFocPos = self.getEntryNum(self.numFocusPosWdg)
+        if numFocPos < 3:
+            raise sr.ScriptError("need at least three focus positions")
+        focusIncr = self.focusIncrWdg.getNum()
+        if focusIncr < self.MinFocusIncr:
+            raise sr.ScriptError("focus increment too small (< %s %s)" % (self.MinFocusIncr, MicronStr))
+        self.focDir = (endFocPos > startFocPos)
+        
+        extremeFocPos = Extremes(startFocPos)
+        extremeFocPos.addVal(endFocPos)
+        extremeFWHM = Extremes()
+        self.setGraphRange(extremeFocPos=extremeFocPos)
+        self.sweepMeasNum = 0
+        self.sweepCenterFocPos = centerFocPos
+        self.focPosToRestore = centerFocPos
+
+        bestEstFocPos = None
+        if self.adaptiveSweepWdg.getBool() and numFocPos > 3:
+            yield self.waitAdaptiveFocusSweep(focPosFWHMList, extremeFWHM, startFocPos, endFocPos, numFocPos)
+            try:
+                bestEstFocPos, bestEstFWHM = self.fitFocusSweep(
+                    focPosFWHMList, startFocPos, endFocPos, extremeFocPos, extremeFWHM)
+            except sr.ScriptError, e:
+                self.logWdg.addMsg("Adaptive sweep failed: %s; trying fixed sweep" % (e,),
+                    severity=RO.Constants.sevWarning)
+
+        if bestEstFocPos is None:
+            # fixed sweep, skipping focus positions that have already been measured
+            measFocPosList = [focPos for focPos, fwhm in focPosFWHMList]
+            doBacklashComp = True
+            for focInd in range(numFocPos):
+                focPos = float(startFocPos + (focInd*focusIncr))
+                if min([abs(focPos - measFocPos) for measFocPos in measFocPosList] + [focusIncr]) < 1.0:
+                    continue
+
+                yield self.waitMeasureFocus(focPos, focPosFWHMList, extremeFWHM, doBacklashComp)
+                doBacklashComp = False
+            
+            bestEstFocPos, bestEstFWHM = self.fitFocusSweep(
+                focPosFWHMList, startFocPos, endFocPos, extremeFocPos, extremeFWHM)
+
         # move to best focus if "Move to best Focus" checked
         moveBest = self.moveBestFocus.getBool()
         if not moveBest:
@@ -1255,6 +1354,39 @@ class BaseFocusScript(object):
         self.focPosToRestore = None
         self.centerFocPosWdg.set(int(round(bestEstFocPos)))
     
+    def waitMeasureFocus(self, focPos, focPosFWHMList, extremeFWHM, doBacklashComp=False):
+        """Move to a focus position and measure FWHM, as one step of a focus sweep.
+        
+        Logs and graphs the measurement, and if FWHM was measured,
+        appends (focPos, FWHM) to focPosFWHMList.
+        Sets sr.value to the StarMeas.
+        
+        Inputs:
+        - focPos: focus position (um)
+        - focPosFWHMList: list of (focus position, FWHM)
+        - extremeFWHM: extremes of FWHM (an Extremes object)
+        - doBacklashComp: if True, perform backlash compensation
+        """
+        sr = self.sr
+        self.sweepMeasNum += 1
+
+        yield self.waitSetFocus(focPos, doBacklashComp)
+        sr.showMsg("Exposing for %s sec at focus %0.0f %s" % \
+            (self.expTime, focPos, MicronStr))
+        yield self.waitCentroid()
+        starMeas = sr.value
+        if sr.debug:
+            starMeas.fwhm = 0.0001 * (focPos - self.sweepCenterFocPos) ** 2
+            starMeas.fwhm += random.gauss(1.0, 0.25)
+        extremeFWHM.addVal(starMeas.fwhm)
+
+        self.logStarMeas("Sw %d" % (self.sweepMeasNum,), focPos, starMeas)
+        
+        if starMeas.fwhm != None:
+            focPosFWHMList.append((focPos, starMeas.fwhm))
+            self.graphFocusMeas(focPosFWHMList, extremeFWHM=extremeFWHM)
+        sr.value = starMeas
+    
     def waitSetFocus(self, focPos, doBacklashComp=False):
         """Adjust focus.
 
@@ -1699,85 +1831,3 @@ class ImagerFocusScript(BaseFocusScript):
             return
         
         yield self.waitFindStarInList(filePath, starDataList)
-
-
-def polyfitw(x, y, w, ndegree, return_fit=False):
-    """
-    Performs a weighted least-squares polynomial fit with optional error estimates.
-
-    Inputs:
-        x: 
-            The independent variable vector.
-
-        y: 
-            The dependent variable vector.  This vector should be the same 
-            length as X.
-
-        w: 
-            The vector of weights.  This vector should be same length as 
-            X and Y.
-
-        ndegree: 
-            The degree of polynomial to fit.
-
-    Outputs:
-        If return_fit is false (the default) then polyfitw returns only C, a vector of 
-        coefficients of length ndegree+1.
-        If return_fit is true then polyfitw returns a tuple (c, yfit, yband, sigma, a)
-            yfit:   
-            The vector of calculated Y's.  Has an error of + or - yband.
-
-            yband: 
-            Error estimate for each point = 1 sigma.
-
-            sigma: 
-            The standard deviation in Y units.
-
-            a: 
-            Correlation matrix of the coefficients.
-
-    Written by:  George Lawrence, LASP, University of Colorado,
-                    December, 1981 in IDL.
-                    Weights added, April, 1987,  G. Lawrence
-                    Fixed bug with checking number of params, November, 1998, 
-                    Mark Rivers.  
-                    Python version, May 2002, Mark Rivers
-    """
-    n = min(len(x), len(y)) # size = smaller of x,y
-    m = ndegree + 1             # number of elements in coeff vector
-    a = numpy.zeros((m,m), float)  # least square matrix, weighted matrix
-    b = numpy.zeros(m, float)  # will contain sum w*y*x^j
-    z = numpy.ones(n, float)   # basis vector for constant term
-
-    a[0,0] = numpy.sum(w)
-    b[0] = numpy.sum(w*y)
-
-    for p in range(1, 2*ndegree+1):      # power loop
-        z = z*x # z is now x^p
-        if (p < m):  b[p] = numpy.sum(w*y*z)  # b is sum w*y*x^j
-        sum = numpy.sum(w*z)
-        for j in range(max(0,(p-ndegree)), min(ndegree,p)+1):
-            a[j,p-j] = sum
-
-    a = numpy.linalg.inv(a)
-    c = numpy.dot(b, a)
-    if not return_fit:
-        return c         # exit if only fit coefficients are wanted
-
-    # compute optional output parameters.
-    yfit = numpy.zeros(n, float)+c[0]  # one-sigma error estimates, init
-    for k in range(1, ndegree +1):
-        yfit = yfit + c[k]*(x**k)  # sum basis vectors
-    var = numpy.sum((yfit-y)**2 )/(n-m)  # variance estimate, unbiased
-    sigma = numpy.sqrt(var)
-    yband = numpy.zeros(n, float) + a[0,0]
-    z = numpy.ones(n, float)
-    for p in range(1,2*ndegree+1):      # compute correlated error estimates on y
-        z = z*x      # z is now x^p
-        sum = 0.
-        for j in range(max(0, (p - ndegree)), min(ndegree, p)+1):
-            sum = sum + a[j,p-j]
-        yband = yband + sum * z      # add in all the error sources
-    yband = yband*var
-    yband = numpy.sqrt(yband)
-    return c, yfit, yband, sigma, a
@@ -0,0 +1,183 @@
+"""Fit focus curves and choose focus positions for an adaptive focus sweep
+
+A fixed focus sweep measures FWHM at evenly spaced focus positions and fits a parabola.
+An adaptive sweep instead starts with the ends and center of the focus range and then
+chooses each new focus position based on the data so far (see getNextFocPos),
+stopping once the uncertainty of the best focus position is small enough (see fitFocus).
+This usually needs fewer exposures than a fixed sweep of comparable accuracy.
+
+Focus positions are scaled to [-1, 1] over the focus range for the computations,
+as in TUI.Base.PolyFit.
+
+This module does not use Tkinter. Run it as a script to compare simulated adaptive
+and fixed sweeps.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko getNextFocPos fits using TUI.Base.PolyFit.polyFit.
+"""
+import numpy
+import TUI.Base.PolyFit
+
+__all__ = ["FocusFit", "fitFocus", "getNextFocPos"]
+
+_GoldenFrac = (3.0 - numpy.sqrt(5.0)) / 2.0 # golden section fraction: 0.382...
+
+class FocusFit(object):
+    """A parabolic fit of FWHM vs. focus position
+
+    Attributes:
+    - coeff: fit coefficients, in order of increasing power (FWHM = c0 + c1 focus + c2 focus^2)
+    - numPoints: number of points fit
+    - fwhmSigma: standard deviation of FWHM about the fit; nan if too few points
+    - hasMin: True if the fit has a minimum (c2 > 0)
+    - bestFocPos: focus position of minimum FWHM; nan if no minimum
+    - bestFWHM: FWHM at bestFocPos; nan if no minimum
+    - bestFocSigma: estimated standard deviation of bestFocPos; nan if no minimum or too few points.
+        Computed by propagating the coefficient covariance through bestFocPos = -c1 / (2 c2),
+        using the larger of fwhmSigma and minFWHMSigmaFrac * bestFWHM as the FWHM noise
+        (so a fit with few points that happens to have tiny residuals is not trusted).
+    """
+    def __init__(self, focPosArr, fwhmArr, minFWHMSigmaFrac=0.03):
+        focPosArr = numpy.asarray(focPosArr, dtype=float)
+        fwhmArr = numpy.asarray(fwhmArr, dtype=float)
+        self.numPoints = len(focPosArr)
+        fitRes = TUI.Base.PolyFit.polyFit(focPosArr, fwhmArr, 2)
+        self.coeff = fitRes.coeff
+        self.fwhmSigma = fitRes.sigma
+        self.hasMin = self.coeff[2] > 0
+        self.bestFocPos, self.bestFWHM = [float(val) for val in TUI.Base.PolyFit.parabolaMin(self.coeff)]
+        self.bestFocSigma = numpy.nan
+        if self.hasMin and numpy.isfinite(self.fwhmSigma):
+            noiseSigma = max(self.fwhmSigma, minFWHMSigmaFrac * self.bestFWHM)
+            c0, c1, c2 = self.coeff
+            gradArr = numpy.array([0.0, -1.0 / (2.0 * c2), c1 / (2.0 * c2**2)])
+            self.bestFocSigma = float(numpy.sqrt(numpy.dot(gradArr, numpy.dot(fitRes.covar, gradArr)))) * noiseSigma
+
+    def __repr__(self):
+        return "%s(numPoints=%s, bestFocPos=%s, bestFocSigma=%s)" % \
+            (self.__class__.__name__, self.numPoints, self.bestFocPos, self.bestFocSigma)
+
+
+def fitFocus(focPosArr, fwhmArr, minFWHMSigmaFrac=0.03):
+    """Fit a parabola to FWHM vs. focus position
+
+    Inputs:
+    - focPosArr: focus positions
+    - fwhmArr: FWHM at each focus position
+    - minFWHMSigmaFrac: minimum FWHM noise, as a fraction of best FWHM, used to compute bestFocSigma
+
+    Returns a FocusFit.
+    Raises RuntimeError if there are too few points or distinct focus positions.
+    """
+    return FocusFit(focPosArr, fwhmArr, minFWHMSigmaFrac=minFWHMSigmaFrac)
+
+def getNextFocPos(focPosArr, fwhmArr, minFocPos, maxFocPos, minSpacing, numCandidates=201):
+    """Choose the next focus position for an adaptive focus sweep
+
+    Inputs:
+    - focPosArr: focus positions measured so far (at least 3 distinct positions)
+    - fwhmArr: FWHM at each focus position
+    - minFocPos, maxFocPos: range of focus positions to consider
+    - minSpacing: minimum distance of the new focus position from all measured positions
+    - numCandidates: number of evenly spaced candidate positions considered
+
+    Returns the next focus position, or None if no candidate is far enough from measured positions.
+
+    If the parabolic fit has a minimum within the range, the candidate is chosen that most reduces
+    the predicted variance of the best focus position (uncertainty-driven sampling).
+    Otherwise the minimum is bracketed by golden section search, starting from the lowest measured FWHM.
+    """
+    focPosArr = numpy.asarray(focPosArr, dtype=float)
+    fwhmArr = numpy.asarray(fwhmArr, dtype=float)
+    candArr = numpy.linspace(minFocPos, maxFocPos, numCandidates)
+    distArr = numpy.min(numpy.abs(candArr[:, numpy.newaxis] - focPosArr[numpy.newaxis, :]), axis=1)
+    candArr = candArr[distArr >= minSpacing]
+    if len(candArr) == 0:
+        return None
+
+    # compute in focus positions scaled to [-1, 1] over the focus range
+    focCtr = (minFocPos + maxFocPos) / 2.0
+    focScale = max((maxFocPos - minFocPos) / 2.0, 1.0e-10)
+    xArr = (focPosArr - focCtr) / focScale
+    try:
+        fitRes = TUI.Base.PolyFit.polyFit(xArr, fwhmArr, 2)
+    except RuntimeError:
+        # too few distinct focus positions to fit; use golden section
+        fitRes = None
+    if fitRes is not None:
+        c0, c1, c2 = fitRes.coeff
+        if c2 > 0 and -1.0 <= -c1 / (2.0 * c2) <= 1.0:
+            # choose the candidate that minimizes the predicted variance of the best focus position:
+            # var = g^T (N + v v^T)^-1 g = g^T N^-1 g - (g^T N^-1 v)^2 / (1 + v^T N^-1 v)
+            # where N is the normal matrix (N^-1 is fitRes.covar), v = (1, x, x^2) for the candidate
+            # and g is the gradient of best focus x = -c1 / (2 c2) with respect to the coefficients
+            normInv = fitRes.covar
+            gradArr = numpy.array([0.0, -1.0 / (2.0 * c2), c1 / (2.0 * c2**2)])
+            xCandArr = (candArr - focCtr) / focScale
+            vCandArr = numpy.column_stack([numpy.ones(len(xCandArr)), xCandArr, xCandArr**2])
+            nInvV = numpy.dot(vCandArr, normInv) # shape (numCand, 3); N is symmetric
+            gain = numpy.dot(nInvV, gradArr)**2 / (1.0 + numpy.sum(nInvV * vCandArr, axis=1))
+            return float(candArr[numpy.argmax(gain)])
+
+    # golden section: step from the lowest point into the larger adjacent interval
+    sortInd = numpy.argsort(focPosArr)
+    sortedFocArr = focPosArr[sortInd]
+    minInd = int(numpy.argmin(fwhmArr[sortInd]))
+    bestFoc = sortedFocArr[minInd]
+    if minInd == 0:
+        otherFoc = sortedFocArr[1]
+    elif minInd == len(sortedFocArr) - 1:
+        otherFoc = sortedFocArr[-2]
+    else:
+        lowFoc, highFoc = sortedFocArr[minInd - 1], sortedFocArr[minInd + 1]
+        otherFoc = lowFoc if bestFoc - lowFoc > highFoc - bestFoc else highFoc
+    goalFoc = bestFoc + _GoldenFrac * (otherFoc - bestFoc)
+    return float(candArr[numpy.argmin(numpy.abs(candArr - goalFoc))])
+
+
+def _simulateSweep(randState, focusRange, numPos, doAdaptive, targetSigma, noise):
+    """Simulate a focus sweep; return (number of measurements, error in best focus)
+
+    FWHM is 1 + 3 ((focus - best) / focusRange)^2 plus gaussian noise; best is random within the range.
+    """
+    minFoc, maxFoc = -focusRange / 2.0, focusRange / 2.0
+    trueBest = randState.uniform(-0.3, 0.3) * focusRange
+    def measure(focPos):
+        return 1.0 + 3.0 * ((focPos - trueBest) / focusRange)**2 + randState.normal(0.0, noise)
+
+    if doAdaptive:
+        focList = [minFoc, 0.0, maxFoc]
+        fwhmList = [measure(focPos) for focPos in focList]
+        while len(focList) < numPos:
+            focPos = getNextFocPos(focList, fwhmList, minFoc, maxFoc, minSpacing=focusRange / 20.0)
+            if focPos is None:
+                break
+            focList.append(focPos)
+            fwhmList.append(measure(focPos))
+            focFit = fitFocus(focList, fwhmList)
+            if focFit.bestFocSigma <= targetSigma and minFoc <= focFit.bestFocPos <= maxFoc:
+                break
+    else:
+        focList = list(numpy.linspace(minFoc, maxFoc, numPos))
+        fwhmList = [measure(focPos) for focPos in focList]
+    focFit = fitFocus(focList, fwhmList)
+    return len(focList), focFit.bestFocPos - trueBest
+
+
+if __name__ == "__main__":
+    randState = numpy.random.RandomState(3)
+    focusRange = 400.0
+    targetSigma = 0.015 * focusRange
+    print "Simulated focus sweeps: range=%0.0f; adaptive target sigma=%0.0f" % (focusRange, targetSigma)
+    for noise in (0.02, 0.05, 0.1):
+        for numPos in (5, 7, 9, 11):
+            resultDict = {}
+            for doAdaptive in (False, True):
+                resList = [_simulateSweep(randState, focusRange, numPos, doAdaptive, targetSigma, noise)
+                    for i in range(500)]
+                numArr, errArr = numpy.array(resList).T
+                resultDict[doAdaptive] = (numpy.mean(numArr), numpy.sqrt(numpy.mean(errArr**2)))
+            print "noise=%0.2f, max positions=%2d: fixed: %4.1f exposures, rms error=%5.1f;" \
+                " adaptive: %4.1f exposures, rms error=%5.1f" % \
+                ((noise, numPos) + resultDict[False] + resultDict[True])
@@ -0,0 +1,300 @@
+"""Record the values of selected keyword variables to disk
+
+Strip charts only see keyword values that arrive after they are created,
+so a monitor window opened in the middle of the night starts out empty.
+The KeyVarRecorder records selected keyword values continuously (regardless of
+which windows exist or are visible) so strip charts can backfill their lines.
+
+Each recorded series is stored in its own directory as a set of chunk files,
+one per chunkSec of time, named <chunk number>.dat where chunk number = int(t // chunkSec).
+Each chunk file contains little-endian float64 (time, value) pairs; time is a POSIX timestamp.
+New values are buffered in memory and appended to the chunk files every flushInterval seconds.
+Chunk files older than maxAge are deleted.
+
+Series are named <actor>.<keyword>.<index> for plain keyword values
+(see makeName); derived series may use any name that is a valid directory name.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import os
+import sys
+import time
+
+import numpy
+import RO.OS
+from RO.TkUtil import Timer
+import TUI.Version
+
+__all__ = ["KeyVarRecorder", "SeriesFile", "makeName", "getRecorder", "startRecorder"]
+
+_ChunkSuffix = ".dat"
+_DType = numpy.dtype("<f8")
+
+ProbeFluxName = "guider.probeFluxPerSec" # name of series of flux/sec of in-focus guide probes
+
+def makeName(actor, keyword, keyInd):
+    """Return the name of the series for one value of a keyword
+    """
+    return "%s.%s.%d" % (actor, keyword, keyInd)
+
+
+class SeriesFile(object):
+    """On-disk storage for one time series
+
+    Inputs:
+    - dirPath: directory for the chunk files; created if necessary
+    - chunkSec: time span of each chunk file (sec)
+    - maxAge: chunk files whose newest possible time is older than this (sec) are deleted
+
+    Does not use Tkinter.
+    """
+    def __init__(self, dirPath, chunkSec=3600, maxAge=86400):
+        self.dirPath = dirPath
+        self.chunkSec = float(chunkSec)
+        self.maxAge = float(maxAge)
+        self._pendingList = [] # list of (t, y) not yet written
+        if not os.path.isdir(self.dirPath):
+            os.makedirs(self.dirPath)
+        self._lastChunkNum = None
+        self.purge()
+
+    def append(self, t, y):
+        """Add a data point; it is not written until flush is called
+        """
+        self._pendingList.append((t, y))
+
+    def flush(self):
+        """Write pending data to disk
+        """
+        if not self._pendingList:
+            return
+        dataArr = numpy.array(self._pendingList, dtype=_DType)
+        self._pendingList = []
+        chunkNumArr = (dataArr[:, 0] // self.chunkSec).astype(int)
+        for chunkNum in numpy.unique(chunkNumArr):
+            outFile = open(self._getChunkPath(chunkNum), "ab")
+            try:
+                outFile.write(dataArr[chunkNumArr == chunkNum].tostring())
+            finally:
+                outFile.close()
+        lastChunkNum = chunkNumArr[-1]
+        if lastChunkNum != self._lastChunkNum:
+            self._lastChunkNum = lastChunkNum
+            self.purge()
+
+    def getData(self, tMin=None, tMax=None):
+        """Return (tArr, yArr) for data with tMin <= t <= tMax (None for no limit), in time order
+
+        Includes data that has not yet been written to disk.
+        """
+        dataList = []
+        for chunkNum in self._getChunkNums():
+            if tMin is not None and (chunkNum + 1) * self.chunkSec < tMin:
+                continue
+            if tMax is not None and chunkNum * self.chunkSec > tMax:
+                continue
+            chunkArr = numpy.fromfile(self._getChunkPath(chunkNum), dtype=_DType)
+            # ignore a partially written final point
+            numPts = len(chunkArr) // 2
+            dataList.append(chunkArr[0:numPts * 2].reshape(numPts, 2))
+        if self._pendingList:
+            dataList.append(numpy.array(self._pendingList, dtype=_DType))
+        if not dataList:
+            return numpy.zeros(0, dtype=float), numpy.zeros(0, dtype=float)
+        dataArr = numpy.concatenate(dataList)
+        isUsed = numpy.ones(len(dataArr), dtype=bool)
+        if tMin is not None:
+            isUsed &= dataArr[:, 0] >= tMin
+        if tMax is not None:
+            isUsed &= dataArr[:, 0] <= tMax
+        dataArr = dataArr[isUsed]
+        sortInd = numpy.argsort(dataArr[:, 0], kind="mergesort")
+        return dataArr[sortInd, 0].astype(float), dataArr[sortInd, 1].astype(float)
+
+    def purge(self):
+        """Delete chunk files that are older than maxAge
+        """
+        minChunkNum = int((time.time() - self.maxAge) // self.chunkSec)
+        for chunkNum in self._getChunkNums():
+            if chunkNum < minChunkNum:
+                try:
+                    os.remove(self._getChunkPath(chunkNum))
+                except OSError:
+                    pass
+
+    def _getChunkNums(self):
+        """Return a sorted list of the chunk numbers of existing chunk files"""
+        chunkNumList = []
+        for fileName in os.listdir(self.dirPath):
+            baseName, suffix = os.path.splitext(fileName)
+            if suffix != _ChunkSuffix:
+                continue
+            try:
+                chunkNumList.append(int(baseName))
+            except ValueError:
+                continue
+        chunkNumList.sort()
+        return chunkNumList
+
+    def _getChunkPath(self, chunkNum):
+        return os.path.join(self.dirPath, "%d%s" % (chunkNum, _ChunkSuffix))
+
+
+class KeyVarRecorder(object):
+    """Record keyword values to disk
+
+    Inputs:
+    - dirPath: root directory for recorded data; each series is saved in a subdirectory
+    - chunkSec: time span of each chunk file (sec)
+    - maxAge: data older than this (sec) is deleted
+    - flushInterval: interval at which new data is written to disk (sec)
+    """
+    def __init__(self, dirPath, chunkSec=3600, maxAge=86400, flushInterval=30):
+        self.dirPath = dirPath
+        self.chunkSec = float(chunkSec)
+        self.maxAge = float(maxAge)
+        self.flushInterval = float(flushInterval)
+        self._seriesDict = {} # dict of series name: SeriesFile
+        self._flushTimer = Timer()
+        self._flushTimer.start(self.flushInterval, self._flushLoop)
+
+    def addKeyVar(self, keyVar, keyInd=0, func=None, name=None):
+        """Record a value of a keyword variable
+
+        Inputs:
+        - keyVar: keyword variable
+        - keyInd: index of value to record; ignored if func is specified
+        - func: a function that takes the keyVar and returns the value to record, or None to record nothing;
+            use for values that depend on more than one keyword value
+        - name: name of series; if None then makeName(keyVar.actor, keyVar.name, keyInd)
+
+        Returns the name of the series.
+        Values are only recorded if the keyVar is current and genuine and the value is not None.
+        Raise RuntimeError if a series of this name is already being recorded.
+        """
+        if name is None:
+            if func is not None:
+                raise RuntimeError("Must specify name if func is specified")
+            name = makeName(keyVar.actor, keyVar.name, keyInd)
+        if name in self._seriesDict:
+            raise RuntimeError("Already recording %r" % (name,))
+        seriesFile = SeriesFile(
+            dirPath = os.path.join(self.dirPath, name),
+            chunkSec = self.chunkSec,
+            maxAge = self.maxAge,
+        )
+        self._seriesDict[name] = seriesFile
+
+        def callFunc(keyVar, seriesFile=seriesFile, keyInd=keyInd, func=func):
+            if not keyVar.isCurrent or not keyVar.isGenuine:
+                return
+            if func is None:
+                val = keyVar[keyInd]
+            else:
+                val = func(keyVar)
+            if val is None:
+                return
+            try:
+                seriesFile.append(time.time(), float(val))
+            except (TypeError, ValueError):
+                pass
+
+        keyVar.addCallback(callFunc, callNow=False)
+        return name
+
+    def flush(self):
+        """Write all pending data to disk
+        """
+        for name, seriesFile in self._seriesDict.iteritems():
+            try:
+                seriesFile.flush()
+            except Exception, e:
+                sys.stderr.write("Could not save recorded %s data: %s\n" % (name, e))
+
+    def getData(self, name, tMin=None, tMax=None):
+        """Return recorded data as (tArr, yArr) for tMin <= t <= tMax (None for no limit), in time order
+
+        Return None if the named series is not being recorded.
+        """
+        seriesFile = self._seriesDict.get(name)
+        if seriesFile is None:
+            return None
+        return seriesFile.getData(tMin, tMax)
+
+    def isRecording(self, name):
+        """Return True if the named series is being recorded
+        """
+        return name in self._seriesDict
+
+    def _flushLoop(self):
+        self.flush()
+        self._flushTimer.start(self.flushInterval, self._flushLoop)
+
+
+def _getRecordDir():
+    """Return the default directory for recorded keyword data
+    """
+    prefsDir = RO.OS.getPrefsDirs(inclNone=True)[0]
+    if prefsDir is None:
+        raise RuntimeError("Cannot determine prefs dir")
+    return os.path.join(prefsDir, "%s%sKeyHistory" % (RO.OS.getPrefsPrefix(), TUI.Version.ApplicationName))
+
+def _probeFluxPerSec(keyVar):
+    """Return flux/sec of a guide probe from the guider.probe keyVar, or None
+
+    Computed the same way as the Flux Monitor window.
+    """
+    import TUI.Models
+    if keyVar[6] is None or keyVar[7] is None:
+        # ignore out-of-focus probes
+        return None
+    expTime = TUI.Models.getModel("guider").expTime[0]
+    if not expTime:
+        return None
+    return keyVar[7] / expTime
+
+_Recorder = None
+
+def getRecorder():
+    """Return the KeyVarRecorder started by startRecorder, or None if not started
+    """
+    return _Recorder
+
+def startRecorder(dirPath=None):
+    """Start recording the keyword values shown by the monitor windows and return the KeyVarRecorder
+
+    Inputs:
+    - dirPath: directory for recorded data; if None then a directory in the preferences directory
+
+    If the recorder is already running, simply return it.
+    """
+    global _Recorder
+    if _Recorder is not None:
+        return _Recorder
+    import TUI.Models
+
+    if dirPath is None:
+        dirPath = _getRecordDir()
+    recorder = KeyVarRecorder(dirPath)
+    guiderModel = TUI.Models.getModel("guider")
+    tccModel = TUI.Models.getModel("tcc")
+    bossModel = TUI.Models.getModel("boss")
+    for keyVar, keyInd in (
+        (guiderModel.seeing, 0),
+        (guiderModel.fwhm, 1),
+        (guiderModel.scaleError, 0),
+        (guiderModel.scaleChange, 0),
+        (guiderModel.focusError, 0),
+        (guiderModel.focusChange, 0),
+        (tccModel.scaleFac, 0),
+        (tccModel.secFocus, 0),
+        (bossModel.SP1SecondaryDewarPress, 0),
+        (bossModel.SP2SecondaryDewarPress, 0),
+    ):
+        recorder.addKeyVar(keyVar, keyInd)
+    for cameraName in ("SP1R0", "SP1B2", "SP2R0", "SP2B2"):
+        recorder.addKeyVar(getattr(bossModel, "%sCCDTempRead" % (cameraName,)), 0)
+    recorder.addKeyVar(guiderModel.probe, func=_probeFluxPerSec, name=ProbeFluxName)
+    _Recorder = recorder
+    return recorder
@@ -0,0 +1,129 @@
+"""Time series of keyword values, shared by all strip chart lines that plot them
+
+Several monitor windows plot the same keyword values (e.g. guider seeing is shown
+by the Guide Monitor and the Seeing Monitor). Rather than each line keeping its own
+copy of the data and its own keyVar callback, getKeyVarSeries returns a KeyVarSeries
+that is shared by all lines that plot the same (actor, keyword, index, transform).
+Each shared series has one keyVar callback and one copy of the raw data,
+so memory and callback cost do not depend on how many windows show the series.
+The decimated data (a TimeSeries.MinMaxPyramid) is part of the shared series as well.
+
+Transforms are compared by identity, so to share a transformed series,
+use the same function object (e.g. a module-level function), not a new lambda or closure.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko The series is a TimeSeries.DecimatedSeries (so the decimation pyramid is shared too).
+"""
+import time
+
+import numpy
+import KeyVarRecorder
+import TimeSeries
+
+__all__ = ["KeyVarSeries", "getKeyVarSeries"]
+
+class KeyVarSeries(object):
+    """A time series of one value of a keyword variable
+
+    Inputs:
+    - keyVar: keyword variable
+    - keyInd: index of value
+    - func: function to transform the value; it never receives None and may return None
+        (in which case no point is added). If None then the value is not transformed.
+    - historyName: name of a series recorded by TUI.Base.KeyVarRecorder for backfilling;
+        the recorded values are used as is (func is not applied).
+        If None then recorded values of keyVar[keyInd] are used, transformed by func
+        (so func should only depend on its argument).
+    - maxLen: maximum number of data points kept
+
+    Lines that display the series register themselves with addLine. They must have methods:
+    - pointAdded(t, y): called when a data point is added
+    - dataChanged(): called when older data is added (see backfill)
+    """
+    def __init__(self, keyVar, keyInd=0, func=None, historyName=None, maxLen=100000):
+        self.keyVar = keyVar
+        self.keyInd = int(keyInd)
+        self.func = func
+        self.series = TimeSeries.DecimatedSeries(maxLen=maxLen)
+        self._lineList = []
+        self._historyName = historyName
+        self._historyTMin = None # recorded data from this time onwards has been added
+
+        keyVar.addCallback(self._keyVarCallback, callNow=False)
+
+    def addLine(self, line):
+        """Register a line that displays this series
+        """
+        if line not in self._lineList:
+            self._lineList.append(line)
+
+    def removeLine(self, line):
+        """Unregister a line; a no-op if not registered
+        """
+        if line in self._lineList:
+            self._lineList.remove(line)
+
+    def backfill(self, tMin):
+        """Add recorded data from tMin onwards that has not already been added
+
+        Does nothing if the data is not being recorded by TUI.Base.KeyVarRecorder.
+        Calls dataChanged for all lines if data is added.
+        """
+        recorder = KeyVarRecorder.getRecorder()
+        if not recorder:
+            return
+        if self._historyTMin is not None and tMin >= self._historyTMin:
+            return
+        if self._historyName is None:
+            historyName = KeyVarRecorder.makeName(self.keyVar.actor, self.keyVar.name, self.keyInd)
+            func = self.func
+        else:
+            historyName = self._historyName
+            func = None
+        if not recorder.isRecording(historyName):
+            return
+
+        tMax = self._historyTMin
+        if tMax is None:
+            tMax = self.series.firstTime
+        tArr, yArr = recorder.getData(historyName, tMin, tMax)
+        self._historyTMin = tMin
+        if func is not None:
+            yList = [func(y) for y in yArr]
+            isOK = numpy.array([y is not None for y in yList], dtype=bool)
+            tArr = tArr[isOK]
+            yArr = numpy.array([y for y in yList if y is not None], dtype=float)
+        if self.series.insertOlder(tArr, yArr) > 0:
+            for line in self._lineList[:]:
+                line.dataChanged()
+
+    def _keyVarCallback(self, keyVar):
+        if not keyVar.isCurrent or not keyVar.isGenuine:
+            return
+        val = keyVar[self.keyInd]
+        if val is None:
+            return
+        if self.func is not None:
+            val = self.func(val)
+            if val is None:
+                return
+        t = time.time()
+        self.series.append(t, val)
+        for line in self._lineList[:]:
+            line.pointAdded(t, val)
+
+
+_SeriesDict = {} # dict of (actor, keyword, keyInd, func, historyName): KeyVarSeries
+
+def getKeyVarSeries(keyVar, keyInd=0, func=None, historyName=None, maxLen=100000):
+    """Return the shared KeyVarSeries for the specified keyVar, index and transform, creating it if necessary
+
+    Inputs: the same as KeyVarSeries; maxLen is only used if a new series is created.
+    """
+    key = (keyVar.actor, keyVar.name, int(keyInd), func, historyName)
+    keyVarSeries = _SeriesDict.get(key)
+    if keyVarSeries is None:
+        keyVarSeries = KeyVarSeries(keyVar, keyInd=keyInd, func=func, historyName=historyName, maxLen=maxLen)
+        _SeriesDict[key] = keyVarSeries
+    return keyVarSeries
@@ -0,0 +1,494 @@
+"""Weighted polynomial fitting, used for focus curves
+
+Features:
+- polyFit: weighted least squares fit of one data set (using numpy.linalg.lstsq),
+  with optional iterative outlier rejection
+- polyFitMany: fit many data sets at once (e.g. one per guide probe or per frame)
+- bootstrapPolyFit and confInterval: bootstrap confidence intervals for any quantity
+  computed from the fit coefficients (such as the position of best focus)
+- polyfitw: a drop-in replacement for the IDL-derived polyfitw formerly in BaseFocusScript
+
+Coefficients are in order of increasing power: y = coeff[0] + coeff[1] x + coeff[2] x^2...
+(the same order as polyfitw, but the reverse of numpy.polyfit).
+
+To improve numerical conditioning the fits are computed in terms of x scaled to [-1, 1]
+and the coefficients are then converted back to unscaled x. Focus positions are typically
+thousands of microns, so the normal equations in unscaled x are badly conditioned.
+
+This module does not use Tkinter. Run it as a script to check its accuracy
+against the old polyfitw and to print benchmarks.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import time
+
+import numpy
+
+__all__ = ["PolyFitResult", "polyFit", "polyFitMany", "polyVal", "parabolaMin",
+    "bootstrapPolyFit", "confInterval", "polyfitw"]
+
+class PolyFitResult(object):
+    """The result of polyFit
+
+    Attributes:
+    - coeff: fit coefficients, in order of increasing power
+    - covar: inverse of the weighted normal matrix (the "correlation matrix" of polyfitw);
+        multiply by sigma^2 to get the covariance of the coefficients if weights are unknown
+    - isUsed: bool array; True for points used in the final fit (False for rejected points)
+    - sigma: standard deviation of the residuals of the points used (nan if too few points)
+    - numIter: number of fits performed (1 if no rejection)
+    """
+    def __init__(self, coeff, covar, isUsed, sigma, numIter):
+        self.coeff = coeff
+        self.covar = covar
+        self.isUsed = isUsed
+        self.sigma = sigma
+        self.numIter = numIter
+
+    @property
+    def degree(self):
+        return len(self.coeff) - 1
+
+    @property
+    def numUsed(self):
+        return int(numpy.sum(self.isUsed))
+
+    def __call__(self, x):
+        """Return the fit evaluated at x"""
+        return polyVal(self.coeff, x)
+
+    def getYBand(self, x):
+        """Return the 1-sigma error of the fit at x
+        """
+        xPowArr = _powers(numpy.asarray(x, dtype=float), self.degree)
+        return numpy.sqrt(numpy.einsum("...i,ij,...j->...", xPowArr, self.covar, xPowArr) * self.sigma**2)
+
+
+def polyVal(coeff, x):
+    """Evaluate polynomials at x
+
+    Inputs:
+    - coeff: coefficients, in order of increasing power; shape (..., degree+1)
+        to evaluate many polynomials at once
+    - x: values at which to evaluate; must broadcast against coeff[..., 0]
+
+    Uses Horner's method.
+    """
+    coeff = numpy.asarray(coeff, dtype=float)
+    x = numpy.asarray(x, dtype=float)
+    yArr = coeff[..., -1] + 0.0 * x
+    for ind in range(coeff.shape[-1] - 2, -1, -1):
+        yArr = yArr * x + coeff[..., ind]
+    return yArr
+
+def parabolaMin(coeff):
+    """Return the position and value of the minimum of parabolas
+
+    Inputs:
+    - coeff: coefficients (c0, c1, c2) in order of increasing power; shape (..., 3)
+
+    Returns (xMin, yMin); these are nan where the parabola has no minimum (c2 <= 0).
+    """
+    coeff = numpy.asarray(coeff, dtype=float)
+    c2 = numpy.where(coeff[..., 2] > 0, coeff[..., 2], numpy.nan)
+    xMin = -coeff[..., 1] / (2.0 * c2)
+    return xMin, polyVal(coeff, xMin)
+
+def polyFit(x, y, deg, w=None, rejSigma=None, maxIter=5, minPoints=None):
+    """Fit a polynomial using weighted least squares, optionally rejecting outliers
+
+    Inputs:
+    - x: independent variable (1-d array)
+    - y: dependent variable; same length as x
+    - deg: degree of polynomial
+    - w: weights (proportional to 1/variance of y); None for equal weights;
+        points with non-positive weight or non-finite x or y are ignored
+    - rejSigma: reject points whose residual is more than rejSigma * sigma; None for no rejection.
+        Rejection is iterated (rejected points may be restored) until the set of points
+        used does not change or maxIter fits have been made.
+    - maxIter: maximum number of fits when rejecting outliers
+    - minPoints: do not reject points if fewer than this many would remain; None for deg+2
+
+    Returns a PolyFitResult.
+    Raises RuntimeError if there are too few usable points.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    if x.shape != y.shape or x.ndim != 1:
+        raise RuntimeError("x and y must be 1-d arrays of the same length")
+    if w is None:
+        w = numpy.ones(x.shape, dtype=float)
+    else:
+        w = numpy.asarray(w, dtype=float)
+        if w.shape != x.shape:
+            raise RuntimeError("w must have the same length as x")
+    numCoeff = deg + 1
+    if minPoints is None:
+        minPoints = numCoeff + 1
+    isOK = numpy.isfinite(x) & numpy.isfinite(y) & (w > 0)
+    if numpy.sum(isOK) < numCoeff:
+        raise RuntimeError("too few data points")
+    minPoints = max(minPoints, numCoeff)
+
+    isUsed = isOK
+    numIter = 0
+    while True:
+        numIter += 1
+        coeff, covar = _lstsqFit(x[isUsed], y[isUsed], w[isUsed], deg)
+        sigma = _residSigma(x[isUsed], y[isUsed], coeff)
+        if rejSigma is None or numIter >= maxIter or not sigma > 0:
+            break
+        with numpy.errstate(invalid="ignore"):
+            newIsUsed = isOK & (numpy.abs(y - polyVal(coeff, x)) <= rejSigma * sigma)
+        if numpy.sum(newIsUsed) < minPoints or numpy.array_equal(newIsUsed, isUsed):
+            break
+        isUsed = newIsUsed
+    return PolyFitResult(coeff=coeff, covar=covar, isUsed=isUsed, sigma=sigma, numIter=numIter)
+
+def polyFitMany(x, y, deg, w=None):
+    """Fit many data sets at once using weighted least squares
+
+    Inputs:
+    - x: independent variable; shape (numPoints,) if shared by all fits, else (numFits, numPoints)
+    - y: dependent variable; shape (numFits, numPoints)
+    - deg: degree of polynomial
+    - w: weights; None for equal weights, else an array that broadcasts to y's shape;
+        points with non-positive weight or non-finite x or y are ignored
+
+    Returns coefficients as an array of shape (numFits, deg+1), in order of increasing power;
+    rows are nan for data sets that cannot be fit (too few points or no range of x).
+
+    The weighted normal equations (in scaled x) are built and solved for all fits at once.
+    """
+    y = numpy.array(y, dtype=float, ndmin=2)
+    x = numpy.broadcast_to(numpy.asarray(x, dtype=float), y.shape)
+    if w is None:
+        w = numpy.ones(y.shape, dtype=float)
+    else:
+        w = numpy.broadcast_to(numpy.asarray(w, dtype=float), y.shape)
+    numFits = y.shape[0]
+    numCoeff = deg + 1
+
+    isOK = numpy.isfinite(x) & numpy.isfinite(y) & (w > 0)
+    wArr = numpy.where(isOK, w, 0.0)
+    xArr = numpy.where(isOK, x, 0.0)
+    yArr = numpy.where(isOK, y, 0.0)
+    xCtr, xScale = _getScale(xArr, isOK)
+    safeScale = numpy.where(xScale > 0, xScale, 1.0)
+    xsArr = (xArr - xCtr[:, numpy.newaxis]) / safeScale[:, numpy.newaxis]
+
+    vArr = _powers(xsArr, deg) # shape (numFits, numPoints, numCoeff)
+    normArr = numpy.einsum("fpi,fp,fpj->fij", vArr, wArr, vArr)
+    rhsArr = numpy.einsum("fpi,fp->fi", vArr, wArr * yArr)
+
+    coeffArr = numpy.empty((numFits, numCoeff), dtype=float) + numpy.nan
+    canFit = (numpy.sum(isOK, axis=1) >= numCoeff) & (xScale > 0)
+    # reject badly conditioned systems (e.g. too few distinct x values)
+    canFit[canFit] = numpy.linalg.cond(normArr[canFit]) < 1.0e12
+    if numpy.any(canFit):
+        scaledCoeffArr = numpy.linalg.solve(normArr[canFit], rhsArr[canFit][..., numpy.newaxis])[..., 0]
+        convArr = _unscaleMatrix(xCtr[canFit], safeScale[canFit], deg)
+        coeffArr[canFit] = numpy.einsum("fij,fj->fi", convArr, scaledCoeffArr)
+    return coeffArr
+
+def bootstrapPolyFit(x, y, deg, w=None, func=None, numBoot=500, seed=None):
+    """Fit bootstrap resamplings of a data set
+
+    Inputs:
+    - x, y, deg, w: as for polyFit (without outlier rejection: apply polyFit first
+        and pass only the points it used if you want rejection)
+    - func: function that computes the quantity of interest from an array of coefficients
+        of shape (numBoot, deg+1); if None the coefficients are returned
+    - numBoot: number of bootstrap resamplings
+    - seed: seed for the random number generator; None for a random seed
+
+    Returns func(coeffArr): typically an array with one value per resampling.
+    Resamplings that cannot be fit produce nan coefficients.
+
+    Each resampling draws len(x) points with replacement; this is implemented by
+    weighting each point by the number of times it is drawn, so all resamplings
+    are fit at once by polyFitMany.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    numPoints = len(x)
+    randState = numpy.random.RandomState(seed)
+    countArr = randState.multinomial(numPoints, [1.0 / numPoints] * numPoints, size=numBoot)
+    wArr = countArr.astype(float)
+    if w is not None:
+        wArr *= numpy.asarray(w, dtype=float)
+    coeffArr = polyFitMany(x, numpy.tile(y, (numBoot, 1)), deg, w=wArr)
+    if func is None:
+        return coeffArr
+    return func(coeffArr)
+
+def confInterval(valArr, conf=0.6827):
+    """Return (low, high) limits of a central confidence interval, ignoring nan values
+
+    Inputs:
+    - valArr: values, e.g. from bootstrapPolyFit
+    - conf: confidence level (0-1); the default gives the equivalent of +/- 1 sigma
+
+    Returns (nan, nan) if there are no finite values.
+    """
+    valArr = numpy.asarray(valArr, dtype=float)
+    valArr = valArr[numpy.isfinite(valArr)]
+    if len(valArr) == 0:
+        return (numpy.nan, numpy.nan)
+    tailPct = (1.0 - conf) * 50.0
+    low, high = numpy.percentile(valArr, [tailPct, 100.0 - tailPct])
+    return (low, high)
+
+def polyfitw(x, y, w, ndegree, return_fit=False):
+    """Weighted least-squares polynomial fit with optional error estimates
+
+    A replacement for the IDL-derived polyfitw formerly in BaseFocusScript,
+    with the same inputs and outputs, but computed using polyFit.
+
+    Inputs:
+    - x: independent variable vector
+    - y: dependent variable vector; same length as x
+    - w: vector of weights; same length as x
+    - ndegree: degree of polynomial to fit
+
+    If return_fit is false returns only c, the vector of coefficients (length ndegree+1).
+    If return_fit is true returns a tuple (c, yfit, yband, sigma, a):
+    - yfit: the fit evaluated at x
+    - yband: 1-sigma error estimate of yfit
+    - sigma: standard deviation of y about the fit (in y units)
+    - a: correlation matrix of the coefficients
+    """
+    fitRes = polyFit(x, y, ndegree, w=w)
+    if not return_fit:
+        return fitRes.coeff
+    x = numpy.asarray(x, dtype=float)
+    return fitRes.coeff, fitRes(x), fitRes.getYBand(x), fitRes.sigma, fitRes.covar
+
+
+def _powers(x, deg):
+    """Return x**0, x**1... x**deg stacked along a new last axis"""
+    powArr = numpy.empty(x.shape + (deg + 1,), dtype=float)
+    powArr[..., 0] = 1.0
+    for ind in range(1, deg + 1):
+        powArr[..., ind] = powArr[..., ind - 1] * x
+    return powArr
+
+def _getScale(x, isOK):
+    """Return center and scale of x along the last axis, ignoring points that are not OK
+
+    Scaled x = (x - center) / scale is in the range [-1, 1].
+    Scale is 0 if there is no range of x.
+    """
+    hasData = numpy.any(isOK, axis=-1)
+    xMin = numpy.where(isOK, x, numpy.inf).min(axis=-1)
+    xMax = numpy.where(isOK, x, -numpy.inf).max(axis=-1)
+    xMin = numpy.where(hasData, xMin, 0.0)
+    xMax = numpy.where(hasData, xMax, 0.0)
+    return (xMin + xMax) / 2.0, (xMax - xMin) / 2.0
+
+def _unscaleMatrix(xCtr, xScale, deg):
+    """Return matrices that convert coefficients in scaled x to coefficients in x
+
+    Scaled x is (x - xCtr) / xScale. Returns an array of shape xCtr.shape + (deg+1, deg+1)
+    such that coeff = conv . scaledCoeff, where conv[j, k] is the coefficient of x^j
+    in ((x - xCtr) / xScale)^k = binom(k, j) (-xCtr)^(k-j) / xScale^k.
+    """
+    xCtr = numpy.asarray(xCtr, dtype=float)
+    xScale = numpy.asarray(xScale, dtype=float)
+    numCoeff = deg + 1
+    convArr = numpy.zeros(xCtr.shape + (numCoeff, numCoeff), dtype=float)
+    for k in range(numCoeff):
+        binom = 1.0
+        for j in range(k + 1):
+            convArr[..., j, k] = binom * (-xCtr)**(k - j) / xScale**k
+            binom = binom * (k - j) / (j + 1)
+    return convArr
+
+def _lstsqFit(x, y, w, deg):
+    """Fit a polynomial to one data set; all points must be usable
+
+    Returns (coeff, covar), where covar is the inverse of the weighted normal matrix in unscaled x.
+    Raises RuntimeError if the data cannot be fit.
+    """
+    isOK = numpy.ones(x.shape, dtype=bool)
+    xCtr, xScale = _getScale(x, isOK)
+    if not xScale > 0:
+        raise RuntimeError("no range of x")
+    sqrtW = numpy.sqrt(w)
+    vArr = _powers((x - xCtr) / xScale, deg) * sqrtW[:, numpy.newaxis]
+    scaledCoeff, dumResid, rank, dumSingVal = numpy.linalg.lstsq(vArr, y * sqrtW, rcond=None)
+    if rank < deg + 1:
+        raise RuntimeError("too few distinct x values")
+    convArr = _unscaleMatrix(xCtr, xScale, deg)
+    scaledCovar = numpy.linalg.inv(numpy.dot(vArr.T, vArr))
+    coeff = numpy.dot(convArr, scaledCoeff)
+    covar = numpy.dot(numpy.dot(convArr, scaledCovar), convArr.T)
+    return coeff, covar
+
+def _residSigma(x, y, coeff):
+    """Return the standard deviation of y about the fit, or nan if too few points"""
+    numDOF = len(x) - len(coeff)
+    if numDOF <= 0:
+        return numpy.nan
+    return numpy.sqrt(numpy.sum((y - polyVal(coeff, x))**2) / numDOF)
+
+
+def _legacyPolyfitw(x, y, w, ndegree, return_fit=False):
+    """The polyfitw formerly in BaseFocusScript (by G. Lawrence and M. Rivers); used for testing
+    """
+    n = min(len(x), len(y))
+    m = ndegree + 1
+    a = numpy.zeros((m,m), float)
+    b = numpy.zeros(m, float)
+    z = numpy.ones(n, float)
+    a[0,0] = numpy.sum(w)
+    b[0] = numpy.sum(w*y)
+    for p in range(1, 2*ndegree+1):
+        z = z*x
+        if (p < m):  b[p] = numpy.sum(w*y*z)
+        sum = numpy.sum(w*z)
+        for j in range(max(0,(p-ndegree)), min(ndegree,p)+1):
+            a[j,p-j] = sum
+    a = numpy.linalg.inv(a)
+    c = numpy.dot(b, a)
+    if not return_fit:
+        return c
+    yfit = numpy.zeros(n, float)+c[0]
+    for k in range(1, ndegree +1):
+        yfit = yfit + c[k]*(x**k)
+    var = numpy.sum((yfit-y)**2 )/(n-m)
+    sigma = numpy.sqrt(var)
+    yband = numpy.zeros(n, float) + a[0,0]
+    z = numpy.ones(n, float)
+    for p in range(1,2*ndegree+1):
+        z = z*x
+        sum = 0.
+        for j in range(max(0, (p - ndegree)), min(ndegree, p)+1):
+            sum = sum + a[j,p-j]
+        yband = yband + sum * z
+    yband = yband*var
+    yband = numpy.sqrt(yband)
+    return c, yfit, yband, sigma, a
+
+def _makeFocusData(randState, numPoints, centerFocus=0.0, focusRange=400.0, noise=0.05):
+    """Return simulated focus sweep data: focPosArr, fwhmArr, true coefficients
+    """
+    focPosArr = numpy.linspace(centerFocus - focusRange / 2.0, centerFocus + focusRange / 2.0, numPoints)
+    bestFocus = centerFocus + randState.uniform(-0.2, 0.2) * focusRange
+    c2 = randState.uniform(0.5, 2.0) / (focusRange / 2.0)**2
+    bestFWHM = randState.uniform(0.8, 2.0)
+    trueCoeff = numpy.array([bestFWHM + c2 * bestFocus**2, -2.0 * c2 * bestFocus, c2])
+    fwhmArr = polyVal(trueCoeff, focPosArr) + randState.normal(0.0, noise, numPoints)
+    return focPosArr, fwhmArr, trueCoeff
+
+def _relDiff(a, b):
+    a = numpy.asarray(a, dtype=float)
+    b = numpy.asarray(b, dtype=float)
+    return numpy.max(numpy.abs(a - b) / numpy.maximum(numpy.abs(b), 1.0e-300))
+
+def _timeIt(func, numReps):
+    """Return the best time (sec) per call of func over 3 sets of numReps calls"""
+    bestTime = None
+    for i in range(3):
+        startTime = time.time()
+        for j in range(numReps):
+            func()
+        dTime = (time.time() - startTime) / numReps
+        if bestTime is None or dTime < bestTime:
+            bestTime = dTime
+    return bestTime
+
+
+if __name__ == "__main__":
+    print "Testing PolyFit"
+    nFailures = 0
+    randState = numpy.random.RandomState(1)
+
+    def check(cond, msgStr):
+        global nFailures
+        if not cond:
+            nFailures += 1
+            print "Assertion failed:", msgStr
+
+    # accuracy compared to the old polyfitw, for well conditioned data (focus centered near 0)
+    for numPoints in (3, 5, 11):
+        for trial in range(20):
+            x, y, trueCoeff = _makeFocusData(randState, numPoints)
+            w = randState.uniform(0.5, 2.0, numPoints)
+            if numPoints == 3:
+                check(_relDiff(polyfitw(x, y, w, 2), _legacyPolyfitw(x, y, w, 2)) < 1.0e-8,
+                    "coeff mismatch for %d points" % (numPoints,))
+                continue
+            newRes = polyfitw(x, y, w, 2, True)
+            oldRes = _legacyPolyfitw(x, y, w, 2, True)
+            for name, newVal, oldVal in zip(("c", "yfit", "yband", "sigma", "a"), newRes, oldRes):
+                check(_relDiff(newVal, oldVal) < 1.0e-8,
+                    "%s mismatch for %d points: %s != %s" % (name, numPoints, newVal, oldVal))
+
+    # typical focus positions are large; the old normal equations lose precision there
+    maxOldErr = maxNewErr = 0.0
+    for trial in range(50):
+        x, y, trueCoeff = _makeFocusData(randState, 9, centerFocus=randState.uniform(1.0e4, 5.0e4), noise=0.0)
+        w = numpy.ones(len(x))
+        oldFitErr = numpy.max(numpy.abs(polyVal(_legacyPolyfitw(x, y, w, 2), x) - y))
+        newFitErr = numpy.max(numpy.abs(polyVal(polyfitw(x, y, w, 2), x) - y))
+        maxOldErr = max(maxOldErr, oldFitErr)
+        maxNewErr = max(maxNewErr, newFitErr)
+    check(maxNewErr < 1.0e-8, "poor fit of exact data at large focus: max error=%s" % (maxNewErr,))
+    print "Max error fitting exact focus curves near 1e4-5e4 um: old polyfitw=%0.2g; polyFit=%0.2g" % \
+        (maxOldErr, maxNewErr)
+
+    # outlier rejection
+    x, y, trueCoeff = _makeFocusData(randState, 15, noise=0.02)
+    y[4] += 2.0
+    fitRes = polyFit(x, y, 2, rejSigma=3.0)
+    check(not fitRes.isUsed[4] and fitRes.numUsed == 14, "outlier not rejected: isUsed=%s" % (fitRes.isUsed,))
+    check(abs(parabolaMin(fitRes.coeff)[0] - parabolaMin(trueCoeff)[0]) < 10.0, "bad best focus after rejection")
+
+    # many fits at once, with missing data, compared to fitting each separately
+    numFits = 200
+    xArr = numpy.empty((numFits, 9))
+    yArr = numpy.empty((numFits, 9))
+    for ind in range(numFits):
+        xArr[ind], yArr[ind], trueCoeff = _makeFocusData(randState, 9, centerFocus=2.0e4)
+    yArr[3, 2] = numpy.nan
+    yArr[5, :] = numpy.nan
+    coeffArr = polyFitMany(xArr, yArr, 2)
+    check(numpy.all(numpy.isnan(coeffArr[5])), "fit of no data should be nan")
+    for ind in (0, 3, 17, numFits - 1):
+        isOK = numpy.isfinite(yArr[ind])
+        check(_relDiff(coeffArr[ind], polyFit(xArr[ind][isOK], yArr[ind][isOK], 2).coeff) < 1.0e-7,
+            "polyFitMany mismatch for fit %d" % (ind,))
+
+    # bootstrap
+    x, y, trueCoeff = _makeFocusData(randState, 11, noise=0.05)
+    bestFocusArr = bootstrapPolyFit(x, y, 2, func=lambda c: parabolaMin(c)[0], numBoot=1000, seed=5)
+    low, high = confInterval(bestFocusArr, 0.99)
+    trueBest = parabolaMin(trueCoeff)[0]
+    check(low < trueBest < high, "true best focus %s not in 99%% interval [%s, %s]" % (trueBest, low, high))
+
+    print "%d failures" % (nFailures,)
+
+    print
+    print "Benchmarks (time per fit)"
+    x, y, trueCoeff = _makeFocusData(randState, 11)
+    w = numpy.ones(len(x))
+    print "single fit with error estimates: old polyfitw=%0.1f us; polyfitw=%0.1f us" % (
+        _timeIt(lambda: _legacyPolyfitw(x, y, w, 2, True), 1000) * 1.0e6,
+        _timeIt(lambda: polyfitw(x, y, w, 2, True), 1000) * 1.0e6,
+    )
+    for numFits in (17, 1000, 20000):
+        xArr = numpy.tile(x, (numFits, 1))
+        yArr = xArr * 0.001 + randState.normal(0.0, 0.05, xArr.shape) + 1.0
+        wArr = numpy.ones(xArr.shape)
+        numReps = max(1, 2000 // numFits)
+        def oldLoop():
+            for ind in range(numFits):
+                _legacyPolyfitw(xArr[ind], yArr[ind], wArr[ind], 2)
+        oldTime = _timeIt(oldLoop, numReps) / numFits
+        newTime = _timeIt(lambda: polyFitMany(xArr, yArr, 2, w=wArr), numReps) / numFits
+        print "%5d fits: old polyfitw in a loop=%0.2f us; polyFitMany=%0.2f us; speedup=%0.1fx" % \
+            (numFits, oldTime * 1.0e6, newTime * 1.0e6, oldTime / newTime)
+    print "bootstrap: %0.1f ms for 1000 resamplings" % \
+        (_timeIt(lambda: bootstrapPolyFit(x, y, 2, numBoot=1000), 5) * 1.0e3,)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""Cache of compiled script files
+
+Script windows (TUI.Base.Wdg.ScriptFileWdg) execute their script file each time the window
+is opened or reloaded. getScriptCode returns the compiled code for a script file,
+compiling it only if the file has changed.
+
+Compiled code is cached in memory and on disk, keyed by the full path, modification time
+and size of the script file. The disk cache is a directory in the preferences directory
+containing one file per script, named <md5 hash of full path>.pyc; each file contains
+the marshalled tuple (python magic number, full path, mtime, size, code object).
+If the disk cache cannot be read or written it is ignored.
+
+File modification times may have a resolution as coarse as 2 seconds (e.g. FAT), so a file
+edited again just after it was compiled could keep the same mtime and size. To avoid running
+stale code, code compiled from a file whose mtime is within _MTimeResolution of the time
+the file was read is not cached (in memory or on disk).
+
+Does not use Tkinter, so getScriptCode may be called from a background thread.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Do not cache code for a file modified within _MTimeResolution of when it was read,
+                    since a later edit might not change the mtime.
+"""
+import hashlib
+import imp
+import marshal
+import os
+import sys
+import threading
+import time
+
+import RO.OS
+import RO.StringUtil
+import TUI.Version
+
+__all__ = ["getScriptCode", "getCacheDir"]
+
+_CacheSuffix = ".pyc"
+_MTimeResolution = 2.0 # worst-case resolution of file modification time (sec)
+
+_CodeDict = {} # dict of full path: (mtime, size, code object)
+_CodeLock = threading.Lock()
+
+def getCacheDir():
+    """Return the directory in which compiled scripts are cached, or None if unknown
+    """
+    prefsDir = RO.OS.getPrefsDirs(inclNone=True)[0]
+    if prefsDir is None:
+        return None
+    return os.path.join(prefsDir, "%s%sScriptCache" % (RO.OS.getPrefsPrefix(), TUI.Version.ApplicationName))
+
+def getScriptCode(filePath, useDiskCache=True):
+    """Return the compiled code for a script file, compiling it only if necessary
+
+    Inputs:
+    - filePath: path of script file
+    - useDiskCache: if True, read and write compiled code in the disk cache (see getCacheDir)
+
+    Raises EnvironmentError if the file cannot be read and SyntaxError if it cannot be compiled.
+    """
+    fullPath = os.path.abspath(filePath)
+    fileStat = os.stat(fullPath)
+    cacheKey = (fileStat.st_mtime, fileStat.st_size)
+
+    codeData = _CodeDict.get(fullPath)
+    if codeData is not None and codeData[0:2] == cacheKey:
+        return codeData[2]
+
+    with _CodeLock:
+        code = None
+        cachePath = None
+        if useDiskCache:
+            cachePath = _getCachePath(fullPath)
+        if cachePath:
+            try:
+                code = _loadCache(cachePath, fullPath, cacheKey)
+            except Exception, e:
+                sys.stderr.write("Could not read script cache %r: %s\n" % (cachePath, RO.StringUtil.strFromException(e)))
+
+        if code is None:
+            readTime = time.time()
+            scriptFile = open(fullPath, "rU")
+            try:
+                source = scriptFile.read()
+            finally:
+                scriptFile.close()
+            if not source.endswith("\n"):
+                source += "\n"
+            code = compile(source, fullPath, "exec")
+            if fileStat.st_mtime > readTime - _MTimeResolution:
+                # file was modified too recently to trust its mtime; do not cache the code
+                return code
+            if cachePath:
+                try:
+                    _saveCache(cachePath, fullPath, cacheKey, code)
+                except Exception:
+                    # the directory may be read-only, so silently give up
+                    pass
+
+        _CodeDict[fullPath] = cacheKey + (code,)
+        return code
+
+def _getCachePath(fullPath):
+    """Return the path of the disk cache file for a script, or None if the cache dir is unknown
+    """
+    cacheDir = getCacheDir()
+    if cacheDir is None:
+        return None
+    if isinstance(fullPath, unicode):
+        fullPath = fullPath.encode("utf-8")
+    return os.path.join(cacheDir, hashlib.md5(fullPath).hexdigest() + _CacheSuffix)
+
+def _loadCache(cachePath, fullPath, cacheKey):
+    """Load compiled code from a disk cache file
+
+    Return the code object, or None if the cache does not exist or is out of date.
+    """
+    if not os.path.isfile(cachePath):
+        return None
+    cacheFile = open(cachePath, "rb")
+    try:
+        cacheData = marshal.load(cacheFile)
+    finally:
+        cacheFile.close()
+    magic, cachedPath, mtime, size, code = cacheData
+    if (magic, cachedPath, (mtime, size)) != (imp.get_magic(), fullPath, cacheKey):
+        return None
+    return code
+
+def _saveCache(cachePath, fullPath, cacheKey, code):
+    """Save compiled code to a disk cache file
+    """
+    cacheDir = os.path.dirname(cachePath)
+    if not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+
+    # write to a temporary file, then rename, so a partially written cache is never read
+    tempPath = "%s.%s.tmp" % (cachePath, threading.current_thread().ident)
+    cacheFile = open(tempPath, "wb")
+    try:
+        marshal.dump((imp.get_magic(), fullPath) + cacheKey + (code,), cacheFile)
+    finally:
+        cacheFile.close()
+    if os.path.exists(cachePath):
+        os.remove(cachePath) # needed on Windows
+    os.rename(tempPath, cachePath)
+
+
+if __name__ == "__main__":
+    fileName = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Wdg", "TestScriptWdg.py")
+    if len(sys.argv) > 1:
+        fileName = sys.argv[1]
+    print "Disk cache directory = %r" % (getCacheDir(),)
+    for useDiskCache in (False, True, True):
+        _CodeDict.clear()
+        startTime = time.time()
+        code = getScriptCode(fileName, useDiskCache=useDiskCache)
+        print "Loaded %r in %0.4f sec; useDiskCache=%s" % (fileName, time.time() - startTime, useDiskCache)
+    startTime = time.time()
+    getScriptCode(fileName)
+    print "Loaded %r from memory in %0.6f sec" % (fileName, time.time() - startTime)
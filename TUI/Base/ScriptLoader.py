@@ -3,12 +3,20 @@
 
 History:
 2014-02-11 ROwen    Extracted from TUI.ScriptMenu and renamed from _LoadScript
+2026-10-19 JParejko reopenScriptWindows loads the compiled scripts (see TUI.Base.ScriptCache)
+                    in a background thread, opening each window as its script is ready,
+                    so restoring many script windows no longer delays startup.
+                    Bug fix: reopenScriptWindows tried to reopen a script once for each script dir
+                    that contained it.
 """
 import os
 import tkMessageBox
+from opscore.actor import ScriptRunner
+import RO.Alg
 import RO.Constants
 import RO.OS
 from RO.StringUtil import strFromException
+import TUI.Base.ScriptCache
 import TUI.Base.Wdg
 import TUI.TUIPaths
 import TUI.Models
@@ -89,13 +97,19 @@ class ScriptLoader:
             dispatcher = self.tuiModel.dispatcher,
         )
 
+_ReopenSRList = [] # ScriptRunners reopening script windows; a reference is kept while they run
+
 def reopenScriptWindows():
     """Reopen script windows that were open before
+
+    Returns immediately; the scripts are loaded in a background thread
+    and each window is opened as soon as its script is ready.
     """
     scriptDirs = getScriptDirs()
     tuiModel = TUI.Models.getModel("tui")
     tlSet = tuiModel.tlSet
     scriptNames = tlSet.getNamesInGeomFile(prefix=ScriptWindowNamePrefix)
+    loaderList = []
     for name in scriptNames:
         if tlSet.getDesVisible(name):
             # name format is <ScriptWindowNamePrefix>.<colon-separated-subPath>
@@ -104,8 +118,37 @@ def reopenScriptWindows():
             for scriptDir in scriptDirs:
                 fullPath = os.path.join(scriptDir, subPath)
                 if os.path.isfile(fullPath):
-                    ScriptLoader(subPathList=subPathList, fullPath=fullPath, showErrDialog=False)()
-                    continue
+                    loaderList.append(ScriptLoader(subPathList=subPathList, fullPath=fullPath, showErrDialog=False))
+                    break
+    if not loaderList:
+        return
+
+    reopenSR = ScriptRunner(
+        runFunc = RO.Alg.GenericCallback(_reopenScripts, loaderList),
+        name = "reopenScriptWindows",
+    )
+    _ReopenSRList.append(reopenSR)
+    reopenSR.start()
+
+def _reopenScripts(loaderList, sr):
+    """Load each script in a background thread, then open its window (a ScriptRunner run function)
+    """
+    try:
+        for loader in loaderList:
+            yield sr.waitThread(_loadScriptCode, loader.fullPath)
+            loader()
+    finally:
+        _ReopenSRList.remove(sr)
+
+def _loadScriptCode(fullPath):
+    """Load the compiled code for a script into TUI.Base.ScriptCache, ignoring errors
+
+    Errors are ignored because they are reported when the script window is created.
+    """
+    try:
+        TUI.Base.ScriptCache.getScriptCode(fullPath)
+    except Exception:
+        pass
 
 
 
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+"""Record where the time goes while an opscore.actor.ScriptRunner script runs.
+
+A script's run function is a generator that yields each time it waits
+(for a command, a keyword variable, a thread, a time interval...) and may yield sub-generators
+(e.g. "yield self.waitCentroid()"), which the script runner then runs.
+ScriptProfiler.profileRun wraps the run generator (and any sub-generators it yields)
+to record one ProfileStep per yield: the kind of wait, what was waited for
+(determined by wrapping the script runner's wait methods), when the wait began,
+how long it lasted and how long the Python code before the yield took.
+
+The cost is a few calls to time.time and a list append per yield, so profiling may be left on.
+At most maxSteps steps are kept, but the summary (see getSummary) always covers all steps.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import time
+import types
+
+__all__ = ["ProfileStep", "ScriptProfiler"]
+
+# wait methods of opscore.actor.ScriptRunner to wrap, and the kind of wait each represents
+_WaitMethodKindList = (
+    ("waitCmd", "cmd"),
+    ("waitCmdVars", "cmd"),
+    ("waitKeyVar", "keyVar"),
+    ("waitMS", "sleep"),
+    ("waitSec", "sleep"),
+    ("waitThread", "thread"),
+    ("waitPause", "pause"),
+    ("waitUser", "user"),
+)
+
+CallKind = "call" # kind of step that yields a sub-generator
+ReturnKind = "return" # kind of step that ends a generator
+OtherKind = "other" # kind of step that yields without calling a known wait method
+
+class ProfileStep(object):
+    """Information about one yield of a script
+
+    Attributes:
+    - path: names of the generators that were running, outermost first (e.g. ("run", "waitCentroid"))
+    - kind: kind of wait: one of "cmd", "keyVar", "sleep", "thread", "pause", "user",
+        CallKind, ReturnKind or OtherKind
+    - desc: what was waited for, e.g. actor and command; "" if unknown
+    - begTime: time the wait began (unix seconds)
+    - waitSec: duration of wait (sec); 0 for CallKind and ReturnKind steps
+    - workSec: duration of the Python code that ran before the yield (sec)
+    """
+    __slots__ = ("path", "kind", "desc", "begTime", "waitSec", "workSec")
+    def __init__(self, path, kind, desc, begTime, waitSec, workSec):
+        self.path = path
+        self.kind = kind
+        self.desc = desc
+        self.begTime = begTime
+        self.waitSec = waitSec
+        self.workSec = workSec
+
+
+class ScriptProfiler(object):
+    """Profile the steps of a ScriptRunner script
+
+    Inputs:
+    - isEnabled: if True then profileRun records steps, else it runs the script unchanged
+    - maxSteps: maximum number of steps to keep
+
+    To use: wrap the script's run function with profileRun (see makeRunFunc).
+    """
+    def __init__(self, isEnabled=False, maxSteps=10000):
+        self.isEnabled = bool(isEnabled)
+        self.maxSteps = int(maxSteps)
+        self._waitDesc = None # (kind, desc) of the most recent call to a wait method
+        self.clear()
+
+    def clear(self):
+        """Clear recorded data
+        """
+        self.stepList = []
+        self.numSteps = 0 # number of steps recorded, including those not kept in stepList
+        self.begTime = None
+        self.endTime = None
+        self._summaryDict = {} # dict of (path, kind, desc): [count, waitSec, workSec]
+
+    def getSummary(self):
+        """Return a list of (path, kind, desc, count, waitSec, workSec), one per distinct (path, kind, desc)
+
+        The list is in order of decreasing waitSec + workSec.
+        """
+        summaryList = [key + tuple(val) for key, val in self._summaryDict.iteritems()]
+        summaryList.sort(key=lambda item: -(item[4] + item[5]))
+        return summaryList
+
+    def getPathTotals(self):
+        """Return a dict of path: total time (sec) spent in that generator and the generators it called
+        """
+        pathDict = {}
+        for path, kind, desc, count, waitSec, workSec in self.getSummary():
+            for endInd in range(1, len(path) + 1):
+                subPath = path[0:endInd]
+                pathDict[subPath] = pathDict.get(subPath, 0.0) + waitSec + workSec
+        return pathDict
+
+    def writeSteps(self, outFile):
+        """Write the recorded steps to a file as tab-separated text, one line per step
+
+        Inputs:
+        - outFile: an open file (or other object with a write method)
+        """
+        outFile.write("path\tkind\tdesc\tbegTime\twaitSec\tworkSec\n")
+        for step in self.stepList:
+            outFile.write("%s\t%s\t%s\t%0.3f\t%0.4f\t%0.4f\n" % \
+                ("/".join(step.path), step.kind, step.desc.replace("\t", " "), step.begTime, step.waitSec, step.workSec))
+        if self.numSteps > len(self.stepList):
+            outFile.write("# %d later steps were not recorded\n" % (self.numSteps - len(self.stepList),))
+
+    def makeRunFunc(self, runFunc):
+        """Return a run function that profiles runFunc (if profiling is enabled when it is run)
+        """
+        def profiledRunFunc(sr):
+            return self.profileRun(runFunc, sr)
+        return profiledRunFunc
+
+    def makeScriptClass(self, scriptClass):
+        """Return a subclass of scriptClass whose run method is profiled (if profiling is enabled when it is run)
+        """
+        profiler = self
+        class ProfiledScriptClass(scriptClass):
+            def run(self, sr):
+                return profiler.profileRun(lambda sr: scriptClass.run(self, sr), sr)
+        ProfiledScriptClass.__name__ = scriptClass.__name__
+        return ProfiledScriptClass
+
+    def profileRun(self, runFunc, sr):
+        """Call runFunc(sr) and, if profiling is enabled and it returns a generator, return a profiled generator
+        """
+        runIter = runFunc(sr)
+        if not self.isEnabled or not isinstance(runIter, types.GeneratorType):
+            return runIter
+        self.clear()
+        self._wrapWaitMethods(sr)
+        self.begTime = time.time()
+        return self._profileIter(runIter, (runIter.gi_code.co_name,), isRun=True)
+
+    def _profileIter(self, runIter, path, isRun=False):
+        """Yield the values yielded by runIter, recording a step for each
+        """
+        try:
+            while True:
+                workBegTime = time.time()
+                self._waitDesc = None
+                try:
+                    val = runIter.next()
+                except StopIteration:
+                    endTime = time.time()
+                    self._addStep(path, ReturnKind, "", endTime, 0.0, endTime - workBegTime)
+                    return
+                waitBegTime = time.time()
+                if isinstance(val, types.GeneratorType):
+                    subName = val.gi_code.co_name
+                    self._addStep(path, CallKind, subName, waitBegTime, 0.0, waitBegTime - workBegTime)
+                    yield self._profileIter(val, path + (subName,))
+                else:
+                    kind, desc = self._waitDesc or (OtherKind, "")
+                    yield val
+                    self._addStep(path, kind, desc, waitBegTime, time.time() - waitBegTime, waitBegTime - workBegTime)
+        finally:
+            runIter.close()
+            if isRun:
+                self.endTime = time.time()
+
+    def _addStep(self, path, kind, desc, begTime, waitSec, workSec):
+        """Record one step
+        """
+        self.numSteps += 1
+        if len(self.stepList) < self.maxSteps:
+            self.stepList.append(ProfileStep(path, kind, desc, begTime, waitSec, workSec))
+        summary = self._summaryDict.get((path, kind, desc))
+        if summary is None:
+            self._summaryDict[(path, kind, desc)] = [1, waitSec, workSec]
+        else:
+            summary[0] += 1
+            summary[1] += waitSec
+            summary[2] += workSec
+
+    def _wrapWaitMethods(self, sr):
+        """Wrap the wait methods of a script runner so they record what is being waited for
+        """
+        if getattr(sr, "_profilerWaitWrapped", False):
+            return
+        sr._profilerWaitWrapped = True
+        for methodName, kind in _WaitMethodKindList:
+            method = getattr(sr, methodName, None)
+            if method is not None:
+                setattr(sr, methodName, self._makeWaitWrapper(method, methodName, kind))
+
+    def _makeWaitWrapper(self, method, methodName, kind):
+        """Return a function that records (kind, description) and then calls a wait method
+        """
+        def waitWrapper(*args, **kargs):
+            self._waitDesc = (kind, _describeWait(methodName, args, kargs))
+            return method(*args, **kargs)
+        return waitWrapper
+
+    def __str__(self):
+        return "%s(numSteps=%s)" % (self.__class__.__name__, self.numSteps)
+
+
+def _describeWait(methodName, args, kargs):
+    """Return a short description of what a wait method is waiting for
+    """
+    def getArg(ind, name):
+        if name in kargs:
+            return kargs[name]
+        if len(args) > ind:
+            return args[ind]
+        return None
+
+    try:
+        if methodName == "waitCmd":
+            return "%s %s" % (getArg(0, "actor"), getArg(1, "cmdStr"))
+        elif methodName == "waitCmdVars":
+            cmdVars = getArg(0, "cmdVars")
+            if not hasattr(cmdVars, "__iter__"):
+                cmdVars = [cmdVars]
+            return ", ".join("%s %s" % (getattr(cmdVar, "actor", "?"), getattr(cmdVar, "cmdStr", "?")) \
+                for cmdVar in cmdVars)
+        elif methodName == "waitKeyVar":
+            keyVar = getArg(0, "keyVar")
+            return "%s.%s" % (getattr(keyVar, "actor", "?"), getattr(keyVar, "name", "?"))
+        elif methodName == "waitMS":
+            return "%s ms" % (getArg(0, "msec"),)
+        elif methodName == "waitSec":
+            return "%s sec" % (getArg(0, "sec"),)
+        elif methodName == "waitThread":
+            func = getArg(0, "func")
+            return getattr(func, "__name__", repr(func))
+    except Exception:
+        pass
+    return ""
@@ -6,35 +6,555 @@ History:
             - Modified for backward-incompatible RO.Wdg.StripChartWdg
             - plotKeyVar no longer takes a "name" argument; use label if you want a name that shows up in legends.
 2012-05-31  Return line from plotKeyVar.
+2026-10-19  JParejko Lines store data in TUI.Base.TimeSeries.LineStore ring buffers and only plot
+            min/max decimated data (at most two points per pixel column).
+2026-10-19  JParejko All drawing is done by a RenderScheduler shared by all strip charts,
+            which redraws dirty charts at most MaxRenderRate times per second,
+            blitting only the changed lines unless an axis range changed.
+2026-10-19  JParejko plotKeyVar backfills lines from data recorded by TUI.Base.KeyVarRecorder
+            (if running). Added setTimeRange; widening the time range backfills again.
+2026-10-19  JParejko plotKeyVar lines share data through TUI.Base.KeyVarSeries, so each keyword value
+            (and transform) is stored and handled once regardless of how many charts show it.
+2026-10-19  JParejko Nothing is drawn while the chart's window is withdrawn or iconified;
+            data is still collected and the chart is redrawn once when the window is shown.
+2026-10-19  JParejko Added zoom and pan controls (buttons and mouse wheel); lines are decimated
+            by a TUI.Base.TimeSeries.DecimatedSeries, so any time range can be shown quickly.
+2026-10-19  JParejko Bug fix: a render pending when the chart was destroyed raised an exception.
+2026-10-19  JParejko Bug fix: destroying a chart left its <Map> and <Unmap> bindings on the toplevel.
 """
+import sys
+import time
+import traceback
+import Tkinter
+
+import numpy
+import matplotlib.dates
+from RO.TkUtil import Timer
+import RO.Wdg
 import RO.Wdg.StripChartWdg
+import KeyVarSeries
+import TimeSeries
 
 TimeConverter = RO.Wdg.StripChartWdg.TimeConverter
 
+MaxRenderRate = 5.0 # maximum number of render passes per second, for all strip charts together
+MinTimeRange = 10.0 # minimum time range for zooming in (sec)
+MaxTimeRange = 36 * 3600.0 # maximum time range for zooming out (sec)
+ZoomFactor = 2.0 # factor by which each zoom step changes the time range
+
+class RenderScheduler(object):
+    """Redraw strip charts whose data has changed, at a limited rate
+
+    Charts are marked dirty when data arrives (or an axis changes) and are all
+    redrawn in the next render pass. Render passes occur at most maxRate times per second,
+    so the cost of drawing does not grow with the rate at which data arrives.
+
+    Inputs:
+    - maxRate: maximum number of render passes per second
+    """
+    def __init__(self, maxRate=MaxRenderRate):
+        self.minInterval = 1.0 / float(maxRate)
+        self._dirtyDict = {} # dict of StripChartWdg: set of subplots whose lines changed,
+            # or None if the chart needs a full redraw
+        self._lastRenderTime = 0
+        self._timer = Timer()
+
+    def setDirty(self, chart, subplot=None):
+        """Mark a chart as needing to be redrawn
+
+        Inputs:
+        - chart: the StripChartWdg
+        - subplot: the subplot whose lines have changed; None if the whole chart
+            must be redrawn (e.g. because an axis range changed)
+        """
+        if subplot is None:
+            self._dirtyDict[chart] = None
+        else:
+            subplotSet = self._dirtyDict.setdefault(chart, set())
+            if subplotSet is not None:
+                subplotSet.add(subplot)
+        if not self._timer.isActive:
+            delay = max(0.001, self._lastRenderTime + self.minInterval - time.time())
+            self._timer.start(delay, self._render)
+
+    def removeChart(self, chart):
+        """Forget a chart (e.g. because it was destroyed), so it is not redrawn
+
+        Inputs:
+        - chart: the StripChartWdg
+        """
+        self._dirtyDict.pop(chart, None)
+
+    def _render(self):
+        """Redraw all dirty charts"""
+        self._lastRenderTime = time.time()
+        dirtyDict, self._dirtyDict = self._dirtyDict, {}
+        for chart, subplotSet in dirtyDict.iteritems():
+            try:
+                chart._render(subplotSet)
+            except Exception, e:
+                sys.stderr.write("Could not redraw strip chart %s: %s\n" % (chart, e))
+                traceback.print_exc(file=sys.stderr)
+
+def _unbindFunc(wdg, eventName, funcId):
+    """Remove one binding added with bind(eventName, func, add="+"), leaving the others
+
+    Tkinter's unbind(eventName, funcId) removes all bindings for eventName.
+    Does nothing if the widget has been destroyed.
+    """
+    try:
+        bindScript = wdg.bind(eventName)
+        newBindScript = "\n".join(line for line in bindScript.split("\n") if funcId not in line)
+        # call Tcl directly because bind treats an empty script as a query
+        wdg.tk.call("bind", wdg._w, eventName, newBindScript)
+        wdg.deletecommand(funcId)
+    except Tkinter.TclError:
+        pass
+
+_RenderScheduler = None
+
+def getRenderScheduler():
+    """Return the render scheduler shared by all strip charts, creating it if necessary
+    """
+    global _RenderScheduler
+    if _RenderScheduler is None:
+        _RenderScheduler = RenderScheduler()
+    return _RenderScheduler
+
+
 class StripChartWdg(RO.Wdg.StripChartWdg.StripChartWdg):
-    def plotKeyVar(self, subplotInd, keyVar, keyInd=0, func=None, **kargs):
+    """A strip chart whose lines decimate their data to the plot width
+
+    Inputs: the same as RO.Wdg.StripChartWdg.StripChartWdg, plus:
+    - maxLineLen: maximum number of data points kept for each line
+    - renderScheduler: RenderScheduler that draws this chart; if None, the shared scheduler
+    - showZoomControls: if True, show buttons to zoom and pan the time axis;
+        the mouse wheel zooms the time axis regardless
+
+    Zooming and panning changes the displayed time range. Once panned into the past
+    the chart stops scrolling; press "Now" to return to the initial time range and resume scrolling.
+    """
+    def __init__(self, master, timeRange=3600, maxLineLen=100000, renderScheduler=None,
+        showZoomControls=True, **kargs):
+        self._maxLineLen = int(maxLineLen)
+        if renderScheduler is None:
+            renderScheduler = getRenderScheduler()
+        self._renderScheduler = renderScheduler
+        self._isDestroyed = False
+        self._defTimeRange = float(timeRange)
+        self._viewTMax = None # maximum time displayed, or None to scroll with the current time
+        self._defLocator = None # major time axis locator to restore when zoomed back to the initial range
+        RO.Wdg.StripChartWdg.StripChartWdg.__init__(self, master, timeRange=timeRange, **kargs)
+        self.bind("<Destroy>", self._handleDestroy)
+        cnvWdg = self.canvas.get_tk_widget()
+        cnvWdg.bind("<MouseWheel>", self._handleMouseWheel)
+        cnvWdg.bind("<Button-4>", self._handleMouseWheel)
+        cnvWdg.bind("<Button-5>", self._handleMouseWheel)
+        if showZoomControls:
+            self._makeZoomControls().grid(row=1, column=0, sticky="e")
+        # iconifying or withdrawing a window does not unmap its children, so watch the toplevel as well;
+        # save (event, funcid) so _handleDestroy can remove these bindings
+        self._toplevelBindList = [
+            (eventName, self.winfo_toplevel().bind(eventName, func, add="+"))
+            for eventName, func in (("<Map>", self._handleMap), ("<Unmap>", self._handleUnmap))
+        ]
+
+    def addLine(self, subplotInd=0, keyVarSeries=None, **kargs):
+        """Add a new quantity to plot
+
+        Inputs: the same as RO.Wdg.StripChartWdg.StripChartWdg.addLine, plus:
+        - keyVarSeries: a TUI.Base.KeyVarSeries.KeyVarSeries to display;
+            if None then add data to the line using line.addPoint
+        """
+        subplot = self.subplotArr[subplotInd]
+        return _Line(
+            subplot = subplot,
+            cnvTimeFunc = self._cnvTimeFunc,
+            wdg = self,
+            maxLen = self._maxLineLen,
+            keyVarSeries = keyVarSeries,
+        **kargs)
+
+    def plotKeyVar(self, subplotInd, keyVar, keyInd=0, func=None, historyName=None, **kargs):
         """Plot one value of one keyVar
-        
+
+        The data is kept in a TUI.Base.KeyVarSeries.KeyVarSeries that is shared by all lines
+        that plot the same keyVar, keyInd, func and historyName; to share transformed data
+        between charts, pass the same func object (e.g. a module-level function).
+        If TUI.Base.KeyVarRecorder is running and has recorded the data,
+        the line is backfilled with recorded data.
+
         Inputs:
         - subplotInd: index of line on Subplot
         - keyVar: keyword variable to plot
         - keyInd: index of keyword variable to plot
         - func: function to transform the value; note that func will never receive None;
-            if func is None then the data is not transformed
+            if func is None then the data is not transformed.
+            Recorded values of keyVar[keyInd] are also transformed by func,
+            so func should only depend on its argument (else specify historyName).
+        - historyName: name of a series recorded by the KeyVarRecorder from which to backfill;
+            the recorded values are plotted as is (func is not applied).
+            If None then recorded values of keyVar[keyInd] are used.
         **kargs: keyword arguments for StripChartWdg.addLine
         """
-        line = self.addLine(subplotInd=subplotInd, **kargs)
-        
-        if func == None:
-            func = lambda x: x
-        
-        def callFunc(keyVar, line=line, keyInd=keyInd, func=func):
-            if not keyVar.isCurrent or not keyVar.isGenuine:
-                return
-            val = keyVar[keyInd]
-            if val == None:
-                return
-            line.addPoint(func(val))
-        
-        keyVar.addCallback(callFunc, callNow=False)
+        keyVarSeries = KeyVarSeries.getKeyVarSeries(
+            keyVar = keyVar,
+            keyInd = keyInd,
+            func = func,
+            historyName = historyName,
+            maxLen = self._maxLineLen,
+        )
+        line = self.addLine(subplotInd=subplotInd, keyVarSeries=keyVarSeries, **kargs)
+        line.backfill()
         return line
+
+    def removeLine(self, line):
+        """Remove an existing line added by addLine, plotKeyVar or addConstantLine
+
+        Raise an exception if the line is not found
+        """
+        RO.Wdg.StripChartWdg.StripChartWdg.removeLine(self, line)
+        if isinstance(line, _Line):
+            line.detach()
+
+    def pan(self, fraction):
+        """Pan the time axis by the specified fraction of the time range (negative for earlier)
+
+        If the result would show the current time, scroll with the current time.
+        """
+        tMin, tMax = self._getTimeLimits()
+        newTMax = tMax + (fraction * self._timeRange)
+        if newTMax >= time.time():
+            self._viewTMax = None
+        else:
+            self._viewTMax = newTMax
+        self.setTimeRange(self._timeRange)
+
+    def setTimeRange(self, timeRange):
+        """Set the range of time displayed (sec)
+
+        If the range is widened, lines with recorded data are backfilled.
+        """
+        self._timeRange = float(timeRange)
+        if self._timeRange == self._defTimeRange:
+            if self._defLocator is not None:
+                self.xaxis.set_major_locator(self._defLocator)
+                self._defLocator = None
+        elif self._defLocator is None:
+            # the locator chosen for the initial range may give far too many or too few ticks
+            self._defLocator = self.xaxis.get_major_locator()
+            self.xaxis.set_major_locator(matplotlib.dates.AutoDateLocator())
+        for subplot in self.subplotArr:
+            for line in subplot._scwLines:
+                line.backfill()
+        self._updateTimeAxis()
+
+    def showNow(self, wdg=None):
+        """Show the initial time range and scroll with the current time
+        """
+        self._viewTMax = None
+        self.setTimeRange(self._defTimeRange)
+
+    def zoom(self, factor):
+        """Multiply the time range by factor (> 1 to zoom out)
+
+        The range is limited to [MinTimeRange, MaxTimeRange].
+        If scrolling with the current time, the current time stays at the right edge,
+        else the center time stays fixed.
+        """
+        newTimeRange = min(max(self._timeRange * factor, MinTimeRange), MaxTimeRange)
+        if self._viewTMax is not None:
+            tCenter = self._viewTMax - (self._timeRange / 2.0)
+            self._viewTMax = tCenter + (newTimeRange / 2.0)
+            if self._viewTMax >= time.time():
+                self._viewTMax = None
+        self.setTimeRange(newTimeRange)
+
+    def setDirty(self, subplot=None):
+        """Request a redraw
+
+        Inputs:
+        - subplot: subplot whose lines have changed; None to redraw everything
+        """
+        self._renderScheduler.setDirty(self, subplot)
+
+    def _render(self, subplotSet):
+        """Redraw the chart; called by the render scheduler
+
+        Inputs:
+        - subplotSet: set of subplots whose lines have changed, or None for a full redraw.
+            Lines are blitted over the cached background of their subplot;
+            if a background is not available a full redraw is done.
+        """
+        if self._isDestroyed or not self._isVisible:
+            # _handleMap does a full redraw
+            return
+        if subplotSet is None or None in [subplot._scwBackground for subplot in subplotSet]:
+            self.canvas.draw() # triggers _handleDrawEvent, which draws the lines
+            return
+        for subplot in subplotSet:
+            self.canvas.restore_region(subplot._scwBackground)
+            for line in subplot._scwLines:
+                subplot.draw_artist(line.line2d)
+            self.canvas.blit(subplot.bbox)
+
+    def _handleDestroy(self, evt):
+        """Stop shared series from updating this chart's lines
+        """
+        if evt.widget != self:
+            return
+        self._isDestroyed = True
+        self._timeAxisTimer.cancel()
+        self._renderScheduler.removeChart(self)
+        toplevel = self.winfo_toplevel()
+        for eventName, funcId in self._toplevelBindList:
+            _unbindFunc(toplevel, eventName, funcId)
+        self._toplevelBindList = []
+        for subplot in self.subplotArr:
+            for line in subplot._scwLines:
+                line.detach()
+
+    def _getIsVisible(self):
+        """Return True if the chart can be seen: it is viewable and its window is not withdrawn or iconified
+        """
+        return bool(self.winfo_viewable()) \
+            and self.winfo_toplevel().wm_state() not in ("withdrawn", "iconic")
+
+    def _handleMap(self, evt=None):
+        """Handle map event for this widget or its toplevel
+
+        If the chart just became visible, catch up: update the lines and time axis and redraw once.
+        """
+        if self._isDestroyed:
+            return
+        isVisible = self._getIsVisible()
+        if isVisible == self._isVisible:
+            return
+        self._isVisible = isVisible
+        if isVisible:
+            self._updateTimeAxis()
+
+    def _handleUnmap(self, evt=None):
+        """Handle unmap event for this widget or its toplevel
+
+        Stop drawing (and stop updating the time axis) until the chart is visible again.
+        """
+        if self._isDestroyed:
+            return
+        self._isVisible = self._getIsVisible()
+        if not self._isVisible:
+            self._timeAxisTimer.cancel()
+
+    def _getTimeLimits(self):
+        """Return the time range to plot (tMin, tMax) as POSIX timestamps"""
+        if self._viewTMax is None:
+            tMax = time.time() + self._getUpdateInterval()
+        else:
+            tMax = self._viewTMax
+        return tMax - self._timeRange, tMax
+
+    def _getUpdateInterval(self):
+        """Return the interval at which to update the time axis (sec)
+
+        This is updateInterval unless zoomed in so far that the interval would be a large part of the plot.
+        """
+        return min(self.updateInterval, max(0.1, self._timeRange / 200.0))
+
+    def _handleMouseWheel(self, evt):
+        """Zoom the time axis in (wheel up) or out (wheel down)
+        """
+        if evt.num == 4 or getattr(evt, "delta", 0) > 0:
+            self.zoom(1.0 / ZoomFactor)
+        else:
+            self.zoom(ZoomFactor)
+        return "break"
+
+    def _makeZoomControls(self):
+        """Return a frame containing zoom and pan buttons
+        """
+        ctrlFrame = Tkinter.Frame(self)
+        for text, callFunc, helpText in (
+            ("<", lambda wdg: self.pan(-0.5), "Pan to earlier times"),
+            (">", lambda wdg: self.pan(0.5), "Pan to later times"),
+            ("-", lambda wdg: self.zoom(ZoomFactor), "Zoom out (show a longer time range)"),
+            ("+", lambda wdg: self.zoom(1.0 / ZoomFactor), "Zoom in (show a shorter time range)"),
+            ("Now", self.showNow, "Show the initial time range and scroll with the current time"),
+        ):
+            RO.Wdg.Button(
+                master = ctrlFrame,
+                text = text,
+                callFunc = callFunc,
+                helpText = helpText,
+            ).pack(side="left")
+        return ctrlFrame
+
+    def _handleDrawEvent(self, event=None):
+        """Handle draw event
+
+        Set the decimation of each line to match the width of its subplot
+        """
+        for subplot in self.subplotArr:
+            numPixels = int(subplot.bbox.width)
+            for line in subplot._scwLines:
+                if line.setNumPixels(numPixels):
+                    line._setLineData()
+        RO.Wdg.StripChartWdg.StripChartWdg._handleDrawEvent(self, event)
+
+    def _updateTimeAxis(self):
+        """Update the time axis and request a full redraw
+
+        Calls itself while the chart is visible; _handleMap restarts it.
+        """
+        if self._isVisible or self._isFirst:
+            tMin, tMax = self._getTimeLimits()
+            minMplDays = self._cnvTimeFunc(tMin)
+            maxMplDays = self._cnvTimeFunc(tMax)
+            for subplot in self.subplotArr:
+                for line in subplot._scwLines:
+                    line._setLineData()
+                subplot.set_xlim(minMplDays, maxMplDays)
+                if subplot.get_autoscaley_on():
+                    # old data has scrolled off, so the y limits may have changed
+                    subplot.relim()
+                    subplot.autoscale_view(scalex=False, scaley=True)
+            self._isFirst = False
+            self.setDirty()
+        if self._isVisible:
+            self._timeAxisTimer.start(self._getUpdateInterval(), self._updateTimeAxis)
+
+
+class _Line(RO.Wdg.StripChartWdg._Line):
+    """A line (trace) on a strip chart representing some varying quantity
+
+    Data is stored in a TUI.Base.TimeSeries.LineStore; only decimated data
+    is given to matplotlib.
+
+    Attributes that might be useful:
+    - line2d: the matplotlib.lines.Line2D associated with this line
+    - subplot: the matplotlib Subplot instance displaying this line
+    - store: the TUI.Base.TimeSeries.LineStore containing the data
+    - keyVarSeries: the TUI.Base.KeyVarSeries.KeyVarSeries whose data is displayed, or None
+    """
+    def __init__(self, subplot, cnvTimeFunc, wdg, maxLen, keyVarSeries=None, **kargs):
+        """Create a line
+
+        Inputs:
+        - subplot: the matplotlib Subplot instance displaying this line
+        - cnvTimeFunc: a function that takes a POSIX timestamp (e.g. time.time()) and returns matplotlib days
+        - wdg: parent strip chart widget
+        - maxLen: maximum number of data points to keep; ignored if keyVarSeries specified
+        - keyVarSeries: a TUI.Base.KeyVarSeries.KeyVarSeries whose data is displayed (shared with other lines);
+            if None then data is added with addPoint
+        - **kargs: keyword arguments for matplotlib Line2D, such as color
+        """
+        RO.Wdg.StripChartWdg._Line.__init__(self, subplot=subplot, cnvTimeFunc=cnvTimeFunc, wdg=wdg, **kargs)
+        self.keyVarSeries = keyVarSeries
+        self.store = TimeSeries.LineStore(
+            numPixels = max(1, int(subplot.bbox.width)),
+            maxLen = maxLen,
+            series = keyVarSeries.series if keyVarSeries else None,
+        )
+        if keyVarSeries:
+            keyVarSeries.addLine(self)
+            if len(self.store.series) > 0:
+                self._redraw()
+
+    def backfill(self):
+        """Add recorded data for the displayed time range (if available) that has not already been added
+        """
+        if self.keyVarSeries:
+            self.keyVarSeries.backfill(self._wdg._getTimeLimits()[0])
+
+    def dataChanged(self):
+        """Older data was added to the shared series; called by the KeyVarSeries
+        """
+        if not self._wdg._isVisible:
+            # the chart is updated when it is shown
+            return
+        self._setLineData()
+        if self.subplot.get_autoscaley_on():
+            self.subplot.relim()
+            self.subplot.autoscale_view(scalex=False, scaley=True)
+        self._wdg.setDirty()
+
+    def detach(self):
+        """Stop displaying new data from the shared series (if any)
+        """
+        if self.keyVarSeries:
+            self.keyVarSeries.removeLine(self)
+
+    def pointAdded(self, t, y):
+        """A data point was added to the shared series; called by the KeyVarSeries
+        """
+        self._redraw()
+
+    def addPoint(self, y, t=None):
+        """Append a new data point
+
+        Inputs:
+        - y: y value; if None the point is silently ignored
+        - t: time as a POSIX timestamp (e.g. time.time()); if None then "now"
+
+        Raise RuntimeError if the line displays a shared KeyVarSeries
+        """
+        if self.keyVarSeries:
+            raise RuntimeError("Cannot add points to a line that displays a shared series")
+        if y is None:
+            return
+        if t is None:
+            t = time.time()
+        self.store.addPoint(t, y)
+        self._redraw()
+
+    def clear(self):
+        """Clear all data
+
+        If the data is shared with other lines, only this line is cleared;
+        it then shows only data added after it was cleared.
+        """
+        self.store.clear()
+        self._redraw()
+
+    def setNumPixels(self, numPixels):
+        """Set the width of the plot (pixels); return True if it changed"""
+        return self.store.setNumPixels(numPixels)
+
+    def _setLineData(self):
+        """Set the line's data to the decimated data for the displayed time range"""
+        tMin, tMax = self._wdg._getTimeLimits()
+        # include an extra pixel at each end to avoid gaps at the edges
+        pixelWidth = (tMax - tMin) / float(self.store.numPixels)
+        tArr, yArr = self.store.getPlotData(tMin - pixelWidth, tMax + pixelWidth)
+        self.line2d.set_data(self._cnvTimeFunc(tArr), yArr)
+
+    def _redraw(self):
+        """Update the line's data and request a redraw
+
+        Does nothing if the chart is not visible (the chart is updated when it is shown).
+        """
+        if not self._wdg._isVisible:
+            return
+        self._setLineData()
+        lastPoint = self.store.lastPoint
+        if lastPoint is not None:
+            # see if limits need updating to include last point
+            lastY = lastPoint[1]
+            if self.subplot.get_autoscaley_on() and numpy.isfinite(lastY):
+                yMin, yMax = self.subplot.get_ylim()
+                if not (yMin <= lastY <= yMax):
+                    self.subplot.relim()
+                    self.subplot.autoscale_view(scalex=False, scaley=True)
+                    self._wdg.setDirty()
+                    return
+
+        self._wdg.setDirty(self.subplot)
+
+    def _purgeOldData(self, minMplDays):
+        """Update the line's data to omit data older than the displayed time range
+
+        Old data is not deleted from the store (it is discarded as the ring buffers fill),
+        but it is no longer given to matplotlib.
+
+        Warning: does not update the display (the caller must do that)
+        """
+        self._setLineData()
@@ -0,0 +1,474 @@
+"""Time series storage and decimation for strip charts
+
+A strip chart only has a few hundred pixels across, but a keyword that updates
+every second produces thousands of points per hour. This module stores the data
+in preallocated numpy ring buffers and reduces it to at most two points
+(the minimum and the maximum) per pixel column, so that matplotlib only ever
+sees about twice as many points as there are pixels.
+
+Classes:
+- TimeSeries: a ring buffer of (time, value) data points
+- MinMaxBins: a ring of time bins, each holding the min and max value that fell in it;
+    adding a point costs the same regardless of how many points are in a bin
+- MinMaxPyramid: MinMaxBins at several resolutions (a level-of-detail pyramid),
+    so decimated data for any time range can be found in time proportional to the number of pixels
+- DecimatedSeries: a TimeSeries that maintains a MinMaxPyramid
+- LineStore: the data for one strip chart line: a (possibly shared) DecimatedSeries
+
+All times are POSIX timestamps (e.g. from time.time()).
+This module does not use Tkinter or matplotlib.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Added TimeSeries.setData, LineStore.addOlderData and LineStore.setTimeRange
+                    (for backfilling lines from recorded data).
+2026-10-19 JParejko LineStore can use a TimeSeries shared with other LineStores.
+                    Added TimeSeries.insertOlder, LineStore.binPoint; made LineStore.rebin public.
+2026-10-19 JParejko Added MinMaxPyramid and DecimatedSeries, so data can be decimated for any time range.
+                    LineStore now uses a DecimatedSeries instead of its own MinMaxBins;
+                    getPlotData takes the plot width from the LineStore and works for any time range.
+"""
+import numpy
+
+__all__ = ["TimeSeries", "MinMaxBins", "MinMaxPyramid", "DecimatedSeries", "LineStore"]
+
+_InitialCapacity = 1024
+
+class TimeSeries(object):
+    """A ring buffer of (time, value) data points
+
+    Inputs:
+    - maxLen: maximum number of points; once full, the oldest points are discarded
+
+    Storage starts small and doubles as needed, up to maxLen.
+    Points are expected in time order; getData assumes the times are sorted.
+    """
+    def __init__(self, maxLen=100000):
+        self.maxLen = int(maxLen)
+        self.clear()
+
+    def clear(self):
+        """Remove all data"""
+        capacity = min(_InitialCapacity, self.maxLen)
+        self._tArr = numpy.zeros(capacity, dtype=float)
+        self._yArr = numpy.zeros(capacity, dtype=float)
+        self._begInd = 0 # index of oldest point
+        self._numPts = 0
+
+    def __len__(self):
+        return self._numPts
+
+    @property
+    def lastPoint(self):
+        """Return the newest point as (t, y), or None if no data"""
+        if self._numPts == 0:
+            return None
+        ind = (self._begInd + self._numPts - 1) % len(self._tArr)
+        return (self._tArr[ind], self._yArr[ind])
+
+    def append(self, t, y):
+        """Add one data point
+        """
+        capacity = len(self._tArr)
+        if self._numPts == capacity:
+            if capacity < self.maxLen:
+                self._grow(min(capacity * 2, self.maxLen))
+                capacity = len(self._tArr)
+            else:
+                # full: discard the oldest point
+                self._begInd = (self._begInd + 1) % capacity
+                self._numPts -= 1
+        ind = (self._begInd + self._numPts) % capacity
+        self._tArr[ind] = t
+        self._yArr[ind] = y
+        self._numPts += 1
+
+    def setData(self, tArr, yArr):
+        """Replace all data; tArr must be sorted
+
+        If there are more than maxLen points, only the newest maxLen are kept.
+        """
+        tArr = numpy.asarray(tArr, dtype=float)[-self.maxLen:]
+        yArr = numpy.asarray(yArr, dtype=float)[-self.maxLen:]
+        numPts = len(tArr)
+        capacity = min(self.maxLen, max(_InitialCapacity, numPts))
+        self._tArr = numpy.zeros(capacity, dtype=float)
+        self._yArr = numpy.zeros(capacity, dtype=float)
+        self._tArr[0:numPts] = tArr
+        self._yArr[0:numPts] = yArr
+        self._begInd = 0
+        self._numPts = numPts
+
+    def insertOlder(self, tArr, yArr):
+        """Add data that is older than the existing data; tArr must be sorted
+
+        Points that are not older than the oldest existing point are ignored.
+        If the result has more than maxLen points, the newest maxLen are kept.
+        Return the number of points inserted.
+        """
+        firstTime = self.firstTime
+        if firstTime is not None:
+            numOlder = numpy.searchsorted(tArr, firstTime, side="left")
+            tArr, yArr = tArr[0:numOlder], yArr[0:numOlder]
+        if len(tArr) == 0:
+            return 0
+        oldTArr, oldYArr = self.getData()
+        self.setData(numpy.concatenate((tArr, oldTArr)), numpy.concatenate((yArr, oldYArr)))
+        return len(tArr)
+
+    @property
+    def firstTime(self):
+        """Return the time of the oldest point, or None if no data"""
+        if self._numPts == 0:
+            return None
+        return self._tArr[self._begInd]
+
+    def getData(self, tMin=None, tMax=None):
+        """Return (tArr, yArr) for points with tMin <= t <= tMax (None for no limit), in time order
+
+        The returned arrays are copies.
+        """
+        tArr, yArr = self._getOrdered()
+        begInd = 0 if tMin is None else numpy.searchsorted(tArr, tMin, side="left")
+        endInd = len(tArr) if tMax is None else numpy.searchsorted(tArr, tMax, side="right")
+        return tArr[begInd:endInd].copy(), yArr[begInd:endInd].copy()
+
+    def _getOrdered(self):
+        """Return (tArr, yArr) in time order; these may be views of internal storage"""
+        capacity = len(self._tArr)
+        endInd = self._begInd + self._numPts
+        if endInd <= capacity:
+            return self._tArr[self._begInd:endInd], self._yArr[self._begInd:endInd]
+        numWrap = endInd - capacity
+        return numpy.concatenate((self._tArr[self._begInd:], self._tArr[0:numWrap])), \
+            numpy.concatenate((self._yArr[self._begInd:], self._yArr[0:numWrap]))
+
+    def _grow(self, newCapacity):
+        tArr, yArr = self._getOrdered()
+        self._tArr = numpy.zeros(newCapacity, dtype=float)
+        self._yArr = numpy.zeros(newCapacity, dtype=float)
+        self._tArr[0:self._numPts] = tArr
+        self._yArr[0:self._numPts] = yArr
+        self._begInd = 0
+
+
+class MinMaxBins(object):
+    """A ring of equal-width time bins, each holding the minimum and maximum value in that bin
+
+    Inputs:
+    - binWidth: width of each bin (sec)
+    - numBins: number of bins; bins older than numBins * binWidth are overwritten
+
+    Non-finite values are ignored.
+    """
+    def __init__(self, binWidth, numBins):
+        if binWidth <= 0:
+            raise RuntimeError("binWidth=%s must be positive" % (binWidth,))
+        self.binWidth = float(binWidth)
+        self.numBins = int(numBins)
+        self.clear()
+
+    def clear(self):
+        """Remove all data"""
+        numBins = self.numBins
+        self._binNumArr = numpy.zeros(numBins, dtype=numpy.int64) - 1 # -1 means empty
+        self._minArr = numpy.zeros(numBins, dtype=float)
+        self._maxArr = numpy.zeros(numBins, dtype=float)
+        self._tMinArr = numpy.zeros(numBins, dtype=float) # time of minimum value
+        self._tMaxArr = numpy.zeros(numBins, dtype=float) # time of maximum value
+
+    def add(self, t, y):
+        """Add one data point
+        """
+        if not numpy.isfinite(y):
+            return
+        binNum = int(t // self.binWidth)
+        ind = binNum % self.numBins
+        if self._binNumArr[ind] != binNum:
+            self._binNumArr[ind] = binNum
+            self._minArr[ind] = self._maxArr[ind] = y
+            self._tMinArr[ind] = self._tMaxArr[ind] = t
+        elif y < self._minArr[ind]:
+            self._minArr[ind] = y
+            self._tMinArr[ind] = t
+        elif y > self._maxArr[ind]:
+            self._maxArr[ind] = y
+            self._tMaxArr[ind] = t
+
+    def addArrays(self, tArr, yArr):
+        """Add many data points; tArr must be sorted and newer than any data already added
+        """
+        isOK = numpy.isfinite(yArr)
+        tArr = tArr[isOK]
+        yArr = yArr[isOK]
+        if len(tArr) == 0:
+            return
+        binNumArr = (tArr // self.binWidth).astype(numpy.int64)
+        # only the last numBins bins can be stored
+        isKept = binNumArr > binNumArr[-1] - self.numBins
+        tArr, yArr, binNumArr = tArr[isKept], yArr[isKept], binNumArr[isKept]
+
+        # sort by bin, then value; the first and last entry of each bin are its min and max
+        sortInd = numpy.lexsort((yArr, binNumArr))
+        sortedBinNumArr = binNumArr[sortInd]
+        isFirst = numpy.ones(len(sortInd), dtype=bool)
+        isFirst[1:] = sortedBinNumArr[1:] != sortedBinNumArr[:-1]
+        isLast = numpy.ones(len(sortInd), dtype=bool)
+        isLast[:-1] = isFirst[1:]
+        minInd = sortInd[isFirst]
+        maxInd = sortInd[isLast]
+
+        binNums = binNumArr[minInd]
+        indArr = binNums % self.numBins
+        self._binNumArr[indArr] = binNums
+        self._minArr[indArr] = yArr[minInd]
+        self._tMinArr[indArr] = tArr[minInd]
+        self._maxArr[indArr] = yArr[maxInd]
+        self._tMaxArr[indArr] = tArr[maxInd]
+
+    def getData(self, tMin=None, tMax=None):
+        """Return decimated (tArr, yArr) for bins that overlap [tMin, tMax] (None for no limit)
+
+        Each bin contributes its minimum and maximum points, in time order
+        (a single point if they are the same point).
+        """
+        isUsed = self._binNumArr >= 0
+        if tMin is not None:
+            isUsed &= self._binNumArr >= int(tMin // self.binWidth)
+        if tMax is not None:
+            isUsed &= self._binNumArr <= int(tMax // self.binWidth)
+        indArr = numpy.nonzero(isUsed)[0]
+        indArr = indArr[numpy.argsort(self._binNumArr[indArr])]
+
+        tMinArr = self._tMinArr[indArr]
+        tMaxArr = self._tMaxArr[indArr]
+        minFirst = tMinArr <= tMaxArr
+        tArr = numpy.column_stack((
+            numpy.where(minFirst, tMinArr, tMaxArr),
+            numpy.where(minFirst, tMaxArr, tMinArr),
+        )).ravel()
+        yArr = numpy.column_stack((
+            numpy.where(minFirst, self._minArr[indArr], self._maxArr[indArr]),
+            numpy.where(minFirst, self._maxArr[indArr], self._minArr[indArr]),
+        )).ravel()
+        # omit the second point of bins that only have one distinct point
+        isKept = numpy.ones(len(tArr), dtype=bool)
+        isKept[1::2] = tMinArr != tMaxArr
+        return tArr[isKept], yArr[isKept]
+
+
+class MinMaxPyramid(object):
+    """Min/max bins at several resolutions
+
+    Inputs:
+    - baseWidth: bin width of the finest level (sec)
+    - numLevels: number of levels; each level's bins are twice as wide as the previous level's
+    - numBins: number of bins in each level
+
+    Each level holds the newest numBins * binWidth seconds of data, so coarse levels
+    reach further back in time than fine levels. The defaults give bins of 1 to 128 seconds;
+    the finest level covers about 17 minutes and the coarsest about 36 hours.
+    """
+    def __init__(self, baseWidth=1.0, numLevels=8, numBins=1024):
+        self.levelList = [MinMaxBins(binWidth = baseWidth * 2**ind, numBins = numBins)
+            for ind in range(numLevels)]
+        self.clear()
+
+    def clear(self):
+        """Remove all data"""
+        for bins in self.levelList:
+            bins.clear()
+        self._newestTime = None
+
+    def add(self, t, y):
+        """Add one data point
+        """
+        for bins in self.levelList:
+            bins.add(t, y)
+        if self._newestTime is None or t > self._newestTime:
+            self._newestTime = t
+
+    def addArrays(self, tArr, yArr):
+        """Add many data points; tArr must be sorted and newer than any data already added
+        """
+        if len(tArr) == 0:
+            return
+        for bins in self.levelList:
+            bins.addArrays(tArr, yArr)
+        self._newestTime = tArr[-1]
+
+    def getData(self, tMin, tMax, numPixels):
+        """Return decimated (tArr, yArr) for tMin <= t <= tMax, with at most two points per pixel
+
+        Uses the finest level whose bins are at least half a pixel wide and that still holds data at tMin
+        (else the coarsest level), so the cost is proportional to numPixels, not to the time range.
+        """
+        numPixels = max(1, int(numPixels))
+        pixelWidth = max(tMax - tMin, 1.0e-6) / float(numPixels)
+        levelBins = self.levelList[-1]
+        for bins in self.levelList:
+            if bins.binWidth * 2 < pixelWidth:
+                continue
+            if self._newestTime is not None and tMin < self._newestTime - ((bins.numBins - 1) * bins.binWidth):
+                # this level no longer holds data at tMin
+                continue
+            levelBins = bins
+            break
+        tArr, yArr = levelBins.getData(tMin, tMax)
+        isUsed = (tArr >= tMin) & (tArr <= tMax)
+        tArr, yArr = tArr[isUsed], yArr[isUsed]
+        pixelArr = ((tArr - tMin) / pixelWidth).astype(numpy.int64)
+        return _minMaxByGroup(pixelArr, tArr, yArr)
+
+
+def _minMaxByGroup(groupArr, tArr, yArr):
+    """Return (tArr, yArr) containing the min and max point of each group, in time order
+
+    Inputs:
+    - groupArr: group number of each point (e.g. pixel index)
+    - tArr, yArr: times and values of the points
+    """
+    if len(tArr) == 0:
+        return tArr, yArr
+    sortInd = numpy.lexsort((yArr, groupArr))
+    sortedGroupArr = groupArr[sortInd]
+    isFirst = numpy.ones(len(sortInd), dtype=bool)
+    isFirst[1:] = sortedGroupArr[1:] != sortedGroupArr[:-1]
+    isLast = numpy.ones(len(sortInd), dtype=bool)
+    isLast[:-1] = isFirst[1:]
+    keepInd = numpy.union1d(sortInd[isFirst], sortInd[isLast])
+    keepInd = keepInd[numpy.argsort(tArr[keepInd], kind="mergesort")]
+    return tArr[keepInd], yArr[keepInd]
+
+
+class DecimatedSeries(TimeSeries):
+    """A TimeSeries that can quickly return decimated data for any time range
+
+    Inputs:
+    - maxLen: maximum number of points
+    - **kargs: keyword arguments for MinMaxPyramid
+
+    Non-finite values are kept in the series (and returned if there are few enough
+    points to return all of them), but are ignored by the decimation.
+    """
+    def __init__(self, maxLen=100000, **kargs):
+        self.pyramid = MinMaxPyramid(**kargs)
+        TimeSeries.__init__(self, maxLen=maxLen)
+
+    def clear(self):
+        """Remove all data"""
+        TimeSeries.clear(self)
+        self.pyramid.clear()
+
+    def append(self, t, y):
+        """Add one data point
+        """
+        TimeSeries.append(self, t, y)
+        self.pyramid.add(t, y)
+
+    def setData(self, tArr, yArr):
+        """Replace all data; tArr must be sorted
+
+        If there are more than maxLen points, only the newest maxLen are kept.
+        """
+        TimeSeries.setData(self, tArr, yArr)
+        self.pyramid.clear()
+        self.pyramid.addArrays(*self._getOrdered())
+
+    def getPlotData(self, tMin, tMax, numPixels):
+        """Return (tArr, yArr) for tMin <= t <= tMax for a plot numPixels wide, in time order
+
+        If there are at most two points per pixel then all data is returned,
+        else the min and max point per pixel (computed from the pyramid).
+        """
+        tArr, yArr = self._getOrdered()
+        begInd = numpy.searchsorted(tArr, tMin, side="left")
+        endInd = numpy.searchsorted(tArr, tMax, side="right")
+        if endInd - begInd <= 2 * numPixels:
+            return tArr[begInd:endInd].copy(), yArr[begInd:endInd].copy()
+        return self.pyramid.getData(tMin, tMax, numPixels)
+
+
+class LineStore(object):
+    """The data for one strip chart line
+
+    Inputs:
+    - numPixels: initial width of the plot (pixels); set the actual width with setNumPixels
+    - maxLen: maximum number of raw data points kept; ignored if series is specified
+    - series: a DecimatedSeries to use for the data; if None a new one is created.
+        A series may be shared by several LineStores (e.g. lines in different windows
+        that plot the same keyword); in that case whoever owns the series adds data to it.
+
+    Data is kept in a DecimatedSeries, so decimated data for any time range
+    can be obtained in time proportional to the plot width: getPlotData
+    returns at most about two points per pixel.
+    """
+    def __init__(self, numPixels=500, maxLen=100000, series=None):
+        if series is None:
+            series = DecimatedSeries(maxLen=maxLen)
+            self.isShared = False
+        else:
+            self.isShared = True
+        self.series = series
+        self.minTime = None # ignore data at or before this time (set by clear for a shared series)
+        self.numPixels = max(1, int(numPixels))
+
+    def addPoint(self, t, y):
+        """Add a data point"""
+        self.series.append(t, y)
+
+    def addOlderData(self, tArr, yArr):
+        """Add data that is older than the existing data (e.g. from a recording); tArr must be sorted
+
+        Points that are not older than the oldest existing point are ignored.
+        """
+        self.series.insertOlder(tArr, yArr)
+
+    def clear(self):
+        """Remove all data
+
+        If the series is shared, it is left alone and only newer data is shown.
+        """
+        if self.isShared:
+            lastPoint = self.series.lastPoint
+            if lastPoint is not None:
+                self.minTime = lastPoint[0]
+        else:
+            self.series.clear()
+
+    @property
+    def lastPoint(self):
+        """Return the newest point as (t, y), or None if no data"""
+        lastPoint = self.series.lastPoint
+        if lastPoint is None or (self.minTime is not None and lastPoint[0] <= self.minTime):
+            return None
+        return lastPoint
+
+    def getPlotData(self, tMin=None, tMax=None):
+        """Return decimated (tArr, yArr) for the specified time range (None for no limit)
+
+        There are at most about two points per pixel.
+        """
+        lastPoint = self.lastPoint
+        if lastPoint is None:
+            return numpy.zeros(0, dtype=float), numpy.zeros(0, dtype=float)
+        if tMin is None:
+            tMin = self.series.firstTime
+        if self.minTime is not None:
+            tMin = max(tMin, self.minTime)
+        if tMax is None:
+            tMax = lastPoint[0]
+        tArr, yArr = self.series.getPlotData(tMin, tMax, self.numPixels)
+        if self.minTime is not None:
+            isNew = tArr > self.minTime
+            tArr, yArr = tArr[isNew], yArr[isNew]
+        return tArr, yArr
+
+    def setNumPixels(self, numPixels):
+        """Set the width of the plot (pixels); return True if it changed
+        """
+        numPixels = max(1, int(numPixels))
+        if numPixels == self.numPixels:
+            return False
+        self.numPixels = numPixels
+        return True
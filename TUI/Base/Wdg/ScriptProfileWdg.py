@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""Display the profile of a script recorded by TUI.Base.ScriptProfiler.
+
+The profile may be shown as:
+- a table with one row per distinct step (where, kind of wait and what was waited for),
+  sortable by total time, wait time, work time or count
+- a flame-style summary: the total time spent in each generator (run and the sub-generators it yields),
+  indented by call depth, with a bar proportional to the time
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+__all__ = ["ScriptProfileWdg", "showProfile"]
+
+import Tkinter
+import tkFileDialog
+import RO.Wdg
+
+_ViewTable = "Table"
+_ViewFlame = "Flame"
+
+# sort name: function that returns a sort key for an item of ScriptProfiler.getSummary
+_SortFuncDict = {
+    "Total": lambda item: -(item[4] + item[5]),
+    "Wait": lambda item: -item[4],
+    "Work": lambda item: -item[5],
+    "Count": lambda item: -item[3],
+    "Where": lambda item: (item[0], item[1], item[2]),
+}
+_SortNames = ("Total", "Wait", "Work", "Count", "Where")
+
+_FlameBarLen = 30 # length of bar, in characters, for the generator with the most time
+
+class ScriptProfileWdg(Tkinter.Frame):
+    """Display a script profile
+
+    Inputs:
+    - master: master widget
+    - profiler: a TUI.Base.ScriptProfiler.ScriptProfiler
+    - helpURL: URL of help
+    """
+    def __init__(self, master, profiler, helpURL=None, **kargs):
+        Tkinter.Frame.__init__(self, master, **kargs)
+        self.profiler = profiler
+
+        ctrlFrame = Tkinter.Frame(self)
+        self.viewWdg = RO.Wdg.OptionMenu(
+            master = ctrlFrame,
+            items = (_ViewTable, _ViewFlame),
+            defValue = _ViewTable,
+            callFunc = self.redraw,
+            helpText = "table of steps or time spent in each generator",
+            helpURL = helpURL,
+        )
+        self.viewWdg.pack(side="left")
+        RO.Wdg.StrLabel(master=ctrlFrame, text="Sort By").pack(side="left")
+        self.sortWdg = RO.Wdg.OptionMenu(
+            master = ctrlFrame,
+            items = _SortNames,
+            defValue = "Total",
+            callFunc = self.redraw,
+            helpText = "how to sort the table",
+            helpURL = helpURL,
+        )
+        self.sortWdg.pack(side="left")
+        RO.Wdg.Button(
+            master = ctrlFrame,
+            text = "Export...",
+            command = self.doExport,
+            helpText = "save every step as tab-separated text",
+            helpURL = helpURL,
+        ).pack(side="left")
+        ctrlFrame.grid(row=0, column=0, columnspan=2, sticky="w")
+
+        yscroll = Tkinter.Scrollbar(
+            master = self,
+            orient = "vertical",
+        )
+        self.textWdg = RO.Wdg.Text(
+            master = self,
+            yscrollcommand = yscroll.set,
+            width = 100,
+            height = 20,
+            wrap = "none",
+            readOnly = True,
+            helpText = "script profile: times are in seconds",
+            helpURL = helpURL,
+        )
+        yscroll.configure(command=self.textWdg.yview)
+        self.textWdg.grid(row=1, column=0, sticky="nsew")
+        yscroll.grid(row=1, column=1, sticky="ns")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.redraw()
+
+    def doExport(self):
+        """Save every recorded step to a file
+        """
+        outFile = tkFileDialog.asksaveasfile(
+            master = self,
+            title = "Save script profile",
+            defaultextension = ".txt",
+        )
+        if not outFile:
+            return
+        try:
+            self.profiler.writeSteps(outFile)
+        finally:
+            outFile.close()
+
+    def redraw(self, wdg=None):
+        """Redisplay the profile
+        """
+        if self.viewWdg.getString() == _ViewFlame:
+            lineList = self._getFlameLines()
+        else:
+            lineList = self._getTableLines()
+
+        self.textWdg.delete("1.0", "end")
+        self.textWdg.insert("end", "\n".join(lineList))
+
+    def _getHeader(self):
+        """Return a summary line"""
+        profiler = self.profiler
+        if profiler.begTime is None:
+            return "No profile recorded"
+        if profiler.endTime is None:
+            durationStr = "(running)"
+        else:
+            durationStr = "in %0.2f sec" % (profiler.endTime - profiler.begTime,)
+        return "%d steps %s" % (profiler.numSteps, durationStr)
+
+    def _getTableLines(self):
+        """Return the table view, as a list of lines"""
+        summaryList = self.profiler.getSummary()
+        summaryList.sort(key=_SortFuncDict[self.sortWdg.getString()])
+        lineList = [
+            self._getHeader(),
+            "",
+            "%9s %9s %9s %6s  %-8s %-30s %s" % ("Total", "Wait", "Work", "Count", "Kind", "Where", "What"),
+        ]
+        for path, kind, desc, count, waitSec, workSec in summaryList:
+            lineList.append("%9.3f %9.3f %9.3f %6d  %-8s %-30s %s" % \
+                (waitSec + workSec, waitSec, workSec, count, kind, "/".join(path), desc))
+        return lineList
+
+    def _getFlameLines(self):
+        """Return the flame-style view, as a list of lines"""
+        pathDict = self.profiler.getPathTotals()
+        lineList = [self._getHeader(), ""]
+        if not pathDict:
+            return lineList
+        maxSec = max(pathDict.itervalues())
+        for path in sorted(pathDict.keys()):
+            totSec = pathDict[path]
+            barLen = int(round(_FlameBarLen * totSec / maxSec)) if maxSec > 0 else 0
+            lineList.append("%9.3f %-*s %s%s" % \
+                (totSec, _FlameBarLen, "#" * barLen, "  " * (len(path) - 1), path[-1]))
+        return lineList
+
+
+def showProfile(master, profiler, title, helpURL=None):
+    """Show a script profile in a new window
+
+    Inputs:
+    - master: master widget
+    - profiler: a TUI.Base.ScriptProfiler.ScriptProfiler
+    - title: window title
+    - helpURL: URL of help
+
+    Returns the new Tkinter.Toplevel.
+    """
+    tl = Tkinter.Toplevel(master)
+    tl.title(title)
+    profileWdg = ScriptProfileWdg(tl, profiler, helpURL=helpURL)
+    profileWdg.pack(expand=True, fill="both")
+    return tl
+
+
+if __name__ == "__main__":
+    import time
+    import TUI.Base.ScriptProfiler
+
+    root = Tkinter.Tk()
+    profiler = TUI.Base.ScriptProfiler.ScriptProfiler(isEnabled=True)
+    profiler.begTime = time.time()
+    for ind in range(5):
+        profiler._addStep(("run",), "cmd", "tcc show time", time.time(), 0.2, 0.01)
+        profiler._addStep(("run", "waitCentroid"), "cmd", "guider centroid", time.time(), 1.5, 0.05)
+        profiler._addStep(("run", "waitCentroid"), "sleep", "100 ms", time.time(), 0.1, 0.0)
+    profiler.endTime = profiler.begTime + 9.3
+    profileWdg = ScriptProfileWdg(root, profiler)
+    profileWdg.pack(expand=True, fill="both")
+    root.mainloop()
@@ -9,6 +9,11 @@ History:
 2010-02-17 ROwen    Adapted from RO.Wdg.ScriptWdg.
 2010-03-10 ROwen    Commented out a debug print statement.
 2010-06-28 ROwen    Removed two duplicate imports (thanks to pychecker).
+2026-10-19 JParejko ScriptFileWdg executes compiled code from TUI.Base.ScriptCache instead of using execfile,
+                    so opening or reloading a script window only compiles the script if it has changed.
+2026-10-19 JParejko Added an optional profiler to BasicScriptWdg (argument profile and the "Profile"
+                    contextual menu item of script widgets) that records the time of each step of the script
+                    and shows the profile when the script ends.
 """
 __all__ = ['BasicScriptWdg', 'ScriptModuleWdg', 'ScriptFileWdg']
 
@@ -18,6 +23,9 @@ import RO.Constants
 import RO.AddCallback
 import RO.Wdg
 import opscore.actor
+import TUI.Base.ScriptCache
+import TUI.Base.ScriptProfiler
+import ScriptProfileWdg
 import StatusBar
 
 # compute _StateSevDict which contains
@@ -59,6 +67,9 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
     - cancelButton  button to cancel the script
     - stateFunc     function to call when the script runner changes state.
                     The function receives one argument: the script runner.
+    - profile       profile the script? If True then the time taken by each step
+                    (each yield of the run function) is recorded and shown when the script ends;
+                    see TUI.Base.ScriptProfiler. May be changed later using setProfile.
     
     Notes:
     - The text of the Pause button is automatically set (to Pause or Resume, as appropriate).
@@ -80,6 +91,7 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
         pauseButton = None,
         cancelButton = None,
         stateFunc = None,
+        profile = False,
     ):
         RO.AddCallback.BaseMixin.__init__(self)
 
@@ -87,6 +99,8 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
         self.dispatcher = dispatcher
         
         self.scriptRunner = None
+        self.profiler = TUI.Base.ScriptProfiler.ScriptProfiler(isEnabled=profile)
+        self._profileTL = None
         
         if not pauseButton:
             pauseButton = _FakeButton()
@@ -120,6 +134,11 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
         """Create a new script runner.
         See ScriptRunner for the meaning of the arguments.
         """
+        # wrap the run function or method so the script can be profiled
+        if scriptClass:
+            scriptClass = self.profiler.makeScriptClass(scriptClass)
+        elif runFunc:
+            runFunc = self.profiler.makeRunFunc(runFunc)
         self.scriptRunner = opscore.actor.ScriptRunner(
             name = self.name,
             dispatcher = self.dispatcher,
@@ -135,6 +154,28 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
 
         self._setButtonState()
     
+    def getProfile(self):
+        """Return True if the script is being profiled
+        """
+        return self.profiler.isEnabled
+
+    def setProfile(self, doProfile):
+        """Enable or disable profiling; takes effect the next time the script is started
+        """
+        self.profiler.isEnabled = bool(doProfile)
+
+    def showProfile(self):
+        """Show the profile of the most recent run of the script (replacing the window showing an older profile)
+        """
+        master = self.scriptStatusBar
+        if self._profileTL and self._profileTL.winfo_exists():
+            self._profileTL.destroy()
+        self._profileTL = ScriptProfileWdg.showProfile(
+            master = master,
+            profiler = self.profiler,
+            title = "%s Profile" % (self.name,),
+        )
+
     def _doCancel(self):
         """Cancel the script.
         """
@@ -198,6 +239,8 @@ class BasicScriptWdg(RO.AddCallback.BaseMixin):
                 self.scriptStatusBar.playCmdFailed()
             else:
                 self.scriptStatusBar.playCmdDone()
+            if self.profiler.isEnabled and self.profiler.numSteps > 0:
+                self.showProfile()
         
         self._doCallbacks()
     
@@ -225,7 +268,7 @@ class _BaseUserScriptWdg(Tkinter.Frame, BasicScriptWdg):
         dispatcher = None,
     **kargs):
         Tkinter.Frame.__init__(self, master, **kargs)
-
+        self._profileVar = None # variable for the Profile contextual menu item; created when first needed
         
         srArgs = self._getScriptFuncs(isFirst=True)
         helpURL = srArgs.pop("HelpURL", None)
@@ -362,8 +405,26 @@ class _BaseUserScriptWdg(Tkinter.Frame, BasicScriptWdg):
         Returning True makes it automatically show help.
         """
         menu.add_command(label = "Reload", command = self.reload)
+        self._addProfileCtxItems(menu)
         return True
 
+    def _addProfileCtxItems(self, menu):
+        """Add profiling items to a contextual menu
+        """
+        if self._profileVar is None:
+            self._profileVar = Tkinter.BooleanVar(master=self)
+        self._profileVar.set(self.getProfile())
+        menu.add_checkbutton(
+            label = "Profile",
+            variable = self._profileVar,
+            command = lambda: self.setProfile(self._profileVar.get()),
+        )
+        menu.add_command(
+            label = "Show Profile",
+            command = self.showProfile,
+            state = "normal" if self.profiler.numSteps > 0 else "disabled",
+        )
+
 
 class ScriptModuleWdg(_BaseUserScriptWdg):
     def __init__(self,
@@ -483,6 +544,7 @@ class ScriptFileWdg(_BaseUserScriptWdg):
         menu.add_command(label = self.fullPath, state = "disabled")
         menu.add_command(label = "Copy Path", command = self.copyPath)
         menu.add_command(label = "Reload", command = self.reload)
+        self._addProfileCtxItems(menu)
         return True
     
     def _getScriptFuncs(self, isFirst=None):
@@ -492,7 +554,7 @@ class ScriptFileWdg(_BaseUserScriptWdg):
         """
 #       print "_getScriptFuncs(%s)" % isFirst
         scriptLocals = {"__file__": self.fullPath}
-        execfile(self.filename, scriptLocals)
+        exec TUI.Base.ScriptCache.getScriptCode(self.fullPath) in scriptLocals
         
         retDict = {}
         helpURL = scriptLocals.get("HelpURL")
@@ -1,3 +1,4 @@
 from StatusBar import *
 from FocusWdg import *
 from ScriptWdg import *
+from ScriptProfileWdg import *
@@ -0,0 +1,269 @@
+"""A layer of line and text annotations on a GrayImageWdg that is updated as a batch
+
+GrayImageWdg.addAnnotation creates new canvas items for each annotation and redraws
+each annotation separately whenever the image is zoomed or scrolled. That is fine for
+a few annotations, but the guider plate view has dozens (error vectors, X marks,
+probe labels, axes and scale bar) and they all change with every image.
+
+AnnotationLayer instead:
+- collects all annotations for one image in an AnnotationBatch
+- computes the canvas geometry of the whole batch at once using numpy
+- reuses existing canvas items (moving and reconfiguring them) instead of deleting
+  and recreating them; items that are not needed are hidden (and kept for later use),
+  so new items are only created when a batch has more annotations than any before it
+- redraws automatically (again as one batch) when the image is zoomed or scrolled,
+  or a new image is shown
+
+GrayImageWdg deletes all canvas items (using tag "all") when it shows a new image or resizes its canvas.
+To keep the layer's items, the layer replaces the delete method of the canvas instance
+with one that changes tag "all" to "all&&!<layer tag>" (a Tk 8.5 tag expression),
+and raises its items above the new image in the redraw that follows.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Items are reused across images: they are no longer deleted when the image widget
+                    shows a new image, and unneeded items are hidden instead of deleted.
+"""
+import numpy
+
+import RO.MathUtil
+
+__all__ = ["AnnotationBatch", "AnnotationLayer"]
+
+class AnnotationBatch(object):
+    """A set of line and text annotations, specified in image coordinates
+
+    All positions are image positions (see GrayImageWdg);
+    cnvOffset is an offset in canvas pixels (not affected by zoom).
+    """
+    def __init__(self):
+        # line data: image position, canvas offset, radius, is radius in image pixels?,
+        # angle (deg, canvas coordinates), start of line as a fraction of radius, options
+        self.lineImPos = []
+        self.lineCnvOffset = []
+        self.lineRad = []
+        self.lineIsImSize = []
+        self.lineAngle = []
+        self.lineBegFrac = []
+        self.lineOpts = []
+
+        self.textImPos = []
+        self.textCnvOffset = []
+        self.textOpts = []
+
+    def addLine(self, imPos, rad, angle, cnvOffset=(0, 0), isImSize=False, fill="black", arrow="none"):
+        """Add a line that starts at imPos + cnvOffset and extends rad in the direction angle
+
+        Inputs:
+        - imPos: image position of start of line
+        - rad: length of line; in image pixels if isImSize, else canvas pixels
+        - angle: direction of line (deg; 0 = +x, 90 = +y in canvas coordinates, which is down)
+        - cnvOffset: offset of start of line from imPos, in canvas pixels
+        - isImSize: if True, rad is in image pixels (and scales with zoom), else canvas pixels
+        - fill: color of line
+        - arrow: one of "none", "first", "last" or "both"
+        """
+        self._addLine(imPos, rad, angle, 0.0, cnvOffset, isImSize, (fill, arrow))
+
+    def addX(self, imPos, rad, cnvOffset=(0, 0), isImSize=True, fill="black"):
+        """Add an X centered at imPos + cnvOffset, with arms of length rad
+
+        Inputs are as for addLine
+        """
+        for angle in (45.0, 135.0):
+            self._addLine(imPos, rad, angle, -1.0, cnvOffset, isImSize, (fill, "none"))
+
+    def addText(self, imPos, text, cnvOffset=(0, 0), anchor="c", fill="black"):
+        """Add a text label at imPos + cnvOffset
+
+        Inputs:
+        - imPos: image position
+        - text: the text to display
+        - cnvOffset: offset from imPos, in canvas pixels
+        - anchor: point on text to display at the specified position; one of c, n, ne, e, se, s, sw, w or nw
+        - fill: color of text
+        """
+        self.textImPos.append(imPos)
+        self.textCnvOffset.append(cnvOffset)
+        self.textOpts.append((text, anchor, fill))
+
+    def _addLine(self, imPos, rad, angle, begFrac, cnvOffset, isImSize, opts):
+        self.lineImPos.append(imPos)
+        self.lineCnvOffset.append(cnvOffset)
+        self.lineRad.append(rad)
+        self.lineIsImSize.append(bool(isImSize))
+        self.lineAngle.append(angle)
+        self.lineBegFrac.append(begFrac)
+        self.lineOpts.append(opts)
+
+    @property
+    def numLines(self):
+        return len(self.lineOpts)
+
+    @property
+    def numText(self):
+        return len(self.textOpts)
+
+
+class AnnotationLayer(object):
+    """A batch-updated layer of annotations on a GrayImageWdg
+
+    Inputs:
+    - gim: GrayImageWdg
+    - tag: canvas tag for all items in this layer
+    """
+    def __init__(self, gim, tag):
+        self.gim = gim
+        self.cnv = gim.cnv
+        self.tag = str(tag)
+        self.batch = AnnotationBatch()
+        self._lineIDs = []
+        self._lineOpts = []
+        self._textIDs = []
+        self._textOpts = []
+        self._protectItems()
+        self.gim.addCallback(self._gimCallback, callNow=False)
+
+    def clear(self, doRedraw=True):
+        """Remove all annotations
+
+        Inputs:
+        - doRedraw: if False, the annotations stay on the canvas until the next redraw;
+            use this just before displaying a new image
+        """
+        self.batch = AnnotationBatch()
+        if doRedraw:
+            self.redraw()
+
+    def setBatch(self, batch):
+        """Display a new set of annotations, replacing the current set
+
+        Inputs:
+        - batch: an AnnotationBatch
+        """
+        self.batch = batch
+        self.redraw()
+
+    def redraw(self):
+        """Redraw the current annotations, e.g. after a zoom or scroll
+        """
+        if self.gim.dataArr is None:
+            self._hideItems()
+            return
+        if (self._lineIDs or self._textIDs) and not self.cnv.find_withtag(self.tag):
+            # canvas was cleared by the image widget; the item IDs are stale
+            self._forgetItems()
+
+        batch = self.batch
+        if batch.numLines > 0:
+            cnvPosArr = self._cnvPosFromImPos(batch.lineImPos, batch.lineCnvOffset)
+            radArr = numpy.array(batch.lineRad, dtype=float)
+            radArr = numpy.where(batch.lineIsImSize, radArr * self.gim.zoomFac, radArr).round()
+            angleArr = numpy.array(batch.lineAngle, dtype=float) * RO.MathUtil.RadPerDeg
+            dxyArr = numpy.column_stack((numpy.cos(angleArr), numpy.sin(angleArr))) * radArr[:, numpy.newaxis]
+            begArr = cnvPosArr + dxyArr * numpy.array(batch.lineBegFrac)[:, numpy.newaxis]
+            endArr = cnvPosArr + dxyArr
+            coordList = numpy.column_stack((begArr, endArr)).round().astype(int).tolist()
+        else:
+            coordList = []
+        self._lineIDs, self._lineOpts = self._updateItems(
+            itemIDs = self._lineIDs,
+            itemOpts = self._lineOpts,
+            coordList = coordList,
+            optsList = batch.lineOpts,
+            createFunc = self._createLine,
+            configFunc = self._configLine,
+        )
+
+        if batch.numText > 0:
+            coordList = self._cnvPosFromImPos(batch.textImPos, batch.textCnvOffset).round().astype(int).tolist()
+        else:
+            coordList = []
+        self._textIDs, self._textOpts = self._updateItems(
+            itemIDs = self._textIDs,
+            itemOpts = self._textOpts,
+            coordList = coordList,
+            optsList = batch.textOpts,
+            createFunc = self._createText,
+            configFunc = self._configText,
+        )
+
+        self.cnv.tag_raise(self.tag)
+
+    def _cnvPosFromImPos(self, imPosList, cnvOffsetList):
+        """Return an array of canvas positions, shape (N, 2), for a list of N image positions and canvas offsets
+        """
+        imPosArr = numpy.array(imPosList, dtype=float).reshape(-1, 2)
+        zoomFac = self.gim.zoomFac
+        begImPos = numpy.array(self.gim.begIJ[::-1], dtype=float)
+        cnvLLPos = ((imPosArr - begImPos) * zoomFac) - 0.5
+        cnvPosArr = numpy.empty(cnvLLPos.shape, dtype=float)
+        cnvPosArr[:, 0] = cnvLLPos[:, 0] + self.gim.bdWidth
+        cnvPosArr[:, 1] = self.gim.cnvShape[1] - 1 - self.gim.bdWidth - cnvLLPos[:, 1]
+        return cnvPosArr + numpy.array(cnvOffsetList, dtype=float).reshape(-1, 2)
+
+    def _updateItems(self, itemIDs, itemOpts, coordList, optsList, createFunc, configFunc):
+        """Move, reconfigure and show existing items, creating items as needed and hiding the rest
+
+        itemOpts contains None for hidden items.
+        Returns the new lists of item IDs and item options
+        """
+        numWanted = len(coordList)
+        numReused = min(numWanted, len(itemIDs))
+        newIDs = list(itemIDs)
+        newOpts = list(itemOpts)
+        for ind in range(numReused):
+            self.cnv.coords(itemIDs[ind], *coordList[ind])
+            if itemOpts[ind] is None:
+                self.cnv.itemconfigure(itemIDs[ind], state="normal")
+            if itemOpts[ind] != optsList[ind]:
+                configFunc(itemIDs[ind], optsList[ind])
+            newOpts[ind] = optsList[ind]
+        for ind in range(numReused, numWanted):
+            newIDs.append(createFunc(coordList[ind], optsList[ind]))
+            newOpts.append(optsList[ind])
+        for ind in range(numWanted, len(itemIDs)):
+            if itemOpts[ind] is not None:
+                self.cnv.itemconfigure(itemIDs[ind], state="hidden")
+                newOpts[ind] = None
+        return newIDs, newOpts
+
+    def _createLine(self, coords, opts):
+        fill, arrow = opts
+        return self.cnv.create_line(*coords, fill=fill, arrow=arrow, tags=self.tag)
+
+    def _configLine(self, itemID, opts):
+        fill, arrow = opts
+        self.cnv.itemconfigure(itemID, fill=fill, arrow=arrow)
+
+    def _createText(self, coords, opts):
+        text, anchor, fill = opts
+        return self.cnv.create_text(*coords, text=text, anchor=anchor, fill=fill, tags=self.tag)
+
+    def _configText(self, itemID, opts):
+        text, anchor, fill = opts
+        self.cnv.itemconfigure(itemID, text=text, anchor=anchor, fill=fill)
+
+    def _hideItems(self):
+        self.cnv.itemconfigure(self.tag, state="hidden")
+        self._lineOpts = [None] * len(self._lineIDs)
+        self._textOpts = [None] * len(self._textIDs)
+
+    def _protectItems(self):
+        """Keep this layer's items when the image widget deletes all canvas items
+        """
+        cnvDelete = self.cnv.delete
+        allButLayerTag = "all&&!%s" % (self.tag,)
+        def delete(*args):
+            cnvDelete(*[allButLayerTag if arg == "all" else arg for arg in args])
+        self.cnv.delete = delete
+
+    def _forgetItems(self):
+        self._lineIDs = []
+        self._lineOpts = []
+        self._textIDs = []
+        self._textOpts = []
+
+    def _gimCallback(self, gim=None):
+        """The image widget has been redisplayed (new image, zoom or scroll)"""
+        self.redraw()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+"""Analyze a directory of processed guider (gproc) files without a GUI
+
+For each gproc file, report the time, seeing, per-probe FWHM and a focus fit.
+Files are processed in parallel by a pool of worker processes and the results
+are streamed to a CSV file as they arrive. Optionally the probe data is also saved
+as a ProbeStore .npz file, which is rewritten every saveInterval seconds during the run
+(so it is usable while a long run is in progress) and once more at the end.
+
+Usage:
+    BatchAnalysis.py [options] dir [dir...]
+
+Run with --help for the options.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Bug fix: unixTime was written to the CSV file with only 6 significant digits.
+                    Save the .npz file periodically during the run, as well as at the end.
+"""
+import fnmatch
+import multiprocessing
+import optparse
+import os
+import sys
+import time
+import warnings
+
+import numpy
+import pyfits
+
+import FocusAnalysis
+import ProbeStore
+
+__all__ = ["findFiles", "analyzeFile", "runBatch", "main"]
+
+DefPattern = "proc-gimg-*.fits*"
+DefNumProbes = 17
+DefSaveInterval = 60.0 # interval between saves of the .npz file (sec)
+
+SummaryFields = (
+    "imageName", "frameNum", "unixTime", "expTime", "seeing",
+    "numGood", "medianFWHM", "bestFocusOffset", "bestFWHM",
+)
+
+# CSV format of float fields that need more than the default 6 significant digits
+_FieldFormatDict = dict(
+    unixTime = "%.3f",
+)
+_DefFloatFormat = "%.6g"
+
+def findFiles(dirList, pattern=DefPattern):
+    """Return a sorted list of paths to files matching pattern in the specified directories (recursively)
+    """
+    pathList = []
+    for topDir in dirList:
+        for dirPath, dirNames, fileNames in os.walk(topDir):
+            for fileName in fnmatch.filter(fileNames, pattern):
+                pathList.append(os.path.join(dirPath, fileName))
+    pathList.sort()
+    return pathList
+
+def analyzeFile(filePath):
+    """Analyze one gproc file
+
+    Returns (filePath, summaryDict, probeDataDict, errMsg):
+    - summaryDict: dict of SummaryFields: value (None if the file could not be read)
+    - probeDataDict: data for ProbeStore.addFrame (None if the file could not be read)
+    - errMsg: None on success, else a string describing the problem; a failed focus fit
+        is reported here but the other data is still returned
+
+    This function is run in worker processes, so it must not raise.
+    """
+    imageName = os.path.basename(filePath)
+    try:
+        fitsObj = pyfits.open(filePath)
+        try:
+            FocusAnalysis.checkGProcFormat(fitsObj)
+            hdr = fitsObj[0].header
+            probeDataDict = ProbeStore.readProbeData(fitsObj)
+            focusOffsetArr, fwhmArr, probeNumberArr = FocusAnalysis.getProbeFocusData(fitsObj)
+            summaryDict = dict(
+                imageName = imageName,
+                frameNum = ProbeStore.getFrameNum(imageName),
+                unixTime = ProbeStore.getUnixTime(hdr),
+                expTime = hdr.get("EXPTIME", numpy.nan),
+                seeing = FocusAnalysis.getSeeing(fitsObj),
+                numGood = len(fwhmArr),
+                medianFWHM = numpy.median(fwhmArr) if len(fwhmArr) > 0 else numpy.nan,
+                bestFocusOffset = numpy.nan,
+                bestFWHM = numpy.nan,
+            )
+            errMsg = None
+            try:
+                focusFit = FocusAnalysis.fitFocus(focusOffsetArr, fwhmArr, float(hdr["PLATSCAL"]))
+                summaryDict["bestFocusOffset"] = focusFit.bestFocusOffset
+                summaryDict["bestFWHM"] = focusFit.bestFWHM
+            except Exception, e:
+                errMsg = "cannot fit focus: %s" % (e,)
+        finally:
+            fitsObj.close()
+    except Exception, e:
+        return (filePath, None, None, str(e))
+    return (filePath, summaryDict, probeDataDict, errMsg)
+
+
+class CSVWriter(object):
+    """Write one line per analyzed file to a CSV file
+
+    Inputs:
+    - outFile: open file
+    - numProbes: number of per-probe FWHM columns
+    """
+    def __init__(self, outFile, numProbes=DefNumProbes):
+        self.outFile = outFile
+        self.numProbes = int(numProbes)
+        colNames = list(SummaryFields) + ["fwhm%d" % (ind + 1,) for ind in range(self.numProbes)]
+        self.outFile.write(",".join(colNames) + "\n")
+
+    def write(self, summaryDict, probeDataDict):
+        strList = [_formatCSV(summaryDict[field], _FieldFormatDict.get(field, _DefFloatFormat))
+            for field in SummaryFields]
+        fwhmArr = numpy.empty(self.numProbes) + numpy.nan
+        probeFWHMArr = probeDataDict.get("fwhm", ())[0:self.numProbes]
+        fwhmArr[0:len(probeFWHMArr)] = probeFWHMArr
+        strList += [_formatCSV(val, _DefFloatFormat) for val in fwhmArr]
+        self.outFile.write(",".join(strList) + "\n")
+
+def _formatCSV(val, floatFormat):
+    """Format a value for CSV output; floats are formatted with floatFormat, and non-finite floats as ""
+    """
+    if isinstance(val, basestring):
+        return val
+    if isinstance(val, (float, numpy.floating)):
+        if not numpy.isfinite(val):
+            return ""
+        return floatFormat % (val,)
+    return str(val)
+
+
+def runBatch(pathList, csvFile=None, npzPath=None, numProc=None, numProbes=DefNumProbes,
+    logFile=sys.stderr, reportInterval=10.0, saveInterval=DefSaveInterval):
+    """Analyze a list of gproc files in parallel
+
+    Inputs:
+    - pathList: list of file paths
+    - csvFile: open file to which to write CSV output, or None
+    - npzPath: path of ProbeStore .npz file to write, or None;
+        it is written every saveInterval seconds and at the end
+    - numProc: number of worker processes; if None use the number of CPUs
+    - numProbes: number of per-probe FWHM columns in the CSV output
+    - logFile: file to which to write progress and errors, or None
+    - reportInterval: interval between progress reports (sec)
+    - saveInterval: interval between saves of the .npz file (sec)
+
+    Returns a tuple: (number of files processed, number of files that could not be read, elapsed time (sec))
+    """
+    def log(msgStr):
+        if logFile:
+            logFile.write(msgStr + "\n")
+
+    csvWriter = CSVWriter(csvFile, numProbes) if csvFile else None
+    probeStore = ProbeStore.ProbeStore() if npzPath else None
+    numFiles = len(pathList)
+    numDone = 0
+    numFailed = 0
+    startTime = time.time()
+    nextReportTime = startTime + reportInterval
+    nextSaveTime = startTime + saveInterval
+    chunkSize = max(1, min(64, numFiles // (4 * (numProc or multiprocessing.cpu_count()))))
+    pool = multiprocessing.Pool(numProc)
+    try:
+        for filePath, summaryDict, probeDataDict, errMsg in pool.imap_unordered(analyzeFile, pathList, chunkSize):
+            numDone += 1
+            if errMsg:
+                log("%s: %s" % (filePath, errMsg))
+            if summaryDict is None:
+                numFailed += 1
+                continue
+            if csvWriter:
+                csvWriter.write(summaryDict, probeDataDict)
+            if probeStore is not None:
+                probeStore.addFrame(
+                    imageName = summaryDict["imageName"],
+                    frameNum = summaryDict["frameNum"],
+                    unixTime = summaryDict["unixTime"],
+                    dataDict = probeDataDict,
+                )
+            currTime = time.time()
+            if probeStore is not None and currTime > nextSaveTime:
+                probeStore.save(npzPath)
+                nextSaveTime = time.time() + saveInterval
+            if currTime > nextReportTime:
+                nextReportTime = currTime + reportInterval
+                log("%d of %d files; %0.1f files/sec" % (numDone, numFiles, numDone / (currTime - startTime)))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    if probeStore is not None:
+        probeStore.save(npzPath)
+    return numDone, numFailed, time.time() - startTime
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage="%prog [options] dir [dir...]",
+        description="Analyze processed guider (gproc) files")
+    parser.add_option("-o", "--csv", dest="csvPath", help="CSV output file (default: stdout)")
+    parser.add_option("-n", "--npz", dest="npzPath", help="ProbeStore .npz output file (default: none)")
+    parser.add_option("-j", "--jobs", dest="numProc", type="int",
+        help="number of worker processes (default: number of CPUs)")
+    parser.add_option("-p", "--pattern", dest="pattern", default=DefPattern,
+        help="file name pattern (default: %default)")
+    parser.add_option("--nprobes", dest="numProbes", type="int", default=DefNumProbes,
+        help="number of per-probe FWHM columns (default: %default)")
+    options, dirList = parser.parse_args(argv)
+    if not dirList:
+        parser.error("specify at least one directory")
+
+    warnings.simplefilter("ignore")
+    pathList = findFiles(dirList, options.pattern)
+    if not pathList:
+        sys.stderr.write("No files matching %r found\n" % (options.pattern,))
+        return 1
+
+    if options.csvPath:
+        csvFile = open(options.csvPath, "w")
+    else:
+        csvFile = sys.stdout
+    try:
+        numDone, numFailed, elapsedTime = runBatch(
+            pathList = pathList,
+            csvFile = csvFile,
+            npzPath = options.npzPath,
+            numProc = options.numProc,
+            numProbes = options.numProbes,
+        )
+    finally:
+        if csvFile is not sys.stdout:
+            csvFile.close()
+    sys.stderr.write("Processed %d files (%d unreadable) in %0.1f sec: %0.1f files/sec\n" % \
+        (numDone, numFailed, elapsedTime, numDone / max(elapsedTime, 1.0e-6)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
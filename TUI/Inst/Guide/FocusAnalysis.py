@@ -0,0 +1,211 @@
+"""Focus analysis of processed guider (gproc) files
+
+Each guide probe is at a different focus offset, so the FWHM measured by each probe
+as a function of its focus offset gives a focus curve. This module extracts that data
+from a gproc file and fits it. It does not use Tkinter, so it may be used by
+command-line tools as well as by FocusPlotWdg.
+
+History:
+2026-10-19 JParejko Extracted from FocusPlotWdg.
+2026-10-19 JParejko Fit using TUI.Base.PolyFit; added optional outlier rejection to fitFocus,
+                    and added fitFocusMany and bootstrapBestFocus.
+2026-10-19 JParejko Added getProbeTable, which is also used by ProbeStore.
+2026-10-19 JParejko Added getFocusData, which gets focus data from per-probe arrays (e.g. from ProbeStore).
+"""
+import numpy
+
+import TUI.Base.PolyFit
+
+__all__ = ["checkGProcFormat", "getProbeTable", "getFocusData", "getProbeFocusData", "getSeeing", "FocusFit", "fitFocus",
+    "fitFocusMany", "bootstrapBestFocus"]
+
+ProbeTableHDU = 6
+
+FocalRatio = 5.0
+
+def checkGProcFormat(fitsObj):
+    """Raise RuntimeError if fitsObj is not a usable version of a gproc file
+    """
+    try:
+        sdssFmtStr = fitsObj[0].header["SDSSFMT"]
+    except Exception:
+        raise RuntimeError("No SDSSFMT header entry")
+
+    try:
+        formatName, versMajStr, versMinStr = sdssFmtStr.split()
+        int(versMajStr)
+        int(versMinStr)
+    except Exception:
+        raise RuntimeError("Could not parse SDSSFMT=%r" % (sdssFmtStr,))
+
+    if formatName.lower() != "gproc":
+        raise RuntimeError("SDSSFMT = %s != gproc" % (formatName.lower(),))
+
+def getProbeTable(fitsObj):
+    """Return the probe table of a gproc file: a pyfits table with one row per guide probe
+
+    Raises an exception if the probe table is missing.
+    """
+    return fitsObj[ProbeTableHDU].data
+
+def getFocusData(probeDataDict):
+    """Return focus data for the usable guide probes, given per-probe data
+
+    Inputs:
+    - probeDataDict: dict of field: per-probe array, containing at least
+        exists, enabled, focusOffset and fwhm (e.g. as returned by ProbeStore.getFrame)
+
+    A probe is usable if it exists, is enabled and has a finite FWHM.
+
+    Returns three arrays, with one entry per usable probe:
+    - focusOffsetArr: focus offset (um)
+    - fwhmArr: FWHM (arcsec)
+    - probeNumberArr: probe number (1-based)
+    """
+    fwhmArr = numpy.asarray(probeDataDict["fwhm"])
+    numProbes = len(fwhmArr)
+    isGoodArr = numpy.asarray(probeDataDict["exists"], dtype=bool) \
+        & numpy.asarray(probeDataDict["enabled"], dtype=bool) & numpy.isfinite(fwhmArr)
+    focusOffsetArr = numpy.extract(isGoodArr, probeDataDict["focusOffset"])
+    fwhmArr = numpy.extract(isGoodArr, fwhmArr)
+    probeNumberArr = numpy.extract(isGoodArr, numpy.arange(1, numProbes + 1, dtype=int))
+    return focusOffsetArr, fwhmArr, probeNumberArr
+
+def getProbeFocusData(fitsObj):
+    """Return focus data for the usable guide probes in a gproc file; see getFocusData
+    """
+    probeData = getProbeTable(fitsObj)
+    return getFocusData(dict((field, probeData.field(field))
+        for field in ("exists", "enabled", "focusOffset", "fwhm")))
+
+def getSeeing(fitsObj):
+    """Return seeing (arcsec) from the SEEING header card, or nan if unknown
+    """
+    try:
+        return float(fitsObj[0].header["SEEING"])
+    except Exception:
+        return numpy.nan
+
+
+class FocusFit(object):
+    """A fit of rms^2 - C * focus offset^2 as a linear function of focus offset
+
+    Inputs:
+    - coeff: fit coefficients (slope, intercept), as returned by numpy.polyfit
+    - micronsPerArcsec: plate scale (um/arcsec)
+    - C: coefficient of the focus offset^2 term, which depends on the focal ratio
+    - isUsed: bool array; True for data points used in the fit, False for rejected points;
+        None if unknown
+    """
+    def __init__(self, coeff, micronsPerArcsec, C, isUsed=None):
+        self.coeff = numpy.array(coeff, dtype=float)
+        self.micronsPerArcsec = float(micronsPerArcsec)
+        self.C = float(C)
+        self.isUsed = isUsed
+
+    def getFWHM(self, focusOffset):
+        """Return fit FWHM (arcsec) at the specified focus offset(s) (um)
+        """
+        focusOffset = numpy.asarray(focusOffset, dtype=float)
+        fitRMSSq = (focusOffset * self.coeff[0]) + self.coeff[1] + (self.C * focusOffset**2)
+        return numpy.sqrt(fitRMSSq) * (2.35 / self.micronsPerArcsec)
+
+    @property
+    def bestFocusOffset(self):
+        """Focus offset (um) at which the fit FWHM is a minimum"""
+        return -self.coeff[0] / (2.0 * self.C)
+
+    @property
+    def bestFWHM(self):
+        """Fit FWHM (arcsec) at best focus; nan if the fit is not physical"""
+        return float(self.getFWHM(self.bestFocusOffset))
+
+    def getCurve(self, minFocusOffset, maxFocusOffset, nPoints=50):
+        """Return [focusOffsetArr, fwhmArr] evaluated at nPoints evenly spaced focus offsets
+        """
+        focusOffsetArr = numpy.linspace(minFocusOffset, maxFocusOffset, nPoints)
+        return [focusOffsetArr, self.getFWHM(focusOffsetArr)]
+
+
+def fitFocus(focusOffsetArr, fwhmArr, plateScale, rejSigma=None):
+    """Fit a line to rms^2 - focus offset^2 vs. focus offset
+
+    (after converting to suitable units)
+
+    Inputs:
+    - focusOffsetArr: array of focus offset values (um)
+    - fwhmArr: array of FWHM values (arcsec)
+    - plateScale: plate scale (mm/deg), e.g. from the PLATSCAL header card
+    - rejSigma: reject outliers more than rejSigma standard deviations from the fit;
+        None for no rejection
+
+    Returns a FocusFit.
+    Raises RuntimeError if the data cannot be fit.
+    """
+    focusOffsetArr = numpy.asarray(focusOffsetArr, dtype=float)
+    fwhmArr = numpy.asarray(fwhmArr, dtype=float)
+    if len(focusOffsetArr) < 2:
+        raise RuntimeError("too few data points")
+    if min(focusOffsetArr) == max(focusOffsetArr):
+        raise RuntimeError("no focus offset range")
+
+    micronsPerArcsec, C, yArr = _getFitData(focusOffsetArr, fwhmArr, plateScale)
+    fitRes = TUI.Base.PolyFit.polyFit(focusOffsetArr, yArr, 1, rejSigma=rejSigma)
+    return FocusFit(coeff=fitRes.coeff[::-1], micronsPerArcsec=micronsPerArcsec, C=C, isUsed=fitRes.isUsed)
+
+def fitFocusMany(focusOffsetArr, fwhmArr, plateScale):
+    """Fit focus for many frames at once
+
+    Inputs:
+    - focusOffsetArr: focus offset (um); shape (numProbes,) or (numFrames, numProbes)
+    - fwhmArr: FWHM (arcsec); shape (numFrames, numProbes); use nan for missing data
+        (e.g. ProbeStore.getField("fwhm") with nan where not ProbeStore.getIsGood())
+    - plateScale: plate scale (mm/deg); a scalar or an array of shape (numFrames,)
+
+    Returns (bestFocusOffsetArr, bestFWHMArr), each of shape (numFrames,);
+    values are nan for frames that cannot be fit.
+    """
+    fwhmArr = numpy.array(fwhmArr, dtype=float, ndmin=2)
+    focusOffsetArr = numpy.broadcast_to(numpy.asarray(focusOffsetArr, dtype=float), fwhmArr.shape)
+    plateScale = numpy.broadcast_to(numpy.asarray(plateScale, dtype=float), fwhmArr.shape[0:1])
+    micronsPerArcsec, C, yArr = _getFitData(focusOffsetArr, fwhmArr, plateScale[:, numpy.newaxis])
+    coeffArr = TUI.Base.PolyFit.polyFitMany(focusOffsetArr, yArr, 1)
+    bestFocusOffsetArr = -coeffArr[:, 1] / (2.0 * C)
+    with numpy.errstate(invalid="ignore"):
+        bestRMSSqArr = coeffArr[:, 0] - (C * bestFocusOffsetArr**2)
+        bestFWHMArr = numpy.sqrt(bestRMSSqArr) * (2.35 / micronsPerArcsec[:, 0])
+    return bestFocusOffsetArr, bestFWHMArr
+
+def bootstrapBestFocus(focusOffsetArr, fwhmArr, plateScale, conf=0.6827, numBoot=500, seed=None):
+    """Return a bootstrap confidence interval (low, high) for the best focus offset (um)
+
+    Inputs:
+    - focusOffsetArr, fwhmArr, plateScale: as for fitFocus
+    - conf: confidence level (0-1); the default gives the equivalent of +/- 1 sigma
+    - numBoot: number of bootstrap resamplings
+    - seed: seed for the random number generator; None for a random seed
+
+    Returns (nan, nan) if no resampling can be fit.
+    """
+    focusOffsetArr = numpy.asarray(focusOffsetArr, dtype=float)
+    micronsPerArcsec, C, yArr = _getFitData(focusOffsetArr, fwhmArr, plateScale)
+    bestFocusArr = TUI.Base.PolyFit.bootstrapPolyFit(focusOffsetArr, yArr, 1,
+        func = lambda coeffArr: -coeffArr[:, 1] / (2.0 * C),
+        numBoot = numBoot,
+        seed = seed,
+    )
+    return TUI.Base.PolyFit.confInterval(bestFocusArr, conf)
+
+def _getFitData(focusOffsetArr, fwhmArr, plateScale):
+    """Return micronsPerArcsec, C and the data to fit: rms^2 - C * focus offset^2 (um^2)
+    """
+    C = 5.0 / (32.0 * FocalRatio**2)
+
+    # compute RMS in microns
+    # RMS = FWHM / 2.35, but FWHM is in arcsec
+    # plateScale is in mm/deg
+    micronsPerArcsec = numpy.asarray(plateScale, dtype=float) * 1.0e3 / 3600.0
+    rmsArr = numpy.asarray(fwhmArr, dtype=float) * (micronsPerArcsec / 2.35) # in microns
+
+    yArr = rmsArr**2 - (C * focusOffsetArr**2)
+    return micronsPerArcsec, C, yArr
@@ -10,6 +10,9 @@ History:
 2009-11-13 ROwen    Bug fix: if probes were missing then probe labels were wrong.
                     Bug fix: was fitting the wrong equation.
 2010-06-28 ROwen    Removed duplicate import (thanks to pychecker).
+2026-10-19 JParejko Moved parsing and fitting to Tk-free module FocusAnalysis.
+2026-10-19 JParejko Get the probe data, plate scale and seeing from the shared ProbeStore
+                    instead of opening the FITS file a second time.
 """
 import itertools
 import os
@@ -23,7 +26,9 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 import RO.Constants
 import RO.StringUtil
 import TUI.Base.Wdg.StatusBar
+import FocusAnalysis
 import GuideImage
+import ProbeStore
 
 _HelpURL = "Instruments/FocusPlotWin.html"
 
@@ -64,23 +69,15 @@ class FocusPlotWdg(Tkinter.Frame):
             return
         
         try:
-            fitsObj = self.getFITSObj(imObj)
-            if fitsObj == None:
+            frameDict = self.getFrameDict(imObj)
+            if frameDict == None:
                 return
         except Exception, e:
-            sys.stderr.write("FocusPlotWdg: could not get FITS object: %s\n" % \
+            sys.stderr.write("FocusPlotWdg: could not get probe data: %s\n" % \
                 (RO.StringUtil.strFromException(e),))
             return
         try:
-            probeData = fitsObj[6].data        
-            numProbes = len(probeData)
-            isGoodArr = probeData.field("exists") & probeData.field("enabled") & \
-                numpy.isfinite(probeData.field("fwhm"))
-            if len(isGoodArr) == 0:
-                return
-            focusOffsetArr = numpy.extract(isGoodArr, probeData.field("focusOffset"))
-            fwhmArr = numpy.extract(isGoodArr, probeData.field("fwhm"))
-            probeNumberArr = numpy.extract(isGoodArr, numpy.arange(1, numProbes + 1, dtype=int))
+            focusOffsetArr, fwhmArr, probeNumberArr = FocusAnalysis.getFocusData(frameDict)
         except Exception, e:
             sys.stderr.write("FocusPlotWdg could not parse data in image %s: %s\n" % \
                 (imObj.imageName, RO.StringUtil.strFromException(e)))
@@ -97,16 +94,12 @@ class FocusPlotWdg(Tkinter.Frame):
         self.plotAxis.plot([0.0], [0.0], linestyle="", marker="")
         
         # fit data and show the fit
-        fitArrays = self.fitFocus(focusOffsetArr, fwhmArr, fitsObj)
+        fitArrays = self.fitFocus(focusOffsetArr, fwhmArr, frameDict["plateScale"])
         if fitArrays != None:
             self.plotAxis.plot(fitArrays[0], fitArrays[1], color='blue', linestyle="-", label="best fit")
 
         # add seeing
-        try:
-            seeingStr = fitsObj[0].header["SEEING"]
-            seeing = float(seeingStr)
-        except Exception:
-            seeing = numpy.nan
+        seeing = frameDict["seeing"]
         if numpy.isfinite(seeing):
             self.plotAxis.plot([0.0], [seeing], linestyle="", marker="x", markersize=12,
                 color="green", markeredgewidth=1, label="seeing")
@@ -118,35 +111,28 @@ class FocusPlotWdg(Tkinter.Frame):
 
         self.figCanvas.draw()
     
-    def getFITSObj(self, imObj):
-        """Get pyfits fits object, or None if the file is not a usable version of a GPROC file
-        """
-        fitsObj = imObj.getFITSObj()
-        try:
-            sdssFmtStr = fitsObj[0].header["SDSSFMT"]
-        except Exception:
-            self.statusBar.setMsg("No SDSSFMT header entry",
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
+    def getFrameDict(self, imObj):
+        """Get the frame's data from the probe store (see ProbeStore.getFrame),
+        or None if the image is not downloaded or is not a usable version of a GPROC file
 
-        try:
-            formatName, versMajStr, versMinStr = sdssFmtStr.split()
-            formatMajorVers = int(versMajStr)
-            formatMinorVers = int(versMinStr)
-        except Exception:
-            self.statusBar.setMsg("Could not parse SDSSFMT=%r" % (sdssFmtStr,),
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
-
-        if formatName.lower() != "gproc":
-            self.statusBar.setMsg("SDSSFMT = %s != gproc" % (formatName.lower(),),
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
+        The image is added to the probe store if it is downloaded but not yet in the store.
+        """
+        probeStore = ProbeStore.getProbeStore()
+        frameDict = probeStore.getFrame(imageName=imObj.imageName)
+        if frameDict == None:
+            if imObj.state != imObj.Downloaded:
+                return None
+            probeStore.addImage(imObj)
+            frameDict = probeStore.getFrame(imageName=imObj.imageName)
+            if frameDict == None:
+                self.statusBar.setMsg("%s is not a usable guider gproc file" % (imObj.imageName,),
+                    severity = RO.Constants.sevWarning, isTemp=True)
+                return None
         
         self.statusBar.clearTempMsg()
-        return fitsObj
+        return frameDict
 
-    def fitFocus(self, focusOffsetArr, fwhmArr, fitsObj, nPoints=50):
+    def fitFocus(self, focusOffsetArr, fwhmArr, plateScale, nPoints=50):
         """Fit a line to rms^2 - focus offset^2 vs. focus offset
         
         (after converting to suitable units)
@@ -154,41 +140,16 @@ class FocusPlotWdg(Tkinter.Frame):
         Inputs:
         - focusOffsetArr: array of focus offset values (um)
         - fwhmArr: array of FWHM values (arcsec)
+        - plateScale: plate scale (mm/deg)
         - nPoints: number of points desired in the returned fit arrays
         
         Returns [newFocusOffArr, fitFWHMArr] if the fit succeeds; None otherwise
         """
-        if len(focusOffsetArr) < 2:
-            self.statusBar.setMsg("Cannot fit data: too few data points",
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
-        if min(focusOffsetArr) == max(focusOffsetArr):
-            self.statusBar.setMsg("Cannot fit data: no focus offset range",
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
         try:
-            plateScale = float(fitsObj[0].header["PLATSCAL"])
-
-            focalRatio = 5.0
-            C = 5.0 / (32.0 * focalRatio**2)
-
-            # compute RMS in microns
-            # RMS = FWHM / 2.35, but FWHM is in arcsec
-            # plateScale is in mm/deg
-            micronsPerArcsec = plateScale * 1.0e3 / 3600.0
-            rmsArr = fwhmArr * (micronsPerArcsec / 2.35) # in microns
-    
-            yArr = rmsArr**2 - (C * focusOffsetArr**2)
-            
-            fitCoeff = numpy.polyfit(focusOffsetArr, yArr, 1)
-    
-            fitFocusOffsetArr = numpy.linspace(min(focusOffsetArr), max(focusOffsetArr), nPoints)
-            fitYArr = (fitFocusOffsetArr * fitCoeff[0]) + fitCoeff[1]
-            fitRMSSqArr = fitYArr + (C * fitFocusOffsetArr**2)
-            
-            fitFWHM = numpy.sqrt(fitRMSSqArr) * (2.35 / micronsPerArcsec)
-            
-            return [fitFocusOffsetArr, fitFWHM]
+            if not numpy.isfinite(plateScale):
+                raise RuntimeError("plate scale (PLATSCAL) unknown")
+            focusFit = FocusAnalysis.fitFocus(focusOffsetArr, fwhmArr, plateScale)
+            return focusFit.getCurve(min(focusOffsetArr), max(focusOffsetArr), nPoints)
         except Exception, e:
             self.statusBar.setMsg("Cannot fit data: %s" % (RO.StringUtil.strFromException(e),),
                 severity = RO.Constants.sevWarning, isTemp=True)
@@ -220,7 +181,6 @@ if __name__ == "__main__":
         imageName = "proc-gimg-1310.fits",
         isLocal = True,
     )
-    gim.getFITSObj()
     testFrame.plot(gim)
 
     GuideTest.tuiModel.reactor.run()
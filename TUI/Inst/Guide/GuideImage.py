@@ -26,6 +26,7 @@ History:
 2010-08-10 ROwen    Updated for RO.Comm 3.0.
 2014-08-24 JParejko Bug fix: httpGet.getErrMsg() -> httpGet.errMsg.
 2014-08-27 ROwen    Removed two unused imports.
+2026-10-19 JParejko Added nBytes property, for limiting the disk space used by guide image history.
 """
 import os
 import pyfits
@@ -79,6 +80,7 @@ class BasicImage(object):
         else:
             self.state = self.Downloaded
         self.isInSequence = not isLocal
+        self._nBytes = None
         
         # set local path
         # this split suffices to separate the components because image names are simple
@@ -159,6 +161,21 @@ class BasicImage(object):
 #               traceback.print_exc(file=sys.stderr)
         return None
     
+    @property
+    def nBytes(self):
+        """Return the size of the downloaded file (bytes); 0 if not downloaded or local
+        
+        Local files are not counted because they are never deleted by expire.
+        """
+        if self.isLocal or self.state != self.Downloaded:
+            return 0
+        if self._nBytes is None:
+            try:
+                self._nBytes = os.path.getsize(self._localPath)
+            except OSError:
+                return 0
+        return self._nBytes
+
     @property
     def localPath(self):
         """Return the full local path to the image."""
@@ -229,6 +229,16 @@ History:
 2013-04-01 ROwen    Add guide probe name annotation to unassembled (non-plate) image.
 2013-05-13 ROwen    Support older guide images that don't have gprobebits information.
 2013-05-17 ROwen    Bug fix: plateInfo and havePlateInfo might be referenced without being defined.
+2026-10-19 JParejko Added progressive display: a large image whose shape differs from the displayed image
+                    is first shown as a block-averaged preview, then at full resolution (with annotations).
+2026-10-19 JParejko Save guide probe data from each downloaded image in the shared ProbeStore.
+2026-10-19 JParejko Draw plate and probe annotations as one batch using AnnotationLayer,
+                    which reuses canvas items instead of deleting and recreating them.
+2026-10-19 JParejko Limit image history by the "Guide History Length" and "Guide History Size" preferences
+                    (number of images and disk space) and added a thumbnail strip for navigating history.
+2026-10-19 JParejko Bug fix: the progressive display preview was replaced before it was drawn.
+                    The full resolution image is now shown from an idle callback
+                    (not using update_idletasks; see 2012-07-10).
 """
 import atexit
 import os
@@ -257,12 +267,16 @@ import RO.Wdg.GrayImageDispWdg as GImDisp
 import TUI.Base.Wdg
 import TUI.Models
 import TUI.TUIMenu.DownloadsWindow
+import AnnotationLayer
 import CmdInfo
 import CorrWdg
 import FocusPlotWindow
 import GuideImage
 import GuideStateWdg
+import ImagePreview
 import MangaDitherWdg
+import ProbeStore
+import ThumbnailWdg
 
 _HelpPrefix = "Instruments/Guiding/index.html#"
 
@@ -273,8 +287,7 @@ _GuideTag = "guide"
 _SelTag = "showSelection"
 _DragRectTag = "centroidDrag"
 _BoreTag = "boresight"
-_ErrTag = "poserr"
-_ProbeNumTag = "probeNum"
+_AnnLayerTag = "plateAnnotations"
 
 _SelRad = 18
 _SelHoleRad = 9
@@ -284,6 +297,7 @@ _GuideHoleRad = 9
 _GuidePredPosRad = 9
 
 _HistLen = 100
+_HistMB = 500
 
 _DebugMem = False # print a message when a file is deleted from disk?
 _DebugWdgEnable = False # print messages that help debug widget enable?
@@ -345,6 +359,7 @@ class GuideWdg(Tkinter.Frame):
         self.currCmdInfoList = []
         self.focusPlotTL = None
         self.plateViewAssembler = assembleImage.AssembleImage(relSize=0.5)
+        self.probeStore = ProbeStore.getProbeStore()
         
         self.ftpSaveToPref = self.tuiModel.prefs.getPrefVar("Save To")
         downloadTL = self.tuiModel.tlSet.getToplevel(TUI.TUIMenu.DownloadsWindow.WindowName)
@@ -377,7 +392,26 @@ class GuideWdg(Tkinter.Frame):
             getColorPref("Masked Pixel Color", "green", isMask = True),
         )
         
-        self.nToSave = _HistLen # eventually allow user to set?
+        self.progressivePref = self.tuiModel.prefs.getPrefVar("Progressive Guide Display", None)
+        if self.progressivePref == None:
+            self.progressivePref = RO.Prefs.PrefVar.BoolPrefVar(
+                name = "Progressive Guide Display",
+                defValue = True,
+            )
+        self._fullResAfterID = None # ID of pending after_idle call to _showFullRes, or None
+
+        self.histLenPref = self.tuiModel.prefs.getPrefVar("Guide History Length", None)
+        if self.histLenPref == None:
+            self.histLenPref = RO.Prefs.PrefVar.IntPrefVar(
+                name = "Guide History Length",
+                defValue = _HistLen,
+            )
+        self.histSizePref = self.tuiModel.prefs.getPrefVar("Guide History Size", None)
+        if self.histSizePref == None:
+            self.histSizePref = RO.Prefs.PrefVar.IntPrefVar(
+                name = "Guide History Size",
+                defValue = _HistMB,
+            )
         self.imObjDict = RO.Alg.ReverseOrderedDict()
         self._memDebugDict = {}
         self.dispImObj = None # object data for most recently taken image, or None
@@ -458,6 +492,14 @@ class GuideWdg(Tkinter.Frame):
         histFrame.grid(row=row, column=0, columnspan=totCols, sticky="ew")
         row += 1
         
+        self.thumbnailWdg = ThumbnailWdg.ThumbnailWdg(
+            master = self,
+            callFunc = self.doShowHistIm,
+            helpURL = helpURL,
+        )
+        self.thumbnailWdg.grid(row=row, column=0, columnspan=totCols, sticky="ew")
+        row += 1
+        
         maskInfo = (
             GImDisp.MaskInfo(
                 bitInd = 0,
@@ -503,6 +545,7 @@ class GuideWdg(Tkinter.Frame):
         self.grid_columnconfigure(totCols - 1, weight=1)
         row += 1
         
+        self.annLayer = AnnotationLayer.AnnotationLayer(self.gim, _AnnLayerTag)
         self.defCnvCursor = self.gim.cnv["cursor"]
         
         helpURL = _HelpPrefix + "ImageAndStarData"
@@ -1301,6 +1344,14 @@ class GuideWdg(Tkinter.Frame):
             return
         
         self.showImage(self.imObjDict[prevImName])
+    
+    def doShowHistIm(self, imObj):
+        """Show an image chosen from the thumbnail strip"""
+        self.showCurrWdg.setBool(False)
+        if imObj.imageName not in self.imObjDict:
+            self.statusBar.setMsg("Image no longer in history", severity = RO.Constants.sevWarning)
+            return
+        self.showImage(imObj)
             
     def doSelect(self, evt):
         """Select a star based on a mouse click
@@ -1459,6 +1510,7 @@ class GuideWdg(Tkinter.Frame):
         
         self.prevImWdg.setState(enablePrev, prevGap)
         self.nextImWdg.setState(enableNext, nextGap)
+        self.thumbnailWdg.setHistory([self.imObjDict[imName] for imName in revHist], self.dispImObj)
     
     def fetchCallback(self, imObj):
         """Called when an image is finished downloading.
@@ -1474,6 +1526,10 @@ class GuideWdg(Tkinter.Frame):
         if not imObj.isDone:
             return
         
+        # save probe data for trend plots and analysis
+        if imObj.state == imObj.Downloaded:
+            self.probeStore.addImage(imObj)
+        
         if self.currDownload and self.currDownload.isDone:
             # start downloading next image, if any
             if self.nextDownload:
@@ -1648,14 +1704,55 @@ class GuideWdg(Tkinter.Frame):
             self.gim.showMsg(imObj.getStateStr(), sev)
             imArr = None
         
-        # display new data
-        self.gim.showArr(imArr, mask = mask)
+        # display new data; if the image is large and a different shape than the one displayed,
+        # show a quick preview now and the full resolution image once the preview is visible
+        self._cancelFullRes()
+        self.annLayer.clear(doRedraw=False)
+        binFac = 1
+        if imArr is not None and self.progressivePref.getValue() \
+            and (self.gim.dataArr is None or self.gim.dataArr.shape != imArr.shape):
+            binFac = ImagePreview.getBinFac(imArr.shape)
+        if binFac > 1:
+            self.gim.showArr(
+                ImagePreview.blockAverage(imArr, binFac),
+                mask = ImagePreview.blockOr(mask, binFac),
+            )
+        else:
+            self.gim.showArr(imArr, mask = mask)
         self.dispImObj = imObj
         self.imNameWdg.set(imObj.imageName)
         self.imNameWdg.xview("end")
         
         self.enableHistButtons()
         
+        if binFac > 1:
+            # an idle callback registered now runs after the idle handler that draws the preview
+            # (a short timer may already be due when control returns to the event loop,
+            # and Tk services due timers before idle handlers)
+            self._fullResAfterID = self.after_idle(
+                self._showFullRes, imArr, mask, plateInfo, isPlateView, havePlateInfo)
+        else:
+            self._addImageAnnotations(imArr, plateInfo, isPlateView, havePlateInfo)
+
+        if errSevMsgList:
+            errSevMsgList.sort()
+            severity, errMsg = errSevMsgList[-1] 
+            self.statusBar.setMsg(errMsg, severity=severity, isTemp=True)
+        else:
+            self.statusBar.clearTempMsg()
+
+    def _addImageAnnotations(self, imArr, plateInfo, isPlateView, havePlateInfo):
+        """Display plate or probe annotations on the displayed image.
+        
+        All annotations are computed and displayed as one batch by self.annLayer.
+        
+        Inputs:
+        - imArr: displayed image array (at full resolution)
+        - plateInfo: plate view information (None if unavailable)
+        - isPlateView: True if imArr is the plate view
+        - havePlateInfo: True if plateInfo is available
+        """
+        annBatch = AnnotationLayer.AnnotationBatch()
         if isPlateView:
             # add plate annotations
             for stampInfo in plateInfo.stampList:
@@ -1667,27 +1764,20 @@ class GuideWdg(Tkinter.Frame):
                         if pointingErr[0] >= 0:
                             doPutProbeLabelOnRight = False
                         pointingErrRTheta = RO.MathUtil.rThetaFromXY(pointingErr * (1, -1))
-                        annRadius = pointingErrRTheta[0] * ErrPixPerArcSec
-        #                print "add annotation at %s of radius %0.1f" % (stampInfo.decImCtrPos, annRadius)
-                        self.gim.addAnnotation(
-                            GImDisp.ann_Line,
+                        annBatch.addLine(
                             imPos = stampInfo.decImCtrPos,
-                            isImSize = False,
-                            rad = annRadius,
+                            rad = pointingErrRTheta[0] * ErrPixPerArcSec,
                             angle = pointingErrRTheta[1],
-                            tags = _ErrTag,
                             fill = "green",
                         )
                         
                         # show uncertainty of position error? how? Also the info isn't available yet.
                 else:
                     # put an X through the image
-                    self.gim.addAnnotation(
-                        GImDisp.ann_X,
+                    annBatch.addX(
                         imPos = stampInfo.decImCtrPos,
-                        isImSize = True,
                         rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
-                        tags = _ErrTag,
+                        isImSize = True,
                         fill = "red",
                     )
 
@@ -1700,16 +1790,10 @@ class GuideWdg(Tkinter.Frame):
                 else:
                     anchor = "e"
                     textPos = stampInfo.decImCtrPos - (boxWidth + 1, 0)
-#                 print "num=%s; startPos=%s; ctrPos=%s; boxWidth=%s; textPos=%s" % \
-#                     (stampInfo.gpNumber, stampInfo.decImStartPos, stampInfo.decImCtrPos, boxWidth, textPos)
-                self.gim.addAnnotation(
-                    GImDisp.ann_Text,
+                annBatch.addText(
                     imPos = textPos,
                     text = probeName,
-                    rad = 10,
                     anchor = anchor,
-                    isImSize = False,
-                    tags = _ProbeNumTag,
                     fill = "green",
                 )
                 
@@ -1718,120 +1802,91 @@ class GuideWdg(Tkinter.Frame):
             axisMargin = 20
             boxSize = axisLength + axisMargin
             axisImPos = self.gim.imPosFromArrIJ(numpy.array(imArr.shape) - 1)
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
+            annBatch.addLine(
                 imPos = axisImPos,
                 cnvOffset = (-boxSize, boxSize),
                 rad = axisLength,
                 angle = 0,
-                isImSize = False,
-                tags = _ProbeNumTag,
                 fill = "green",
                 arrow = "last",
             )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
+            annBatch.addText(
                 text = "E",
                 imPos = axisImPos,
                 cnvOffset = (3-axisMargin, boxSize),
-                rad = 10,
                 anchor = "w",
-                isImSize = False,
-                tags = _ProbeNumTag,
                 fill = "green",
             )
-
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
+            annBatch.addLine(
                 imPos = axisImPos,
                 cnvOffset = (-boxSize, boxSize),
                 rad = axisLength,
                 angle = -90,
-                isImSize = False,
-                tags = _ProbeNumTag,
                 fill = "green",
                 arrow = "last",
             )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
+            annBatch.addText(
                 text = "N",
                 imPos = axisImPos,
                 cnvOffset = (-boxSize, axisMargin),
-                rad = 10,
                 anchor = "s",
-                isImSize = False,
-                tags = _ProbeNumTag,
                 fill = "green",
             )
 
             # add scale
-            scaleCnvOffset = numpy.array((10, 20))
-            scaleLength = ErrPixPerArcSec
+            scaleCnvOffset = (10, 20)
             scaleImPos = self.gim.imPosFromCnvPos((0, 0))
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
+            annBatch.addLine(
                 imPos = scaleImPos,
                 cnvOffset = scaleCnvOffset,
-                rad = scaleLength,
+                rad = ErrPixPerArcSec,
                 angle = 0,
-                isImSize = False,
-                tags = _ErrTag,
                 fill = "green",
             )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
+            annBatch.addText(
                 text = "1 arcsec",
                 imPos = scaleImPos,
                 cnvOffset = scaleCnvOffset,
                 anchor = "sw",
-                rad = 10,
-                isImSize = False,
-                tags = _ErrTag,
                 fill = "green",
             )
         elif havePlateInfo:
             # add probe names as annotation to the unassembled image
             for stampInfo in plateInfo.stampList:
-                doPutProbeLabelOnRight = True
                 if not stampInfo.gpEnabled:
                     # put an X through the image
-                    self.gim.addAnnotation(
-                        GImDisp.ann_X,
+                    annBatch.addX(
                         imPos = stampInfo.gpCtr,
-                        isImSize = True,
                         rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
-                        tags = _ErrTag,
+                        isImSize = True,
                         fill = "red",
                     )
 
                 # add text label showing guide probe number
                 probeName = makeGProbeName(stampInfo.gpNumber, stampInfo.gpBits)
                 boxWidth = stampInfo.image.shape[0] / 2.0
-                if doPutProbeLabelOnRight:
-                    anchor = "w"
-                    textPos = stampInfo.gpCtr + (boxWidth + 3, 0)
-                else:
-                    anchor = "e"
-                    textPos = stampInfo.gpCtr - (boxWidth + 1, 0)
-#                 print "num=%s; startPos=%s; ctrPos=%s; boxWidth=%s; textPos=%s" % \
-#                     (stampInfo.gpNumber, stampInfo.decImStartPos, stampInfo.decImCtrPos, boxWidth, textPos)
-                self.gim.addAnnotation(
-                    GImDisp.ann_Text,
-                    imPos = textPos,
+                annBatch.addText(
+                    imPos = stampInfo.gpCtr + (boxWidth + 3, 0),
                     text = probeName,
-                    rad = 10,
-                    anchor = anchor,
-                    isImSize = False,
-                    tags = _ProbeNumTag,
+                    anchor = "w",
                     fill = "green",
                 )
+        self.annLayer.setBatch(annBatch)
 
-        if errSevMsgList:
-            errSevMsgList.sort()
-            severity, errMsg = errSevMsgList[-1] 
-            self.statusBar.setMsg(errMsg, severity=severity, isTemp=True)
-        else:
-            self.statusBar.clearTempMsg()
+    def _cancelFullRes(self):
+        """Cancel a pending call to _showFullRes, if any"""
+        if self._fullResAfterID is not None:
+            self.after_cancel(self._fullResAfterID)
+            self._fullResAfterID = None
+
+    def _showFullRes(self, imArr, mask, plateInfo, isPlateView, havePlateInfo):
+        """Replace a preview with the full resolution image and add annotations.
+        
+        Called as an idle callback registered by showImage, so the preview is drawn first.
+        """
+        self._fullResAfterID = None
+        self.gim.showArr(imArr, mask = mask)
+        self._addImageAnnotations(imArr, plateInfo, isPlateView, havePlateInfo)
 
     def showSelection(self):
         """Display the current selection.
@@ -1927,26 +1982,44 @@ class GuideWdg(Tkinter.Frame):
         elif self.showCurrWdg.getBool():
             self.showImage(imObj)
         
-        # purge excess images
+        self._purgeHistory()
+        self.enableHistButtons()
+    
+    def _purgeHistory(self):
+        """Purge the oldest images from history to enforce the history length and size preferences
+        
+        The most recent images are kept, up to "Guide History Length" images
+        and "Guide History Size" MB of downloaded files. The displayed image is never purged.
+        """
         if self.dispImObj:
             dispImName = self.dispImObj.imageName
         else:
             dispImName = ()
+        maxNum = self.histLenPref.getValue()
+        maxBytes = self.histSizePref.getValue() * 1000000
+        numKept = 0
+        nBytesKept = 0
+        isFull = False # once full, purge all older images (except the displayed image)
         isNewest = True
-        if len(self.imObjDict) > self.nToSave:
-            keys = self.imObjDict.keys()
-            for imName in keys[self.nToSave:]:
-                if imName == dispImName:
-                    if not isNewest:
-                        self.imObjDict[imName].isInSequence = False
-                    continue
-                if _DebugMem:
-                    print "Purging %r from history" % (imName,)
-                purgeImObj = self.imObjDict.pop(imName)
-                purgeImObj.expire()
-                isNewest = False
-        self.enableHistButtons()
-    
+        for imName in self.imObjDict.keys():
+            imObj = self.imObjDict[imName]
+            nBytes = imObj.nBytes
+            if not isFull:
+                isFull = (numKept >= maxNum) or (numKept > 0 and nBytesKept + nBytes > maxBytes)
+            if imName == dispImName or not isFull:
+                if imName == dispImName and not isNewest:
+                    imObj.isInSequence = False
+                numKept += 1
+                nBytesKept += nBytes
+                continue
+            if _DebugMem:
+                print "Purging %r from history" % (imName,)
+            purgeImObj = self.imObjDict.pop(imName)
+            purgeImObj.expire()
+            self.thumbnailWdg.removeImage(imName)
+            isNewest = False
+        self.thumbnailWdg.setMemInfo(len(self.imObjDict), nBytesKept)
+
     def _guideStateCallback(self, keyVar):
         """Guide state callback
         """
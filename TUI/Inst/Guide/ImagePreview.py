@@ -0,0 +1,65 @@
+"""Make quick, reduced-resolution previews of guide images
+
+A preview is displayed while the full-resolution image is being prepared,
+so the user sees something right away even on a slow machine.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import numpy
+
+__all__ = ["MinPreviewPixels", "getBinFac", "blockAverage", "blockOr"]
+
+# images with fewer pixels than this are displayed at full resolution immediately
+MinPreviewPixels = 512 * 512
+
+# desired number of pixels along the long axis of a preview image
+_PreviewSize = 256
+
+def getBinFac(shape, previewSize=_PreviewSize):
+    """Return the bin factor to use for a preview of an image of the given shape
+
+    Inputs:
+    - shape: shape of full resolution image (i, j)
+    - previewSize: desired size of the long axis of the preview, in pixels
+
+    Returns 1 if the image is small enough that no preview is wanted.
+    """
+    if numpy.prod(shape) < MinPreviewPixels:
+        return 1
+    return max(1, int(max(shape) // previewSize))
+
+def blockAverage(arr, binFac):
+    """Return a block-averaged copy of a 2-d array as float32
+
+    Inputs:
+    - arr: 2-d array
+    - binFac: bin factor (an integer >= 1); rows and columns left over
+        after dividing the shape by binFac are ignored
+    """
+    arr = numpy.asarray(arr)
+    binFac = int(binFac)
+    if binFac <= 1:
+        return arr.astype(numpy.float32)
+    newShape = [int(size // binFac) for size in arr.shape]
+    trimArr = arr[0:newShape[0] * binFac, 0:newShape[1] * binFac]
+    blockArr = trimArr.reshape(newShape[0], binFac, newShape[1], binFac)
+    return blockArr.mean(axis=3, dtype=numpy.float32).mean(axis=1, dtype=numpy.float32)
+
+def blockOr(mask, binFac):
+    """Return a block-reduced copy of a 2-d bit mask, or-ing the bits within each block
+
+    Inputs:
+    - mask: 2-d integer array (or None, in which case None is returned)
+    - binFac: bin factor (an integer >= 1); see blockAverage
+    """
+    if mask is None:
+        return None
+    mask = numpy.asarray(mask)
+    binFac = int(binFac)
+    if binFac <= 1:
+        return mask
+    newShape = [int(size // binFac) for size in mask.shape]
+    trimMask = mask[0:newShape[0] * binFac, 0:newShape[1] * binFac]
+    blockMask = trimMask.reshape(newShape[0], binFac, newShape[1], binFac)
+    return numpy.bitwise_or.reduce(numpy.bitwise_or.reduce(blockMask, axis=3), axis=1)
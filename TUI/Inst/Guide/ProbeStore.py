@@ -0,0 +1,389 @@
+"""A columnar, in-memory store of guide probe data extracted from processed guider (gproc) files
+
+Each processed guider file contains a table of per-probe data (see FocusAnalysis.getProbeTable)
+with columns such as exists, enabled, focusOffset and fwhm. ProbeStore keeps these columns for every ingested file
+in numpy arrays of shape (number of frames, number of probes), indexed by time and frame number,
+so trend plots and analysis can look at a whole night without reopening the FITS files.
+A few per-frame header values (HeaderFieldDict) are kept as well, so that a frame's focus
+can be plotted and fit from the store alone (see FocusPlotWdg).
+
+The store can optionally be saved to and restored from a numpy .npz file.
+
+This module does not use Tkinter, so it may be used by command-line tools.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Bug fix: addImage did not close the FITS file.
+                    Read the probe table and check the file format using FocusAnalysis.
+2026-10-19 JParejko Also store the header values in HeaderFieldDict (plate scale and seeing);
+                    getFrame returns them along with the probe data.
+"""
+import calendar
+import os
+import re
+import time
+
+import numpy
+
+import FocusAnalysis
+
+__all__ = ["ProbeStore", "getProbeStore", "FloatFields", "BoolFields", "HeaderFieldDict"]
+
+# probe table fields saved by the store
+BoolFields = ("exists", "enabled")
+FloatFields = (
+    "focusOffset", "fwhm", "poserr",
+    "dx", "dy", "dRA", "dDec",
+    "xstar", "ystar", "xFocal", "yFocal",
+)
+AllFields = BoolFields + FloatFields
+
+# per-frame header values saved by the store: field name: FITS header keyword
+HeaderFieldDict = dict(
+    plateScale = "PLATSCAL",
+    seeing = "SEEING",
+)
+
+_InitialCapacity = 256
+
+_FrameNumRE = re.compile(r"(\d+)\.fits(?:\.gz)?$", re.IGNORECASE)
+
+def getFrameNum(imageName):
+    """Return the frame number from an image name such as proc-gimg-1310.fits, or -1 if not found
+    """
+    match = _FrameNumRE.search(imageName)
+    if not match:
+        return -1
+    return int(match.group(1))
+
+def getUnixTime(hdr):
+    """Return the time of an exposure as unix seconds, from the DATE-OBS header card
+
+    Returns nan if DATE-OBS is missing or cannot be parsed.
+    """
+    dateStr = hdr.get("DATE-OBS")
+    if not dateStr:
+        return numpy.nan
+    dateStr = dateStr.strip().rstrip("Z").replace("T", " ")
+    try:
+        if "." in dateStr:
+            dateStr, fracStr = dateStr.split(".", 1)
+            fracSec = float("0." + fracStr)
+        else:
+            fracSec = 0.0
+        return calendar.timegm(time.strptime(dateStr, "%Y-%m-%d %H:%M:%S")) + fracSec
+    except Exception:
+        return numpy.nan
+
+def readHeaderData(hdr):
+    """Return a dict of HeaderFieldDict field name: value (nan if missing or not a number) from a FITS header
+    """
+    dataDict = {}
+    for field, keyword in HeaderFieldDict.iteritems():
+        try:
+            dataDict[field] = float(hdr[keyword])
+        except Exception:
+            dataDict[field] = numpy.nan
+    return dataDict
+
+def readProbeData(fitsObj):
+    """Read the probe table of a gproc file
+
+    Inputs:
+    - fitsObj: pyfits object for a processed guider file
+
+    Returns a dict of field name: 1-d array of per-probe values (one entry per probe);
+    fields not found in the file are omitted.
+    Raises an exception if the probe table is missing or unreadable.
+    """
+    probeData = FocusAnalysis.getProbeTable(fitsObj)
+    colNames = set(probeData.names)
+    dataDict = {}
+    for field in AllFields:
+        if field in colNames:
+            dataDict[field] = numpy.array(probeData.field(field))
+    return dataDict
+
+
+class ProbeStore(object):
+    """Per-probe time series of guide probe table data
+
+    Inputs:
+    - filePath: path of .npz file for persistence; if None the store is memory only.
+        If the file exists, its data is loaded.
+
+    Data for each field is kept in an array of shape (capacity, number of probes);
+    rows are frames. Float fields use nan for missing data; bool fields use False.
+    Probe number n (1-based, as shown to the user) is column n - 1.
+    Data for each header field is kept in an array of shape (capacity,); nan if unknown.
+    """
+    def __init__(self, filePath=None):
+        self.filePath = filePath
+        self._nameIndDict = {} # image name: row index
+        self._clearArrays(numProbes = 0, capacity = _InitialCapacity)
+        if filePath and os.path.isfile(filePath):
+            self.load(filePath)
+
+    def _clearArrays(self, numProbes, capacity):
+        self._numFrames = 0
+        self._isSorted = True
+        self._timeArr = numpy.zeros(capacity, dtype=float)
+        self._frameNumArr = numpy.zeros(capacity, dtype=int)
+        self._nameList = []
+        self._fieldDict = {}
+        for field in AllFields:
+            self._fieldDict[field] = self._makeFieldArr(field, (capacity, numProbes))
+        self._headerDict = {}
+        for field in HeaderFieldDict:
+            self._headerDict[field] = numpy.empty(capacity, dtype=float) + numpy.nan
+
+    def _makeFieldArr(self, field, shape):
+        if field in BoolFields:
+            return numpy.zeros(shape, dtype=bool)
+        return numpy.empty(shape, dtype=numpy.float32) + numpy.nan
+
+    @property
+    def numProbes(self):
+        """Return the number of probe columns"""
+        return self._fieldDict[AllFields[0]].shape[1]
+
+    def __len__(self):
+        return self._numFrames
+
+    def __contains__(self, imageName):
+        return imageName in self._nameIndDict
+
+    def addImage(self, imObj):
+        """Add probe data from a downloaded GuideImage; return True if data was added
+
+        Images that are not gproc files, that lack a probe table or that are already
+        in the store are silently ignored.
+        """
+        if imObj.imageName in self._nameIndDict:
+            return False
+        fitsObj = imObj.getFITSObj()
+        if not fitsObj:
+            return False
+        try:
+            return self.addFITSObj(fitsObj, imObj.imageName)
+        finally:
+            fitsObj.close()
+
+    def addFITSObj(self, fitsObj, imageName):
+        """Add probe data from a pyfits object for a gproc file; return True if data was added
+
+        Inputs:
+        - fitsObj: pyfits object
+        - imageName: name of image (used to get the frame number and avoid duplicates)
+        """
+        if imageName in self._nameIndDict:
+            return False
+        try:
+            FocusAnalysis.checkGProcFormat(fitsObj)
+            hdr = fitsObj[0].header
+            dataDict = readProbeData(fitsObj)
+        except Exception:
+            return False
+        self.addFrame(
+            imageName = imageName,
+            frameNum = getFrameNum(imageName),
+            unixTime = getUnixTime(hdr),
+            dataDict = dataDict,
+            headerDict = readHeaderData(hdr),
+        )
+        return True
+
+    def addFrame(self, imageName, frameNum, unixTime, dataDict, headerDict=None):
+        """Add probe data for one frame
+
+        Inputs:
+        - imageName: name of image
+        - frameNum: frame number
+        - unixTime: time of exposure (unix seconds)
+        - dataDict: dict of field name: per-probe values; missing fields are left as nan or False
+        - headerDict: dict of HeaderFieldDict field name: value (see readHeaderData);
+            missing fields are left as nan
+        """
+        numProbes = max([len(val) for val in dataDict.itervalues()] + [0])
+        self._reserve(self._numFrames + 1, numProbes)
+        ind = self._numFrames
+        self._timeArr[ind] = unixTime
+        self._frameNumArr[ind] = frameNum
+        for field, valArr in dataDict.iteritems():
+            self._fieldDict[field][ind, 0:len(valArr)] = valArr
+        for field, val in (headerDict or {}).iteritems():
+            self._headerDict[field][ind] = val
+        if ind > 0 and unixTime < self._timeArr[ind - 1]:
+            self._isSorted = False
+        self._nameList.append(imageName)
+        self._nameIndDict[imageName] = ind
+        self._numFrames += 1
+
+    def _reserve(self, numFrames, numProbes):
+        """Make sure there is room for the specified number of frames and probes"""
+        capacity = len(self._timeArr)
+        if numFrames <= capacity and numProbes <= self.numProbes:
+            return
+        newCapacity = capacity
+        while newCapacity < numFrames:
+            newCapacity *= 2
+        newNumProbes = max(numProbes, self.numProbes)
+        n = self._numFrames
+        self._timeArr = numpy.resize(self._timeArr, newCapacity)
+        self._frameNumArr = numpy.resize(self._frameNumArr, newCapacity)
+        for field, oldArr in self._fieldDict.iteritems():
+            newArr = self._makeFieldArr(field, (newCapacity, newNumProbes))
+            newArr[0:n, 0:oldArr.shape[1]] = oldArr[0:n]
+            self._fieldDict[field] = newArr
+        for field, oldArr in self._headerDict.iteritems():
+            newArr = numpy.empty(newCapacity, dtype=float) + numpy.nan
+            newArr[0:n] = oldArr[0:n]
+            self._headerDict[field] = newArr
+
+    def _sort(self):
+        """Sort data by time (only if needed)"""
+        if self._isSorted:
+            return
+        n = self._numFrames
+        sortInd = numpy.argsort(self._timeArr[0:n], kind="mergesort")
+        self._timeArr[0:n] = self._timeArr[sortInd]
+        self._frameNumArr[0:n] = self._frameNumArr[sortInd]
+        for arr in self._fieldDict.values() + self._headerDict.values():
+            arr[0:n] = arr[sortInd]
+        self._nameList = [self._nameList[i] for i in sortInd]
+        self._nameIndDict = dict((name, i) for i, name in enumerate(self._nameList))
+        self._isSorted = True
+
+    def _getRowSlice(self, tMin, tMax):
+        """Return a slice of rows with tMin <= time <= tMax (None for no limit)"""
+        self._sort()
+        timeArr = self._timeArr[0:self._numFrames]
+        begInd = 0 if tMin is None else numpy.searchsorted(timeArr, tMin, side="left")
+        endInd = self._numFrames if tMax is None else numpy.searchsorted(timeArr, tMax, side="right")
+        return slice(begInd, endInd)
+
+    def getTimes(self, tMin=None, tMax=None):
+        """Return an array of exposure times (unix sec), sorted, for frames in the specified time range"""
+        return self._timeArr[self._getRowSlice(tMin, tMax)].copy()
+
+    def getFrameNums(self, tMin=None, tMax=None):
+        """Return an array of frame numbers, in time order, for frames in the specified time range"""
+        return self._frameNumArr[self._getRowSlice(tMin, tMax)].copy()
+
+    def getImageNames(self, tMin=None, tMax=None):
+        """Return a list of image names, in time order, for frames in the specified time range"""
+        return self._nameList[self._getRowSlice(tMin, tMax)]
+
+    def getField(self, field, probeNum=None, tMin=None, tMax=None):
+        """Return data for one field, in time order
+
+        Inputs:
+        - field: name of field; one of AllFields
+        - probeNum: probe number (1-based); if None then data for all probes is returned
+        - tMin, tMax: time range (unix sec); None for no limit
+
+        Returns an array of shape (num frames,) if probeNum specified, else (num frames, num probes).
+        """
+        rowSlice = self._getRowSlice(tMin, tMax)
+        arr = self._fieldDict[field]
+        if probeNum is None:
+            return arr[rowSlice].copy()
+        if not 1 <= probeNum <= self.numProbes:
+            raise RuntimeError("probeNum=%s not in range [1, %s]" % (probeNum, self.numProbes))
+        return arr[rowSlice, probeNum - 1].copy()
+
+    def getHeaderField(self, field, tMin=None, tMax=None):
+        """Return data for one header field (one of HeaderFieldDict), in time order, as an array of shape (num frames,)
+        """
+        return self._headerDict[field][self._getRowSlice(tMin, tMax)].copy()
+
+    def getIsGood(self, tMin=None, tMax=None):
+        """Return a bool array of shape (num frames, num probes) that is True where the probe
+        exists, is enabled and has a finite fwhm
+        """
+        rowSlice = self._getRowSlice(tMin, tMax)
+        return self._fieldDict["exists"][rowSlice] & self._fieldDict["enabled"][rowSlice] \
+            & numpy.isfinite(self._fieldDict["fwhm"][rowSlice])
+
+    def getFrame(self, frameNum=None, imageName=None):
+        """Return data for one frame as a dict, or None if not found
+
+        The dict contains field: per-probe array for each field in AllFields
+        and field: value for each field in HeaderFieldDict.
+        Specify frameNum or imageName.
+        """
+        self._sort()
+        if imageName is not None:
+            ind = self._nameIndDict.get(imageName)
+        else:
+            indArr = numpy.nonzero(self._frameNumArr[0:self._numFrames] == frameNum)[0]
+            ind = indArr[-1] if len(indArr) > 0 else None
+        if ind is None:
+            return None
+        frameDict = dict((field, arr[ind].copy()) for field, arr in self._fieldDict.iteritems())
+        for field, arr in self._headerDict.iteritems():
+            frameDict[field] = float(arr[ind])
+        return frameDict
+
+    def clear(self):
+        """Remove all data"""
+        self._nameIndDict = {}
+        self._clearArrays(numProbes = 0, capacity = _InitialCapacity)
+
+    def save(self, filePath=None):
+        """Save the data to a numpy .npz file
+
+        Inputs:
+        - filePath: path of file; if None then self.filePath is used
+        """
+        filePath = filePath or self.filePath
+        if not filePath:
+            raise RuntimeError("No file path specified")
+        self._sort()
+        n = self._numFrames
+        arrDict = dict((field, arr[0:n]) for field, arr in self._fieldDict.iteritems())
+        for field, arr in self._headerDict.iteritems():
+            arrDict["header_" + field] = arr[0:n]
+        numpy.savez(filePath,
+            time = self._timeArr[0:n],
+            frameNum = self._frameNumArr[0:n],
+            imageName = numpy.array(self._nameList, dtype=str),
+        **arrDict)
+
+    def load(self, filePath):
+        """Replace the current data with data from a numpy .npz file written by save
+        """
+        npzFile = numpy.load(filePath)
+        try:
+            timeArr = npzFile["time"]
+            n = len(timeArr)
+            numProbes = max([npzFile[field].shape[1] for field in AllFields if field in npzFile.files] + [0])
+            self._clearArrays(numProbes = numProbes, capacity = max(n, _InitialCapacity))
+            self._timeArr[0:n] = timeArr
+            self._frameNumArr[0:n] = npzFile["frameNum"]
+            for field in AllFields:
+                if field in npzFile.files:
+                    fieldArr = npzFile[field]
+                    self._fieldDict[field][0:n, 0:fieldArr.shape[1]] = fieldArr
+            for field in HeaderFieldDict:
+                # files written before header fields were saved lack these
+                if "header_" + field in npzFile.files:
+                    self._headerDict[field][0:n] = npzFile["header_" + field]
+            self._nameList = [str(name) for name in npzFile["imageName"]]
+        finally:
+            npzFile.close()
+        self._numFrames = n
+        self._nameIndDict = dict((name, i) for i, name in enumerate(self._nameList))
+        self._isSorted = False
+        self._sort()
+
+
+_ProbeStore = None
+
+def getProbeStore():
+    """Return the probe store shared by the guide widgets, creating it if necessary
+    """
+    global _ProbeStore
+    if _ProbeStore is None:
+        _ProbeStore = ProbeStore()
+    return _ProbeStore
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""A strip of guide image thumbnails for navigating the guide image history
+
+Thumbnails are made from the downloaded image files in a background thread
+and cached (by image name) until removeImage is called.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import Tkinter
+
+import numpy
+import pyfits
+from PIL import Image, ImageTk
+from opscore.actor import ScriptRunner
+
+import RO.Alg
+import RO.Wdg
+import ImagePreview
+
+__all__ = ["ThumbnailWdg", "makeThumbnailArr"]
+
+def makeThumbnailArr(filePath, thumbSize):
+    """Return a thumbnail of plane 0 of a FITS file as a uint8 array, or None if the file cannot be read
+
+    The image is block-averaged so its long axis is approximately thumbSize pixels,
+    stretched between the 0.5 and 99.5 percentiles and flipped so that row 0 is at the top.
+
+    Safe to call from a background thread (it does not use Tkinter).
+    """
+    try:
+        fitsObj = pyfits.open(filePath)
+        try:
+            dataArr = fitsObj[0].data
+            if dataArr is None or len(dataArr.shape) != 2:
+                return None
+            binFac = max(1, max(dataArr.shape) // int(thumbSize))
+            thumbArr = ImagePreview.blockAverage(dataArr, binFac)[::-1]
+        finally:
+            fitsObj.close()
+    except Exception:
+        return None
+    sortedArr = numpy.sort(thumbArr, axis=None)
+    numVals = len(sortedArr)
+    minVal = sortedArr[int(numVals * 0.005)]
+    maxVal = sortedArr[min(int(numVals * 0.995), numVals - 1)]
+    scale = 255.0 / max(maxVal - minVal, 1.0e-6)
+    return numpy.clip((thumbArr - minVal) * scale, 0, 255).astype(numpy.uint8)
+
+
+class ThumbnailWdg(Tkinter.Frame):
+    """A row of thumbnails of guide images
+
+    Inputs:
+    - master: master widget
+    - callFunc: function to call when the user clicks a thumbnail; receives one argument: the image object
+    - numThumbs: number of thumbnails to show
+    - thumbSize: approximate size of the long axis of each thumbnail (pixels)
+    - helpURL: URL of help
+    **kargs: keyword arguments for Tkinter.Frame
+    """
+    def __init__(self,
+        master,
+        callFunc,
+        numThumbs = 10,
+        thumbSize = 48,
+        helpURL = None,
+    **kargs):
+        Tkinter.Frame.__init__(self, master, **kargs)
+        self.callFunc = callFunc
+        self.numThumbs = int(numThumbs)
+        self.thumbSize = int(thumbSize)
+        self.thumbDict = {} # dict of image name: (PhotoImage, number of bytes)
+        self.pendingList = [] # image objects awaiting thumbnails
+        self.shownImObjList = [] # image objects displayed, in order displayed
+        self.dispImObj = None
+
+        self.blankImage = Tkinter.PhotoImage(width=self.thumbSize, height=self.thumbSize)
+        self.thumbWdgList = []
+        for ind in range(self.numThumbs):
+            thumbWdg = RO.Wdg.Label(
+                master = self,
+                image = self.blankImage,
+                borderwidth = 2,
+                relief = "flat",
+                helpURL = helpURL,
+            )
+            thumbWdg.bind("<ButtonRelease-1>", RO.Alg.GenericCallback(self._doClick, ind))
+            thumbWdg.pack(side="right")
+            self.thumbWdgList.append(thumbWdg)
+
+        self.memWdg = RO.Wdg.StrLabel(
+            master = self,
+            helpText = "Number of guide images in history and disk space they use",
+            helpURL = helpURL,
+        )
+        self.memWdg.pack(side="left")
+
+        self.thumbSR = ScriptRunner(
+            runFunc = self._makeThumbnails,
+            name = "makeGuideThumbnails",
+        )
+
+    @property
+    def nBytes(self):
+        """Return the number of bytes used by cached thumbnails (approximately)"""
+        return sum(thumbInfo[1] for thumbInfo in self.thumbDict.itervalues())
+
+    def removeImage(self, imageName):
+        """Forget the thumbnail (if any) for the specified image
+        """
+        self.thumbDict.pop(imageName, None)
+
+    def setHistory(self, revHist, dispImObj):
+        """Show thumbnails for a section of the image history
+
+        Inputs:
+        - revHist: list of image objects, most recent first
+        - dispImObj: displayed image object (or None); it is highlighted
+            and the shown section of history is chosen to include it
+        """
+        self.dispImObj = dispImObj
+        currInd = 0
+        if dispImObj:
+            for ind, imObj in enumerate(revHist):
+                if imObj.imageName == dispImObj.imageName:
+                    currInd = ind
+                    break
+        begInd = max(0, min(currInd - (self.numThumbs // 2), len(revHist) - self.numThumbs))
+        self.shownImObjList = revHist[begInd:begInd + self.numThumbs]
+        self._redisplay()
+
+        # queue thumbnails that are wanted but not available
+        for imObj in self.shownImObjList:
+            if imObj.state == imObj.Downloaded and imObj.imageName not in self.thumbDict \
+                and imObj not in self.pendingList:
+                self.pendingList.append(imObj)
+        if self.pendingList and not self.thumbSR.isExecuting:
+            self.thumbSR.start()
+
+    def setMemInfo(self, numImages, nBytes):
+        """Display the number of images in history and the number of bytes they use
+        """
+        self.memWdg.set("%d images; %0.1f MB" % (numImages, nBytes / 1.0e6))
+
+    def _doClick(self, ind, evt=None):
+        if ind < len(self.shownImObjList):
+            self.callFunc(self.shownImObjList[ind])
+
+    def _makeThumbnails(self, sr):
+        """Make thumbnails for images in self.pendingList (a ScriptRunner run function)
+        """
+        while self.pendingList:
+            imObj = self.pendingList.pop(0)
+            if imObj.state != imObj.Downloaded or imObj not in self.shownImObjList:
+                continue
+            yield sr.waitThread(makeThumbnailArr, imObj.localPath, self.thumbSize)
+            thumbArr = sr.value
+            if thumbArr is None or imObj not in self.shownImObjList:
+                continue
+            photoImage = ImageTk.PhotoImage(Image.fromarray(thumbArr))
+            self.thumbDict[imObj.imageName] = (photoImage, thumbArr.nbytes * 4)
+            self._redisplay()
+
+    def _redisplay(self):
+        """Redisplay thumbnails"""
+        for ind, thumbWdg in enumerate(self.thumbWdgList):
+            if ind < len(self.shownImObjList):
+                imObj = self.shownImObjList[ind]
+                thumbInfo = self.thumbDict.get(imObj.imageName)
+                if thumbInfo:
+                    thumbWdg["image"] = thumbInfo[0]
+                else:
+                    thumbWdg["image"] = self.blankImage
+                isDisp = self.dispImObj is not None and imObj.imageName == self.dispImObj.imageName
+                thumbWdg["relief"] = "sunken" if isDisp else "raised"
+                thumbWdg.helpText = "%s; click to display" % (imObj.imageName,)
+            else:
+                thumbWdg["image"] = self.blankImage
+                thumbWdg["relief"] = "flat"
+                thumbWdg.helpText = None
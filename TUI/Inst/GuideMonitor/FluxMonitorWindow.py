@@ -4,10 +4,12 @@
 History:
 2012-04-23 Elena Malanushenko, converted from a script to a window by Russell Owen
 2012-06-04 ROwen    Fix clear button.
+2026-10-19 JParejko Backfill from TUI.Base.KeyVarRecorder's recorded probe flux/sec.
 """
 import Tkinter
 import matplotlib
 import RO.Wdg
+import TUI.Base.KeyVarRecorder
 import TUI.Base.StripChartWdg
 import TUI.Models
 
@@ -71,6 +73,7 @@ class FluxMonitorWdg(Tkinter.Frame):
             keyVar = self.guiderModel.probe,
             keyInd = 7,
             func = fluxFun,
+            historyName = TUI.Base.KeyVarRecorder.ProbeFluxName,
             color = "green",
         )
         self.stripChartWdg.showY(0.0, 1.0, subplotInd=0)
@@ -64,6 +64,7 @@ This is the main routine that calls everything else.
                     Modified to only show the version name, not version date, in the log at startup.
 2013-09-04 ROwen    Use application name instead of TUI in several places.
 2014-02-12 ROwen    Added a call to reopen script windows.
+2026-10-19 JParejko Start TUI.Base.KeyVarRecorder, so monitor windows can show data from before they were opened.
 """
 import os
 import sys
@@ -79,8 +80,10 @@ matplotlib.rc("axes", titlesize="medium") # default is large, which is too big
 matplotlib.rc("legend", fontsize="medium") # default is large, which is too big
 
 import RO.Comm.Generic
+import RO.Constants
 RO.Comm.Generic.setFramework("tk")
 
+import TUI.Base.KeyVarRecorder
 import TUI.Base.ScriptLoader
 import TUI.BackgroundTasks
 import TUI.LoadStdModules
@@ -112,6 +115,12 @@ def runTUI():
     # set up background tasks
     backgroundHandler = TUI.BackgroundTasks.BackgroundKwds()
 
+    # record keyword data for strip charts
+    try:
+        TUI.Base.KeyVarRecorder.startRecorder()
+    except Exception, e:
+        tuiModel.logMsg("Could not start recording keyword data: %s" % (e,), severity=RO.Constants.sevWarning)
+
     # get locations to look for windows
     addPathList = TUI.TUIPaths.getAddPaths()
     
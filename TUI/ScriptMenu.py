@@ -26,24 +26,148 @@ History:
 2010-03-12 ROwen    Changed to use Models.getModel.
 2012-07-10 ROwen    Removed use of update_idletasks and an ugly Mac workaround that is no longer required.
 2014-02-12 ROwen    Moved some code to TUI.Base.ScriptLoader so other users could get to it more easily.
+2026-10-19 JParejko Directory contents are cached in a _ScriptDirCache keyed by directory mtime,
+                    so only directories whose mtime has changed are rescanned.
+                    Showing the root menu rebuilds it from the cache (without touching the disk)
+                    and refreshes the cache in a background thread, then updates the menu
+                    if anything changed.
+2026-10-19 JParejko Bug fix: _ScriptDirCache could miss a script added in the same second as a scan
+                    on filesystems with 1 second mtime resolution; it now rescans a directory
+                    whose mtime is within _MTimeResolution seconds of the last scan.
 """
 import os
+import threading
+import time
 import Tkinter
 import tkFileDialog
+from opscore.actor import ScriptRunner
 import RO.Alg
 import RO.TkUtil
 from TUI.Base.ScriptLoader import getScriptDirs, ScriptLoader
 
 __all__ = ["getScriptMenu"]
 
+# mtime resolution (sec) assumed by _ScriptDirCache; 1 second on HFS+ and many NFS mounts, plus a margin
+_MTimeResolution = 2.0
+
 def getScriptMenu(master):
     scriptDirs = getScriptDirs()
     
+    _DirCache.refresh(scriptDirs)
     rootNode = _RootNode(master=master, label="", pathList=scriptDirs)
     rootNode.checkMenu(recurse=True)
     
     return rootNode.menu
 
+
+class _ScriptDirCache(object):
+    """Contents of script directories, cached by directory modification time
+
+    A directory's mtime changes whenever an entry is added, removed or renamed,
+    which is all the Scripts menu cares about (it does not look inside the files).
+    Thus an unchanged directory costs one os.stat instead of os.listdir
+    plus os.path.isfile/isdir for every entry, which matters on network filesystems.
+    
+    Some filesystems (e.g. HFS+ and many NFS mounts) have 1 second mtime resolution,
+    so an entry added just after a scan may not change the mtime. Thus a directory
+    is rescanned if its mtime is within _MTimeResolution seconds of the time it was last scanned.
+
+    Does not use Tk, so refresh may safely be called from a background thread.
+    """
+    def __init__(self):
+        self._dirDict = {} # dict of dir path: (mtime, itemDict, subdirDict, scan time)
+        self._lock = threading.Lock()
+
+    def getDir(self, path):
+        """Return (itemDict, subdirDict) for one directory, scanning it if not cached
+
+        Inputs:
+        - path: path of directory
+
+        Returns:
+        - itemDict: dict of script name (file name without ".py"): full path
+        - subdirDict: dict of subdirectory name: full path
+        """
+        dirData = self._dirDict.get(path)
+        if dirData is None:
+            dirData = self._scanDir(path)[1]
+        return dirData[1:3]
+
+    def refresh(self, pathList):
+        """Rescan the directories in pathList and their subdirectories whose mtime has changed
+
+        Inputs:
+        - pathList: list of root script directories
+
+        Returns True if the contents of any directory changed.
+        Directories that are no longer reachable from pathList are dropped from the cache.
+        """
+        with self._lock:
+            didChange = False
+            seenPaths = set()
+            pendingPaths = list(pathList)
+            while pendingPaths:
+                path = pendingPaths.pop()
+                if path in seenPaths:
+                    continue
+                seenPaths.add(path)
+                didChangeDir, dirData = self._scanDir(path)
+                didChange = didChange or didChangeDir
+                pendingPaths += dirData[2].values()
+            for path in set(self._dirDict.keys()) - seenPaths:
+                del self._dirDict[path]
+            return didChange
+
+    def _scanDir(self, path):
+        """Scan one directory, unless the cached data is known to be current, and cache the results
+
+        The cached data is current if the mtime is unchanged and the directory was last scanned
+        at least _MTimeResolution seconds after that mtime.
+
+        Returns:
+        - didChange: True if the directory was scanned and its contents differ from the cached data
+        - dirData: (mtime, itemDict, subdirDict, scan time); mtime is None if the directory cannot be read
+        """
+        scanTime = time.time()
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        oldDirData = self._dirDict.get(path)
+        if oldDirData is not None and mtime is not None and oldDirData[0] == mtime \
+            and oldDirData[3] - mtime >= _MTimeResolution:
+            return False, oldDirData
+
+        itemDict = {}
+        subdirDict = {}
+        try:
+            baseNameList = os.listdir(path)
+        except OSError:
+            baseNameList = []
+            mtime = None
+        for baseName in baseNameList:
+            # reject files that would be invisible on unix
+            if baseName.startswith("."):
+                continue
+    
+            baseBody, baseExt = os.path.splitext(baseName)
+    
+            fullPath = os.path.normpath(os.path.join(path, baseName))
+            
+            if os.path.isfile(fullPath) and baseExt.lower() == ".py":
+                itemDict[baseBody] = fullPath
+            
+            elif os.path.isdir(fullPath) and baseExt.lower() != ".py":
+                subdirDict[baseName] = fullPath
+        
+        dirData = (mtime, itemDict, subdirDict, scanTime)
+        self._dirDict[path] = dirData
+        didChange = oldDirData is None or oldDirData[1:3] != (itemDict, subdirDict)
+        return didChange, dirData
+
+_DirCache = _ScriptDirCache()
+
+
 class _MenuNode:
     """Menu and related information about sub-menu of the Scripts menu
 
@@ -86,7 +210,7 @@ class _MenuNode:
         )
     
     def checkMenu(self, recurse=True):
-        """Check contents of menu and rebuild if anything has changed.
+        """Check contents of menu against _DirCache and rebuild if anything has changed.
         Return True if anything rebuilt.
         """
 #       print "%s checkMenu" % (self,)
@@ -95,25 +219,10 @@ class _MenuNode:
         didRebuild = False
         
         for path in self.pathList:
-            for baseName in os.listdir(path):
-                # reject files that would be invisible on unix
-                if baseName.startswith("."):
-                    continue
-        
-                baseBody, baseExt = os.path.splitext(baseName)
-        
-                fullPath = os.path.normpath(os.path.join(path, baseName))
-                
-                if os.path.isfile(fullPath) and baseExt.lower() == ".py":
-#                   print "checkMenu newItem[%r] = %r" % (baseBody, fullPath)
-                    newItemDict[baseBody] = fullPath
-                
-                elif os.path.isdir(fullPath) and baseExt.lower() != ".py":
-#                   print "checkMenu newSubDir[%r] = %r" % (baseBody, fullPath)
-                    newSubDict[baseName] = fullPath
-                
-#               else:
-#                   print "checkMenu ignoring %r = %r" % (baseName, fullPath)
+            itemDict, subdirDict = _DirCache.getDir(path)
+            newItemDict.update(itemDict)
+            for baseName in sorted(subdirDict.keys()):
+                newSubDict[baseName] = subdirDict[baseName]
         
         if (self.itemDict != newItemDict) or (self.subDict != newSubDict):
             didRebuild = True
@@ -183,6 +292,7 @@ class _RootNode(_MenuNode):
         - pathList: list of paths to scripts, as returned by TUI.Base.ScriptLoader.getScriptDirs()
         """
         self.master = master
+        self.refreshSR = None
         _MenuNode.__init__(self, None, label, pathList)
         self.isAqua = (RO.TkUtil.getWindowingSystem() == RO.TkUtil.WSysAqua)
         
@@ -190,8 +300,27 @@ class _RootNode(_MenuNode):
         self.menu = Tkinter.Menu(
             self.master,
             tearoff = False,
-            postcommand = self.checkMenu,
+            postcommand = self._postMenu,
+        )
+
+    def _postMenu(self):
+        """Update the menu from the cache and start refreshing the cache in the background
+        """
+        self.checkMenu(recurse=True)
+        if self.refreshSR and self.refreshSR.isExecuting:
+            return
+        self.refreshSR = ScriptRunner(
+            runFunc = self._refreshMenu,
+            name = "refreshScriptMenu",
         )
+        self.refreshSR.start()
+
+    def _refreshMenu(self, sr):
+        """Refresh _DirCache in a background thread, then update the menu (a ScriptRunner run function)
+        """
+        yield sr.waitThread(_DirCache.refresh, self.pathList)
+        if sr.value:
+            self.checkMenu(recurse=True)
     
     def _fillMenu(self):
         """Fill the menu.
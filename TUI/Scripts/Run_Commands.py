@@ -5,6 +5,18 @@ tcc show time
 
 Blank lines and lines beginning with # are ignored.
 
+The following tui commands are also supported:
+tui wait <timeSec>
+    wait for the specified time
+tui parallel [max=<maxCmds>] [timeout=<timeSec>]
+    start a block of commands that run concurrently; the block must end with tui join.
+    At most maxCmds commands run at once (default 8); commands that take longer than
+    timeSec (default: no limit) fail. Only actor commands are allowed in a block.
+    If a command fails no more commands in the block are started and, once the running commands
+    have finished, the script fails. The timing of each block is reported in the log window.
+tui join
+    end a parallel block: wait for all of its commands to finish
+
 To do:
 - Fix resizing
 - Support Run Selection and Run From Cursor
@@ -17,20 +29,130 @@ History:
 2006-03-10 ROwen
 2010-03-10 ROwen    Bug fix: Save As was not working (tkFileDialog.asksaveasfile returns a file, not a path).
 2013-03-25 EM       Added command "tui wait <timeSec>".
+2026-10-19 JParejko Added commands "tui parallel" and "tui join" to run blocks of commands concurrently.
+                    The commands are now all parsed before any are run, so syntax errors are reported at once.
 """
 import os
+import time
 import Tkinter
 import RO.Wdg
 import RO.CnvUtil
 import tkFileDialog
+import TUI.Models
 
 HelpURL = "Scripts/BuiltInScripts/RunCommands.html"
 
 CurrCmdTag = "currCmd"
 
+DefMaxParallelCmds = 8
+
+class _Command(object):
+    """A command for an actor"""
+    def __init__(self, lineNum, actor, cmdStr, timeLim=0):
+        self.lineNum = lineNum
+        self.actor = actor
+        self.cmdStr = cmdStr
+        self.timeLim = timeLim # time limit (sec); 0 for none
+
+    def __str__(self):
+        return "%s %s" % (self.actor, self.cmdStr)
+
+class _Wait(object):
+    """A tui wait command"""
+    def __init__(self, lineNum, waitSec):
+        self.lineNum = lineNum
+        self.waitSec = waitSec
+
+class _ParallelBlock(object):
+    """A block of commands to run concurrently (tui parallel ... tui join)"""
+    def __init__(self, lineNum, maxCmds=DefMaxParallelCmds, timeLim=0):
+        self.lineNum = lineNum
+        self.maxCmds = maxCmds
+        self.timeLim = timeLim # time limit for each command (sec); 0 for none
+        self.cmdList = []
+
+def parseCommands(textStr):
+    """Parse commands
+
+    Inputs:
+    - textStr: commands, one per line
+    
+    Returns a list of _Command, _Wait and _ParallelBlock objects.
+    Raises RuntimeError if a line cannot be parsed.
+    """
+    stepList = []
+    parBlock = None
+    for lineInd, line in enumerate(textStr.split("\n")):
+        lineNum = lineInd + 1
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        lineData = line.split(None, 1)
+        if len(lineData) != 2:
+            raise RuntimeError("Line %d: no command specified for actor %r" % (lineNum, line))
+        actor, cmdStr = lineData
+        if actor.lower() != "tui":
+            if parBlock:
+                parBlock.cmdList.append(_Command(lineNum, actor, cmdStr, timeLim=parBlock.timeLim))
+            else:
+                stepList.append(_Command(lineNum, actor, cmdStr))
+            continue
+
+        params = cmdStr.split()
+        tuiCmd = params[0].lower()
+        if tuiCmd == "wait":
+            if parBlock:
+                raise RuntimeError("Line %d: tui wait is not allowed in a parallel block" % (lineNum,))
+            if len(params) != 2:
+                raise RuntimeError("Line %d: tui wait requires one parameter: time (in sec)" % (lineNum,))
+            stepList.append(_Wait(lineNum, _parseFloat(params[1], lineNum)))
+
+        elif tuiCmd == "parallel":
+            if parBlock:
+                raise RuntimeError("Line %d: parallel blocks cannot be nested" % (lineNum,))
+            parBlock = _ParallelBlock(lineNum)
+            for param in params[1:]:
+                name, sep, valStr = param.partition("=")
+                name = name.lower()
+                if name == "max" and sep:
+                    parBlock.maxCmds = int(_parseFloat(valStr, lineNum))
+                    if parBlock.maxCmds < 1:
+                        raise RuntimeError("Line %d: max=%s must be at least 1" % (lineNum, valStr))
+                elif name == "timeout" and sep:
+                    parBlock.timeLim = _parseFloat(valStr, lineNum)
+                    if parBlock.timeLim <= 0:
+                        raise RuntimeError("Line %d: timeout=%s must be positive" % (lineNum, valStr))
+                else:
+                    raise RuntimeError("Line %d: unrecognized tui parallel parameter %r; use max=<n> or timeout=<sec>" % \
+                        (lineNum, param))
+
+        elif tuiCmd == "join":
+            if not parBlock:
+                raise RuntimeError("Line %d: tui join without tui parallel" % (lineNum,))
+            if len(params) != 1:
+                raise RuntimeError("Line %d: tui join has no parameters" % (lineNum,))
+            stepList.append(parBlock)
+            parBlock = None
+
+        else:
+            raise RuntimeError("Line %d: unrecognized tui command: %r" % (lineNum, cmdStr))
+
+    if parBlock:
+        raise RuntimeError("Line %d: tui parallel without tui join" % (parBlock.lineNum,))
+    return stepList
+
+def _parseFloat(valStr, lineNum):
+    """Parse a floating point value, raising RuntimeError on failure"""
+    try:
+        return float(valStr)
+    except ValueError:
+        raise RuntimeError("Line %d: %r is not a number" % (lineNum, valStr))
+
 class ScriptClass(object):
     def __init__(self, sr):
         self.filePath = None
+        self.tuiModel = TUI.Models.getModel("tui")
     
         # make window resizable
         sr.master.winfo_toplevel().wm_resizable(True, True)
@@ -165,38 +287,104 @@ class ScriptClass(object):
     def run(self, sr):
         self.textWdg.focus_get()
         textStr = self.getData()
-        textList = textStr.split("\n")
-        lineNum = 0
-        for line in textList:
-            lineNum += 1
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-        
-            ind = "%d.0" % lineNum
-            self.textWdg.tag_remove(CurrCmdTag, "0.0", "end")
-            self.textWdg.tag_add(CurrCmdTag, ind, ind + " lineend")
-            self.textWdg.see(ind)
-            sr.showMsg("Executing: %s" % (line,))
-            self.textWdg["state"] = "disabled"
-            actor, cmdStr = line.split(None, 1)
-            if actor.lower() != "tui":
+        try:
+            stepList = parseCommands(textStr)
+        except RuntimeError, e:
+            raise sr.ScriptError(str(e))
+
+        self.textWdg["state"] = "disabled"
+        for step in stepList:
+            self.showCurrLines([step.lineNum])
+            if isinstance(step, _Command):
+                sr.showMsg("Executing: %s" % (step,))
                 yield sr.waitCmd(
-                    actor = actor,
-                    cmdStr = cmdStr,
+                    actor = step.actor,
+                    cmdStr = step.cmdStr,
                 )
+            elif isinstance(step, _Wait):
+                sr.showMsg("Waiting %s sec" % (step.waitSec,))
+                yield sr.waitMS(step.waitSec * 1000)
             else:
-                params = cmdStr.split()
-                if len(params)==0:
-                    raise sr.ScriptError("No tui command specified")
-                
-                if params[0].lower() == "wait":
-                    if len(params) != 2:
-                        raise sr.ScriptError("tui wait requires one parameter: time (in sec)")
-                    waitSec = float(params[1])
-                    yield sr.waitMS(waitSec * 1000)
-                else: 
-                    raise sr.ScriptError("Unreconized tui command: %r" % (cmdStr,))                 
+                yield self.waitParallel(sr, step)
+
+    def waitParallel(self, sr, parBlock):
+        """Run the commands of a parallel block, waiting until all have finished.
+
+        Starts up to parBlock.maxCmds commands at once; as each command finishes the next is started.
+        If a command fails then no more commands are started, and once the running commands
+        are done the script fails (with the failed commands highlighted).
+        """
+        pendingList = list(parBlock.cmdList)
+        pendingList.reverse() # so pop returns the next command
+        runDict = {} # dict of cmdVar: (command, start time) for running commands
+        doneList = [] # list of (command, cmdVar, duration (sec)) for finished commands
+        begTime = time.time()
+
+        def cmdDone(cmdVar):
+            """Record a finished command, if not already recorded, and start more commands"""
+            cmd, startTime = runDict.pop(cmdVar, (None, None))
+            if cmd is None:
+                return
+            doneList.append((cmd, cmdVar, time.time() - startTime))
+            startCmds()
+
+        def startCmds():
+            """Start pending commands, up to the limit, unless a command has failed"""
+            while pendingList and len(runDict) < parBlock.maxCmds and sr.isExecuting \
+                and not self._getFailed(doneList):
+                cmd = pendingList.pop()
+                cmdVar = sr.startCmd(
+                    actor = cmd.actor,
+                    cmdStr = cmd.cmdStr,
+                    timeLim = cmd.timeLim,
+                    callFunc = cmdDone,
+                    checkFail = False,
+                )
+                runDict[cmdVar] = (cmd, time.time())
+                if cmdVar.isDone:
+                    # finished before it was recorded as running
+                    cmdDone(cmdVar)
+            if sr.isExecuting:
+                self.showCurrLines([cmd.lineNum for cmd, startTime in runDict.itervalues()])
+                sr.showMsg("Executing %d of %d commands in block at line %d" % \
+                    (len(runDict), len(parBlock.cmdList), parBlock.lineNum))
+
+        startCmds()
+        while runDict:
+            yield sr.waitCmdVars(runDict.keys(), checkFail=False)
+            for cmdVar in runDict.keys():
+                if cmdVar.isDone:
+                    cmdDone(cmdVar)
+
+        blockDuration = time.time() - begTime
+        failedList = self._getFailed(doneList)
+        if doneList:
+            slowCmd, slowCmdVar, slowDuration = max(doneList, key=lambda doneData: doneData[2])
+            summaryStr = "Block at line %d: %d of %d commands ran in %0.1f sec (%0.1f sec if run in sequence); " \
+                "slowest was line %d: %s (%0.1f sec)" % \
+                (parBlock.lineNum, len(doneList), len(parBlock.cmdList), blockDuration,
+                sum(doneData[2] for doneData in doneList), slowCmd.lineNum, slowCmd, slowDuration)
+            self.tuiModel.logMsg("Run_Commands: %s" % (summaryStr,))
+            sr.showMsg(summaryStr)
+
+        if failedList:
+            self.showCurrLines([cmd.lineNum for cmd in failedList])
+            raise sr.ScriptError("%d command(s) failed in block at line %d: %s" % \
+                (len(failedList), parBlock.lineNum, ", ".join("line %d" % (cmd.lineNum,) for cmd in failedList)))
+
+    def _getFailed(self, doneList):
+        """Return the failed commands from a list of (command, cmdVar, duration)"""
+        return [cmd for cmd, cmdVar, duration in doneList if cmdVar.didFail]
+
+    def showCurrLines(self, lineNumList):
+        """Highlight the specified lines (and only those lines) as executing
+        """
+        self.textWdg.tag_remove(CurrCmdTag, "0.0", "end")
+        for lineNum in sorted(lineNumList):
+            ind = "%d.0" % lineNum
+            self.textWdg.tag_add(CurrCmdTag, ind, ind + " lineend")
+        if lineNumList:
+            self.textWdg.see("%d.0" % (min(lineNumList),))
     
     def end(self, sr):
         if not sr.didFail:
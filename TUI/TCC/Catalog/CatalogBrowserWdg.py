@@ -0,0 +1,623 @@
+#!/usr/bin/env python
+"""Browse the objects in a catalog: find objects by name and sort them by position or observability.
+
+Catalogs may contain many thousands of objects, which is too many for menus or a Tk listbox.
+The browser uses a NameIndex to find objects by name prefix or substring, and displays them
+in a VirtualListWdg, which only creates canvas items for the rows that are visible.
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Bug fix: compute the ephemeris in a single process; forking worker processes
+                    from the running application is not safe.
+2026-10-19 JParejko Bug fix: VirtualListWdg created an orphan Entry widget (to find the font) for every browser.
+"""
+import bisect
+import re
+import time
+import Tkinter
+import tkFont
+import numpy
+from opscore.actor import ScriptRunner
+import RO.Alg
+import RO.Constants
+import RO.StringUtil
+import RO.Wdg
+import TUI.Models
+import TUI.TCC.CatalogEphem
+
+__all__ = ["NameIndex", "VirtualListWdg", "CatalogBrowser"]
+
+_HelpURL = "Telescope/SlewWin.html"
+
+_PlanHours = 12.0 # duration of observability planning (hours)
+
+_MatchContains = "Contains"
+_MatchStarts = "Starts With"
+
+class NameIndex(object):
+    """An index of names, for finding names that start with or contain a string (ignoring case)
+
+    Inputs:
+    - nameList: a list of names (strings; None is treated as "")
+    """
+    def __init__(self, nameList):
+        lowerList = [(name or "").lower().replace("\n", " ") for name in nameList]
+        self.numNames = len(lowerList)
+
+        # for prefix search: names in sorted order, and their indices in nameList
+        self.sortIndArr = numpy.array(sorted(range(self.numNames), key=lowerList.__getitem__), dtype=int)
+        self._sortedNameList = [lowerList[ind] for ind in self.sortIndArr]
+
+        # for substring search: all names joined by newlines, and the start of each name
+        self._joinedNames = "\n".join(lowerList)
+        nameLenArr = numpy.array([len(name) for name in lowerList], dtype=int)
+        self._begPosArr = numpy.concatenate(([0], numpy.cumsum(nameLenArr + 1)[:-1])).astype(int)
+
+    def findPrefix(self, prefix):
+        """Return the indices of names that start with prefix (ignoring case), as a sorted array
+        """
+        prefix = prefix.lower()
+        if not prefix:
+            return numpy.arange(self.numNames)
+        begInd = bisect.bisect_left(self._sortedNameList, prefix)
+        # the smallest string greater than every string that starts with prefix
+        endStr = prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 255))
+        endInd = bisect.bisect_left(self._sortedNameList, endStr, begInd)
+        return numpy.sort(self.sortIndArr[begInd:endInd])
+
+    def findSubstring(self, subStr):
+        """Return the indices of names that contain subStr (ignoring case), as a sorted array
+        """
+        subStr = subStr.lower()
+        if not subStr:
+            return numpy.arange(self.numNames)
+        if "\n" in subStr:
+            return numpy.zeros(0, dtype=int)
+        matchPosArr = numpy.array([match.start() for match in re.finditer(re.escape(subStr), self._joinedNames)],
+            dtype=int)
+        if len(matchPosArr) == 0:
+            return numpy.zeros(0, dtype=int)
+        return numpy.unique(numpy.searchsorted(self._begPosArr, matchPosArr, side="right") - 1)
+
+
+class VirtualListWdg(Tkinter.Frame):
+    """A scrolled, multi-column list of rows, only the visible rows of which are displayed
+
+    Inputs:
+    - master: master widget
+    - columnList: a list of (title, width in characters, justify) for each column,
+        where justify is "left" or "right"
+    - getRowFunc: a function that takes a row index and returns a sequence of strings, one per column;
+        only called for visible rows
+    - callFunc: a function called when a row is double-clicked (or Return is pressed);
+        receives one argument: the row index
+    - sortFunc: a function called when a column title is clicked;
+        receives one argument: the column index
+    - helpText: help text
+    - helpURL: URL of help
+    - height: number of rows to show initially
+
+    Creates one canvas text item per visible row and column, so the time to display
+    or scroll does not depend on the number of rows.
+    """
+    def __init__(self,
+        master,
+        columnList,
+        getRowFunc,
+        callFunc = None,
+        sortFunc = None,
+        helpText = None,
+        helpURL = None,
+        height = 20,
+    ):
+        Tkinter.Frame.__init__(self, master)
+        self.getRowFunc = getRowFunc
+        self.callFunc = callFunc
+        self.sortFunc = sortFunc
+        self.numRows = 0
+        self.topRow = 0
+        self.selRow = None
+        self._itemList = [] # list of lists of canvas text item IDs, one list per displayed row
+
+        # use the font of an entry widget; the entry is only needed to find that font
+        fontEntry = Tkinter.Entry(self)
+        self.font = tkFont.Font(font=fontEntry["font"])
+        fontEntry.destroy()
+        self.rowHeight = self.font.metrics("linespace") + 2
+        charWidth = self.font.measure("0")
+        self._colXJustList = []
+        xPos = 4
+        for title, width, justify in columnList:
+            colWidth = charWidth * width
+            if justify == "right":
+                self._colXJustList.append((xPos + colWidth, "ne"))
+            else:
+                self._colXJustList.append((xPos, "nw"))
+            xPos += colWidth + charWidth
+        totWidth = xPos
+
+        self.titleCnv = Tkinter.Canvas(
+            master = self,
+            width = totWidth,
+            height = self.rowHeight,
+            highlightthickness = 0,
+            selectborderwidth = 0,
+        )
+        self.titleCnv.grid(row=0, column=0, sticky="ew")
+        for colInd, (title, width, justify) in enumerate(columnList):
+            x, anchor = self._colXJustList[colInd]
+            self.titleCnv.create_text(x, 1,
+                anchor = anchor,
+                text = title,
+                font = self.font,
+                tag = ("title", "title%d" % (colInd,)),
+            )
+            self.titleCnv.tag_bind("title%d" % (colInd,), "<ButtonRelease-1>",
+                RO.Alg.GenericCallback(self._doSort, colInd))
+
+        self.cnv = Tkinter.Canvas(
+            master = self,
+            width = totWidth,
+            height = self.rowHeight * height,
+            background = "white",
+            highlightthickness = 1,
+            selectborderwidth = 0,
+            takefocus = True,
+        )
+        self.cnv.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = Tkinter.Scrollbar(
+            master = self,
+            orient = "vertical",
+            command = self.yview,
+        )
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        RO.Wdg.addCtxMenu(
+            wdg = self.cnv,
+            helpURL = helpURL,
+        )
+        self.helpText = helpText
+        self.cnv.helpText = helpText
+
+        self.cnv.bind("<Configure>", self._configureEvt)
+        self.cnv.bind("<ButtonPress-1>", self._selectEvt)
+        self.cnv.bind("<Double-Button-1>", self._doubleClickEvt)
+        self.cnv.bind("<Return>", self._returnEvt)
+        self.cnv.bind("<Up>", RO.Alg.GenericCallback(self._moveSelection, -1))
+        self.cnv.bind("<Down>", RO.Alg.GenericCallback(self._moveSelection, 1))
+        self.cnv.bind("<Prior>", RO.Alg.GenericCallback(self.yview, "scroll", -1, "pages"))
+        self.cnv.bind("<Next>", RO.Alg.GenericCallback(self.yview, "scroll", 1, "pages"))
+        self.cnv.bind("<MouseWheel>", self._mouseWheelEvt)
+        self.cnv.bind("<Button-4>", RO.Alg.GenericCallback(self.yview, "scroll", -3, "units"))
+        self.cnv.bind("<Button-5>", RO.Alg.GenericCallback(self.yview, "scroll", 3, "units"))
+
+    @property
+    def numVisibleRows(self):
+        """Number of rows that fit in the window (at least 1)"""
+        return max(1, self.cnv.winfo_height() // self.rowHeight)
+
+    def setNumRows(self, numRows, selRow=None):
+        """Set the number of rows and redisplay
+
+        Inputs:
+        - numRows: number of rows
+        - selRow: row to select (and scroll to), or None for no selection
+        """
+        self.numRows = int(numRows)
+        self.selRow = None
+        self._setTopRow(self.topRow)
+        self.select(selRow)
+
+    def select(self, rowInd):
+        """Select a row and scroll so it is visible; if None then clear the selection
+        """
+        if rowInd is not None:
+            if not 0 <= rowInd < self.numRows:
+                rowInd = None
+        self.selRow = rowInd
+        if rowInd is not None:
+            if rowInd < self.topRow:
+                self._setTopRow(rowInd)
+                return
+            elif rowInd >= self.topRow + self.numVisibleRows:
+                self._setTopRow(rowInd + 1 - self.numVisibleRows)
+                return
+        self.redraw()
+
+    def redraw(self):
+        """Redisplay the visible rows (e.g. if the data has changed)
+        """
+        numVisible = self.numVisibleRows
+        numDrawn = max(0, min(numVisible, self.numRows - self.topRow))
+
+        # create or delete canvas items so there is one set per visible row
+        while len(self._itemList) < numVisible:
+            y = 1 + (len(self._itemList) * self.rowHeight)
+            self._itemList.append([self.cnv.create_text(x, y, anchor=anchor, font=self.font)
+                for x, anchor in self._colXJustList])
+        while len(self._itemList) > numVisible:
+            for itemID in self._itemList.pop():
+                self.cnv.delete(itemID)
+
+        for dispInd, itemIDList in enumerate(self._itemList):
+            if dispInd < numDrawn:
+                strList = self.getRowFunc(self.topRow + dispInd)
+            else:
+                strList = ("",) * len(itemIDList)
+            for itemID, text in zip(itemIDList, strList):
+                self.cnv.itemconfigure(itemID, text=text)
+
+        self.cnv.delete("selection")
+        if self.selRow is not None and 0 <= self.selRow - self.topRow < numDrawn:
+            y = (self.selRow - self.topRow) * self.rowHeight
+            self.cnv.create_rectangle(0, y, self.cnv.winfo_width(), y + self.rowHeight,
+                fill = "light blue",
+                outline = "",
+                tag = "selection",
+            )
+            self.cnv.tag_lower("selection")
+
+        if self.numRows > 0:
+            self.scrollbar.set(
+                self.topRow / float(self.numRows),
+                min(1.0, (self.topRow + numVisible) / float(self.numRows)),
+            )
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        """Handle scrollbar commands: ("moveto", fraction) or ("scroll", number, "units" or "pages")
+        """
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._setTopRow(int(round(float(args[1]) * self.numRows)))
+        elif args[0] == "scroll":
+            num = int(args[1])
+            if args[2] == "pages":
+                num *= max(1, self.numVisibleRows - 1)
+            self._setTopRow(self.topRow + num)
+
+    def _configureEvt(self, evt=None):
+        self._setTopRow(self.topRow)
+
+    def _doSort(self, colInd, evt=None):
+        if self.sortFunc:
+            self.sortFunc(colInd)
+
+    def _doubleClickEvt(self, evt):
+        rowInd = self._rowFromY(evt.y)
+        if rowInd is not None and self.callFunc:
+            self.callFunc(rowInd)
+
+    def _mouseWheelEvt(self, evt):
+        if evt.delta > 0:
+            self.yview("scroll", -3, "units")
+        elif evt.delta < 0:
+            self.yview("scroll", 3, "units")
+
+    def _moveSelection(self, delta, evt=None):
+        if self.numRows < 1:
+            return
+        if self.selRow is None:
+            self.select(self.topRow)
+        else:
+            self.select(max(0, min(self.numRows - 1, self.selRow + delta)))
+
+    def _returnEvt(self, evt=None):
+        if self.selRow is not None and self.callFunc:
+            self.callFunc(self.selRow)
+
+    def _rowFromY(self, y):
+        """Return the row index at canvas y position y, or None if no row there"""
+        rowInd = self.topRow + (int(y) // self.rowHeight)
+        if 0 <= rowInd < self.numRows:
+            return rowInd
+        return None
+
+    def _selectEvt(self, evt):
+        self.cnv.focus_set()
+        self.select(self._rowFromY(evt.y))
+
+    def _setTopRow(self, topRow):
+        """Set the top displayed row, limiting it to the valid range, and redraw"""
+        maxTopRow = max(0, self.numRows - self.numVisibleRows)
+        self.topRow = max(0, min(int(topRow), maxTopRow))
+        self.redraw()
+
+
+class CatalogBrowser(Tkinter.Toplevel):
+    """A window that lists the objects in a catalog
+
+    Inputs:
+    - master: master widget
+    - catalog: a TUI.TCC.TelTarget.Catalog
+    - callFunc: a function that is called when an object is chosen (double-clicked);
+        it receives one argument: the selected TUI.TCC.TelTarget object
+
+    Objects may be found by name and sorted by any column (click the column title;
+    click again to reverse the order). Press "Plan" to compute observability
+    (airmass now, time observable tonight and set time) using TUI.TCC.CatalogEphem.
+    """
+    # (title, width, justify, sort key); sort key is "name", "pos1", "pos2", "csys" or an observability field
+    _ColumnInfo = (
+        ("Name", 20, "left", "name"),
+        ("Pos 1", 12, "right", "pos1"),
+        ("Pos 2", 12, "right", "pos2"),
+        ("CSys", 9, "left", "csys"),
+        ("Airmass", 7, "right", "airmass"),
+        ("Obs Hrs", 7, "right", "timeObservable"),
+        ("Sets", 5, "right", "setTime"),
+    )
+    def __init__(self, master, catalog, callFunc=None):
+        Tkinter.Toplevel.__init__(self, master)
+        self.catalog = catalog
+        self.callFunc = callFunc
+        self.title("Catalog %s" % (catalog.name,))
+        self.tccModel = TUI.Models.getModel("tcc")
+
+        self.objList = catalog.getObjList()
+        self.nameIndex = NameIndex([getattr(obj, "name", None) for obj in self.objList])
+        self.obsArr = None # observability data from CatalogEphem.getObservability, once computed
+        self._sortKey = "name"
+        self._sortReverse = False
+        self._sortIndArr = self.nameIndex.sortIndArr # object indices in sorted order
+        self._rowObjIndArr = self._sortIndArr # object indices of displayed rows
+        self._posDegArr = None # N x 2 array of object positions (deg); computed when first needed
+
+        ctrlFrame = Tkinter.Frame(self)
+        self.findWdg = RO.Wdg.StrEntry(
+            master = ctrlFrame,
+            width = 20,
+            callFunc = self._doFind,
+            helpText = "find objects whose name contains (or starts with) this text",
+            helpURL = _HelpURL,
+        )
+        self.findWdg.pack(side="left")
+        self.matchWdg = RO.Wdg.OptionMenu(
+            master = ctrlFrame,
+            items = (_MatchContains, _MatchStarts),
+            defValue = _MatchContains,
+            callFunc = self._doFind,
+            helpText = "how to match object names",
+            helpURL = _HelpURL,
+        )
+        self.matchWdg.pack(side="left")
+        self.planBtn = RO.Wdg.Button(
+            master = ctrlFrame,
+            text = "Plan",
+            command = self._doPlan,
+            helpText = "compute airmass and observability of each object for the next %0.0f hours" % (_PlanHours,),
+            helpURL = _HelpURL,
+        )
+        self.planBtn.pack(side="left")
+        ctrlFrame.grid(row=0, column=0, sticky="w")
+
+        self.listWdg = VirtualListWdg(
+            master = self,
+            columnList = [(title, width, justify) for title, width, justify, sortKey in self._ColumnInfo],
+            getRowFunc = self._getRow,
+            callFunc = self._doChoose,
+            sortFunc = self._doSort,
+            helpText = "catalog objects; double-click to choose; click a column title to sort",
+            helpURL = _HelpURL,
+        )
+        self.listWdg.grid(row=1, column=0, sticky="nsew")
+
+        self.statusBar = RO.Wdg.StatusBar(
+            master = self,
+            helpURL = _HelpURL,
+        )
+        self.statusBar.grid(row=2, column=0, sticky="ew")
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._planSR = ScriptRunner(
+            runFunc = self._planScript,
+            name = "planCatalog",
+        )
+        self.bind("<Destroy>", self._destroyEvt)
+        self._updateRows()
+
+    def _destroyEvt(self, evt=None):
+        if evt is None or evt.widget == self:
+            if self._planSR.isExecuting:
+                self._planSR.cancel()
+
+    def _doChoose(self, rowInd):
+        """Report the object in the specified row to callFunc"""
+        if self.callFunc:
+            self.callFunc(self.objList[self._rowObjIndArr[rowInd]])
+
+    def _doFind(self, wdg=None):
+        """Update the displayed objects to match the find string"""
+        self._updateRows()
+
+    def _doPlan(self):
+        """Compute observability data in the background"""
+        if not self._planSR.isExecuting:
+            self._planSR.start()
+
+    def _doSort(self, colInd):
+        """Sort by the specified column; if already sorted by that column, reverse the order"""
+        sortKey = self._ColumnInfo[colInd][3]
+        if sortKey == self._sortKey:
+            self._sortReverse = not self._sortReverse
+        else:
+            self._sortKey = sortKey
+            self._sortReverse = False
+        self._sortIndArr = self._computeSortInd()
+        self._updateRows()
+
+    def _computeSortInd(self):
+        """Return object indices sorted by the current sort key; objects with no value are last"""
+        if self._sortKey == "name":
+            sortIndArr = self.nameIndex.sortIndArr
+        elif self._sortKey == "csys":
+            csysList = [str(getattr(obj, "csysStr", "")) for obj in self.objList]
+            sortIndArr = numpy.array(sorted(range(len(csysList)), key=csysList.__getitem__), dtype=int)
+        else:
+            if self._sortKey in ("pos1", "pos2"):
+                valArr = self._getPosDegArr()[:, 0 if self._sortKey == "pos1" else 1]
+            elif self.obsArr is not None:
+                valArr = self.obsArr[self._sortKey]
+            else:
+                return self._sortIndArr
+            if self._sortReverse:
+                valArr = -valArr
+            # NaN sorts last
+            sortIndArr = numpy.argsort(valArr, kind="mergesort")
+            return sortIndArr
+        if self._sortReverse:
+            sortIndArr = sortIndArr[::-1]
+        return sortIndArr
+
+    def _getPosDegArr(self):
+        """Return the position (deg) of each object as an N x 2 array (NaN if unknown)"""
+        if self._posDegArr is None:
+            self._posDegArr = numpy.array([getattr(obj, "posDeg", None) or (numpy.nan, numpy.nan)
+                for obj in self.objList], dtype=float).reshape(-1, 2)
+        return self._posDegArr
+
+    def _getRow(self, rowInd):
+        """Return the strings to display for the specified row"""
+        objInd = self._rowObjIndArr[rowInd]
+        obj = self.objList[objInd]
+        posStr = getattr(obj, "posStr", None) or ("", "")
+        strList = [
+            str(getattr(obj, "name", "") or ""),
+            str(posStr[0]),
+            str(posStr[1]),
+            str(getattr(obj, "csysStr", "") or ""),
+        ]
+        if self.obsArr is not None:
+            obsData = self.obsArr[objInd]
+            strList += [
+                _fmtNum(obsData["airmass"], "%0.2f"),
+                _fmtNum(obsData["timeObservable"] / 3600.0, "%0.1f"),
+                _fmtTime(obsData["setTime"]),
+            ]
+        else:
+            strList += ["", "", ""]
+        return strList
+
+    def _planScript(self, sr):
+        """Compute observability data (a ScriptRunner run function)"""
+        ephem = TUI.TCC.CatalogEphem.getCatalogEphem(self.catalog)
+        begPySec = time.time()
+        endPySec = begPySec + (_PlanHours * 3600.0)
+        self.planBtn.setEnable(False)
+        try:
+            if not ephem.covers(begPySec, endPySec):
+                self.statusBar.setMsg("Computing positions of %d objects" % (len(self.objList),))
+                yield sr.waitThread(_updateEphem, ephem, begPySec, endPySec)
+                errMsg = sr.value
+                if errMsg:
+                    self.statusBar.setMsg("Could not compute positions: %s" % (errMsg,),
+                        severity = RO.Constants.sevError)
+                    return
+            axePos = self.tccModel.axePos.valueList[0:2]
+            fromAzAlt = None if None in axePos else axePos
+            azLim = self.tccModel.azLim.valueList[0:2]
+            if None in azLim:
+                azLim = None
+            self.obsArr = ephem.getObservability(
+                maxAirmass = TUI.TCC.CatalogEphem.DefMaxAirmass,
+                pySec = time.time(),
+                fromAzAlt = fromAzAlt,
+                azLim = azLim,
+            )
+            self._sortIndArr = self._computeSortInd()
+            self._updateRows()
+            self.statusBar.setMsg("Observable = airmass < %s; computed at %s" % \
+                (TUI.TCC.CatalogEphem.DefMaxAirmass, time.strftime("%H:%M", time.localtime())))
+        finally:
+            self.planBtn.setEnable(True)
+
+    def _updateRows(self):
+        """Update the displayed rows based on the find string and sort order, and redisplay"""
+        findStr = self.findWdg.getString()
+        if self.listWdg.selRow is not None:
+            selObjInd = self._rowObjIndArr[self.listWdg.selRow]
+        else:
+            selObjInd = None
+        if findStr:
+            if self.matchWdg.getString() == _MatchStarts:
+                matchIndArr = self.nameIndex.findPrefix(findStr)
+            else:
+                matchIndArr = self.nameIndex.findSubstring(findStr)
+            isMatch = numpy.zeros(len(self.objList), dtype=bool)
+            isMatch[matchIndArr] = True
+            self._rowObjIndArr = self._sortIndArr[isMatch[self._sortIndArr]]
+        else:
+            self._rowObjIndArr = self._sortIndArr
+
+        selRow = None
+        if selObjInd is not None:
+            selRowArr = numpy.nonzero(self._rowObjIndArr == selObjInd)[0]
+            if len(selRowArr) > 0:
+                selRow = int(selRowArr[0])
+        self.listWdg.setNumRows(len(self._rowObjIndArr), selRow=selRow)
+        if findStr:
+            self.statusBar.setMsg("%d of %d objects match" % (len(self._rowObjIndArr), len(self.objList)),
+                isTemp = True)
+        else:
+            self.statusBar.clearTempMsg()
+
+
+def _fmtNum(val, fmtStr):
+    """Format a number, returning "" for NaN"""
+    if numpy.isnan(val):
+        return ""
+    return fmtStr % (val,)
+
+def _fmtTime(pySec):
+    """Format a time (python seconds) as local HH:MM, returning "" for NaN"""
+    if numpy.isnan(pySec):
+        return ""
+    return time.strftime("%H:%M", time.localtime(pySec))
+
+def _updateEphem(ephem, begPySec, endPySec):
+    """Update a CatalogEphem; return None if successful, else an error message
+
+    Called in a background thread.
+    Always uses a single process (numProc=1, which is also the default of CatalogEphem.update):
+    forking worker processes from a threaded Tk application is not safe
+    (Python 2 has no "spawn" start method, and on MacOS children may hang in numpy/Accelerate).
+    """
+    try:
+        ephem.update(begPySec, endPySec, numProc=1)
+    except (SystemExit, KeyboardInterrupt):
+        raise
+    except Exception, e:
+        return RO.StringUtil.strFromException(e)
+    return None
+
+
+if __name__ == "__main__":
+    import random
+    import RO.CoordSys
+    import TUI.Base.TestDispatcher
+    import TUI.TCC.TelTarget
+
+    testDispatcher = TUI.Base.TestDispatcher.TestDispatcher(actor="tcc")
+    tuiModel = testDispatcher.tuiModel
+    root = tuiModel.tkRoot
+
+    objList = []
+    for ind in range(100000):
+        objList.append(TUI.TCC.TelTarget.TelTarget(dict(
+            Name = "Obj %d" % (ind,),
+            ObjPos = ("%0.6f" % (random.random() * 24.0,), "%0.6f" % (random.random() * 180.0 - 90.0,)),
+            CSys = RO.CoordSys.ICRS,
+        )))
+    catalog = TUI.TCC.TelTarget.Catalog("randCat", objList)
+
+    def printObj(obj):
+        print obj
+
+    root.withdraw()
+    CatalogBrowser(root, catalog, callFunc=printObj)
+
+    tuiModel.reactor.run()
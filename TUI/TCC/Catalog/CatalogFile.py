@@ -0,0 +1,525 @@
+#!/usr/bin/env python
+"""Read object catalog files without Tkinter, caching the parsed data in a binary file.
+
+ParseCat.CatalogParser checks each object by setting the values into a hidden slew input widget,
+which is slow for large catalogs and can only be done in the Tk thread. readCatalog instead
+checks values against the same keywords, menu items and limits as the slew input widget
+(TUI.TCC.SlewWdg.InputWdg) using plain Python, so it may be called from a background thread.
+
+The parsed data is saved in a cache file beside the catalog: .<catalog file name>.npz.
+The cache records the size and modification time of the catalog file (and the cache format version
+and mount limits); if any differ the catalog is parsed again. If the cache cannot be written
+(e.g. the directory is read-only) the catalog is simply parsed every time.
+
+History:
+2026-10-19 JParejko Initial version.
+"""
+import os
+import re
+import sys
+import numpy
+import GetString
+import RO.Alg
+import RO.CnvUtil
+import RO.CoordSys
+import RO.MathUtil
+import RO.OS
+import RO.SeqUtil
+import RO.StringUtil
+import RO.ParseMsg.ParseData as ParseData
+import TUI.TCC.TelTarget
+
+__all__ = ["CatalogData", "CatalogFileParser", "readCatalog", "getCachePath"]
+
+posOptionRE = re.compile(r'[ \t]*([0-9+-.:]+)[ \t]+([0-9+-.:]+)(?:[ \t]+(.*))?')
+namePosOptionRE = re.compile(r'[ \t]*([^ \t,;]+)[ \t]+([0-9+-.:]+)[ \t]+([0-9+-.:]+)(?:[ \t]+(.*))?')
+
+_CacheVersion = 1
+
+# value separator used to save multi-valued items in the cache
+_ValSep = "\x1f"
+
+# cache item kinds
+_KindAbsent = 0
+_KindScalar = 1
+_KindSeq = 2
+
+# menu items, as in TUI.TCC.SlewWdg.CoordSysWdg, RotWdg and AxisWrapWdg
+_CSysItems = (
+    RO.CoordSys.ICRS,
+    RO.CoordSys.FK5,
+    RO.CoordSys.FK4,
+    RO.CoordSys.Galactic,
+    RO.CoordSys.Geocentric,
+    RO.CoordSys.Topocentric,
+    RO.CoordSys.Observed,
+    RO.CoordSys.Mount,
+)
+_RotTypeItems = ("Object", "Horizon", "Mount", "None")
+_WrapItems = ("Nearest", "Negative", "Middle", "Positive")
+
+# option names, as in TUI.TCC.SlewWdg.KeepOffsetWdg and CalibWdg
+_KeepNames = ("Arc", "Boresight", "GCorr", "Calib")
+_PtErrorNames = ("FindReference", "RefSlew", "Correct", "Log", "ObjSlew")
+_NegStr = "No"
+
+# limits, as in the slew input widgets
+_DateLim = (0.0, 3000.0)
+_RotAngleLim = (-360.0, 360.0)
+_MagLim = (-999.0, 999.0)
+_MaxScanVel = 3.0 * 3600.0 # arcsec/sec
+
+# these options are never used to create an object
+# but are extracted and used when creating the final catalog
+_CatOptionDict = {
+    "doDisplay": True,
+    "dispColor": "black",
+}
+
+# keys of data items, as returned by InputWdg.getDefValueDict
+_DataKeys = (
+    "CSys", "Date", "ObjPos", "Name", "RotAngle", "RotType",
+    "Magnitude", "PM", "Px", "Distance", "Rv",
+    "ScanVelocity", "Keep", "PtError", "AzWrap", "RotWrap",
+)
+
+def getCachePath(filePath):
+    """Return the path of the cache file for a catalog file
+    """
+    dirPath, fileName = os.path.split(os.path.abspath(filePath))
+    return os.path.join(dirPath, ".%s.npz" % (fileName,))
+
+
+class CatalogData(object):
+    """Parsed data for a catalog
+
+    Attributes:
+    - name: catalog name (the catalog file name without the directory)
+    - valueDictList: a list of value dictionaries, one per object, as used by TUI.TCC.TelTarget
+    - catOptions: catalog options: a dict with keys doDisplay (a bool) and dispColor
+    - errList: a list of (line, errMsg) tuples, one per rejected line of object data
+    """
+    def __init__(self, name, valueDictList, catOptions, errList):
+        self.name = name
+        self.valueDictList = valueDictList
+        self.catOptions = catOptions
+        self.errList = errList
+
+    def makeCatalog(self):
+        """Return the data as a TUI.TCC.TelTarget.Catalog
+
+        Call from the Tk thread (the Catalog checks the display color using Tk).
+        """
+        objList = [TUI.TCC.TelTarget.TelTarget(valueDict) for valueDict in self.valueDictList]
+        return TUI.TCC.TelTarget.Catalog(
+            name = self.name,
+            objList = objList,
+        **self.catOptions)
+
+
+class CatalogFileParser(object):
+    """Parse catalog files, expanding abbreviations, correcting case and checking limits.
+
+    Inputs:
+    - mountLim: ((min az, max az), (min alt, max alt)) for positions in Mount coordinates;
+        if None then Mount positions are not range checked
+
+    Does not use Tkinter, so it may be used in a background thread.
+    """
+    def __init__(self, mountLim=None):
+        self.mountLim = mountLim
+        self._keyMatcher = RO.Alg.MatchList(
+            valueList = _DataKeys + tuple(_CatOptionDict.keys()),
+            abbrevOK = True,
+            ignoreCase = True,
+        )
+        self._itemMatcherDict = {}
+        for key, items in (
+            ("CSys", _CSysItems),
+            ("RotType", _RotTypeItems),
+            ("AzWrap", _WrapItems),
+            ("RotWrap", _WrapItems),
+            ("Keep", _KeepNames),
+            ("PtError", _PtErrorNames),
+        ):
+            self._itemMatcherDict[key] = RO.Alg.MatchList(items, abbrevOK=True, ignoreCase=True)
+
+    def parseFile(self, filePath):
+        """Parse a catalog given its full file path.
+
+        Returns a CatalogData.
+
+        Raises RuntimeError if the file cannot be read or a default is invalid.
+
+        The file is read one line at a time.
+        """
+        try:
+            fp = RO.OS.openUniv(filePath)
+        except Exception, e:
+            raise RuntimeError(RO.StringUtil.strFromException(e))
+        try:
+            return self.parseLines(fp, name=os.path.basename(filePath))
+        finally:
+            fp.close()
+
+    def parseLines(self, lineIter, name):
+        """Parse catalog data from an iterable of lines; see parseFile for details.
+        """
+        defOptionDict = self._keyMatcher.matchKeys({
+            "CSys": "FK5",
+            "RotType": "Object",
+        })
+        catOptions = _CatOptionDict.copy()
+        errList = []
+        valueDictList = []
+
+        for line in lineIter:
+            isDefault = False
+            line = line.strip()
+            try:
+                if not line:
+                    # blank line
+                    continue
+                elif line[0] in ("#", "!"):
+                    # comment
+                    continue
+                elif line[0] in ('"', "'"):
+                    # data with quoted object name
+                    (objName, nextInd) = GetString.getString(line)
+                    pos1, pos2, optionStr = posOptionRE.match(line[nextInd:]).groups()
+                else:
+                    # data with unquoted object name or default option
+                    match = namePosOptionRE.match(line)
+                    if match:
+                        # data with unquoted object name
+                        objName, pos1, pos2, optionStr = match.groups()
+                    elif line[0].isdigit():
+                        raise ValueError("could not parse; is object name missing?")
+                    else:
+                        isDefault = True
+                        optionStr = line
+
+                if optionStr:
+                    optDict = ParseData.parseKeyValueData(optionStr)
+                else:
+                    optDict = {}
+
+                if isDefault:
+                    # merge new defaults into existing defaults and check the result
+                    self._combineDicts(defOptionDict, optDict, catOptions, checkAll=True)
+                else:
+                    # a line of data; the data dictionary starts with the current defaults
+                    dataDict = defOptionDict.copy()
+                    dataDict.update({
+                        "Name": objName,
+                        "ObjPos": (pos1, pos2),
+                    })
+                    self._combineDicts(dataDict, optDict, catOptions, extraCheckKeys=("Name", "ObjPos"))
+                    valueDictList.append(dataDict)
+            except Exception, e:
+                if isDefault:
+                    raise RuntimeError(RO.StringUtil.strFromException(e))
+                else:
+                    errList.append((line, RO.StringUtil.strFromException(e)))
+
+        catOptions["doDisplay"] = RO.CnvUtil.asBool(catOptions["doDisplay"])
+        return CatalogData(
+            name = name,
+            valueDictList = valueDictList,
+            catOptions = catOptions,
+            errList = errList,
+        )
+
+    def _combineDicts(self, defDict, newDict, catOptions, extraCheckKeys=(), checkAll=False):
+        """Combine a new dictionary into an existing default dictionary.
+        The default dictionary and catOptions are modified; newDict is not.
+
+        This is the same as ParseCat.CatalogParser._combineDicts,
+        except that catalog options are put into catOptions
+        and (unless checkAll is True) only the values from newDict and extraCheckKeys are checked,
+        since the defaults were checked when they were set.
+
+        Raises ValueError if newDict cannot be key-matched
+        or the resulting defDict has invalid values.
+        """
+        newDict = self._keyMatcher.matchKeys(newDict)
+        # if newDict has csys, erase date in defDict, etc.
+        for key1, key2 in (("CSys", "Date"), ("RotType", "RotAngle")):
+            if key1 in newDict:
+                try:
+                    del defDict[key2]
+                except KeyError:
+                    pass
+
+        # convert scalar data to scalars
+        for key in ("CSys", "Date", "RotAngle", "RotType", "Mag", "Px", "Rv", "Distance"):
+            try:
+                val = newDict[key]
+                if RO.SeqUtil.isSequence(val):
+                    newDict[key] = val[0]
+            except KeyError:
+                pass
+
+        # merge new dict into default dict
+        defDict.update(newDict)
+
+        # extract catalog options, if present
+        for key in _CatOptionDict:
+            if key in defDict:
+                catOptions[key] = defDict.pop(key)[0]
+
+        # check the new dictionary
+        if checkAll:
+            self._checkValueDict(defDict)
+        else:
+            self._checkValueDict(defDict, set(newDict) | set(extraCheckKeys))
+
+    def _checkValueDict(self, valueDict, checkKeys=None):
+        """Check valueDict the way the slew input widget would when setting it,
+        expanding abbreviations and correcting case of menu items and option names.
+
+        Inputs:
+        - valueDict: value dictionary to check; modified in place
+        - checkKeys: keys to check; if None then check all keys in valueDict
+
+        Raise ValueError if a value is invalid or out of bounds.
+        """
+        if checkKeys is None:
+            checkKeys = valueDict
+        else:
+            checkKeys = [key for key in checkKeys if key in valueDict]
+
+        def getValList(key, numVals):
+            valList = RO.SeqUtil.asSequence(valueDict[key])
+            if numVals is not None and len(valList) != numVals:
+                raise ValueError("%s has %d elements; %d needed" % (key, len(valList), numVals))
+            return valList
+
+        for key in ("CSys", "RotType", "AzWrap", "RotWrap"):
+            if key in checkKeys:
+                val = getValList(key, 1)[0]
+                if val not in (None, ""):
+                    val = self._itemMatcherDict[key].getUniqueMatch(val)
+                if RO.SeqUtil.isSequence(valueDict[key]):
+                    val = (val,)
+                valueDict[key] = val
+
+        for key in ("Keep", "PtError"):
+            if key in checkKeys:
+                valList = []
+                for val in getValList(key, None):
+                    if val.lower().startswith(_NegStr.lower()):
+                        valList.append(_NegStr + self._itemMatcherDict[key].getUniqueMatch(val[len(_NegStr):]))
+                    else:
+                        valList.append(self._itemMatcherDict[key].getUniqueMatch(val))
+                valueDict[key] = tuple(valList)
+
+        for key, lim in (
+            ("Date", _DateLim),
+            ("RotAngle", _RotAngleLim),
+            ("Magnitude", _MagLim),
+            ("PM", (None, None)),
+            ("Px", (0.0, None)),
+            ("Distance", (0.0, None)),
+            ("Rv", (None, None)),
+        ):
+            if key in checkKeys:
+                numVals = 2 if key == "PM" else 1
+                for val in getValList(key, numVals):
+                    _checkNum(val, RO.StringUtil.floatFromStr, lim, key)
+
+        if "Name" in checkKeys:
+            getValList("Name", 1)
+
+        if "ScanVelocity" in checkKeys:
+            for val in getValList("ScanVelocity", 2):
+                _checkNum(val, RO.StringUtil.secFromDMSStr, (-_MaxScanVel, _MaxScanVel), "ScanVelocity")
+
+        if "ObjPos" in checkKeys:
+            pos1, pos2 = getValList("ObjPos", 2)
+            csys = valueDict.get("CSys", "FK5")
+            if csys in RO.CoordSys.AzAlt:
+                if csys == RO.CoordSys.Mount:
+                    pos1Lim, pos2Lim = self.mountLim or ((None, None), (None, None))
+                else:
+                    pos1Lim, pos2Lim = (0.0, 360.0), (0.0, 90.0)
+            elif RO.CoordSys.getSysConst(csys).eqInHours():
+                pos1Lim, pos2Lim = (0.0, 24.0), (-90.0, 90.0)
+            else:
+                raise ValueError("cannot handle coordinate system %r" % (csys,))
+            _checkNum(pos1, RO.StringUtil.degFromDMSStr, pos1Lim, "ObjPos")
+            _checkNum(pos2, RO.StringUtil.degFromDMSStr, pos2Lim, "ObjPos")
+
+
+def _checkNum(val, numFromStr, lim, descr):
+    """Check that a value is a valid number in range, as RO.Wdg numeric entry widgets do;
+    raise ValueError if not.
+
+    Inputs:
+    - val: value: a string or None (blank values are acceptable)
+    - numFromStr: function that converts a string to a number
+    - lim: (min, max); either may be None for no limit
+    - descr: description for error messages
+    """
+    if val in (None, ""):
+        return
+    minNum, maxNum = lim
+    if minNum is not None and minNum >= 0 and "-" in val:
+        raise ValueError("%s - forbidden; min val = %s" % (descr, minNum))
+    if maxNum is not None and maxNum < 0 and "-" not in val:
+        raise ValueError("%s - required; max val = %s" % (descr, maxNum))
+    RO.MathUtil.checkRange(numFromStr(val), minNum, maxNum, descr)
+
+
+def _getCacheKey(filePath, mountLim):
+    """Return a string that identifies a version of a catalog file"""
+    fileStat = os.stat(filePath)
+    return "%d %r %d %r" % (_CacheVersion, fileStat.st_mtime, fileStat.st_size, mountLim)
+
+def _saveCache(cachePath, cacheKey, catData):
+    """Save catalog data to a cache file
+
+    Each key of the value dictionaries is saved as an array of strings and an array of kinds
+    (absent, scalar or sequence); sequences are saved as strings joined with _ValSep.
+    """
+    keySet = set()
+    for valueDict in catData.valueDictList:
+        keySet.update(valueDict.iterkeys())
+    keyList = sorted(keySet)
+    numObj = len(catData.valueDictList)
+    arrDict = dict(
+        cacheKey = numpy.array(cacheKey),
+        keys = numpy.array(keyList, dtype=str),
+        doDisplay = numpy.array(catData.catOptions["doDisplay"], dtype=bool),
+        dispColor = numpy.array(catData.catOptions["dispColor"]),
+        errLines = numpy.array([errLine for errLine, errMsg in catData.errList], dtype=str),
+        errMsgs = numpy.array([errMsg for errLine, errMsg in catData.errList], dtype=str),
+    )
+    for keyInd, key in enumerate(keyList):
+        kindArr = numpy.zeros(numObj, dtype=numpy.int8)
+        strList = [""] * numObj
+        for objInd, valueDict in enumerate(catData.valueDictList):
+            val = valueDict.get(key)
+            if val is None:
+                continue
+            if RO.SeqUtil.isSequence(val):
+                kindArr[objInd] = _KindSeq
+                strList[objInd] = _ValSep.join(val)
+            else:
+                kindArr[objInd] = _KindScalar
+                strList[objInd] = val
+        arrDict["kind%d" % (keyInd,)] = kindArr
+        arrDict["str%d" % (keyInd,)] = numpy.array(strList, dtype=str)
+
+    # write to a temporary file, then rename, so a partially written cache is never read
+    tempPath = cachePath + ".tmp"
+    outFile = open(tempPath, "wb")
+    try:
+        numpy.savez(outFile, **arrDict)
+    finally:
+        outFile.close()
+    if os.path.exists(cachePath):
+        os.remove(cachePath) # needed on Windows
+    os.rename(tempPath, cachePath)
+
+def _loadCache(cachePath, cacheKey, name):
+    """Load catalog data from a cache file
+
+    Return a CatalogData, or None if the cache does not exist or is out of date.
+    """
+    if not os.path.isfile(cachePath):
+        return None
+    npzFile = numpy.load(cachePath)
+    try:
+        if str(npzFile["cacheKey"]) != cacheKey:
+            return None
+        keyList = npzFile["keys"].tolist()
+        colList = []
+        for keyInd, key in enumerate(keyList):
+            colList.append((
+                key,
+                npzFile["kind%d" % (keyInd,)].tolist(),
+                npzFile["str%d" % (keyInd,)].tolist(),
+            ))
+        catOptions = dict(
+            doDisplay = bool(npzFile["doDisplay"]),
+            dispColor = str(npzFile["dispColor"]),
+        )
+        errList = zip(npzFile["errLines"].tolist(), npzFile["errMsgs"].tolist())
+    finally:
+        npzFile.close()
+
+    numObj = len(colList[0][1]) if colList else 0
+    valueDictList = [dict() for i in xrange(numObj)]
+    for key, kindList, strList in colList:
+        for valueDict, kind, val in zip(valueDictList, kindList, strList):
+            if kind == _KindScalar:
+                valueDict[key] = val
+            elif kind == _KindSeq:
+                valueDict[key] = tuple(val.split(_ValSep)) if val else ()
+    return CatalogData(
+        name = name,
+        valueDictList = valueDictList,
+        catOptions = catOptions,
+        errList = errList,
+    )
+
+def readCatalog(filePath, mountLim=None, useCache=True):
+    """Read a catalog file, using the cache file if it is up to date.
+
+    Inputs:
+    - filePath: path of catalog file
+    - mountLim: limits for positions in Mount coordinates; see CatalogFileParser
+    - useCache: if True, load the cache file if it is up to date, else parse the catalog and save the cache
+
+    Returns a CatalogData.
+
+    Raises RuntimeError if the file cannot be read or a default is invalid.
+    Problems reading or writing the cache file are reported to stderr, and otherwise ignored.
+
+    Does not use Tkinter, so it may be called from a background thread.
+    """
+    name = os.path.basename(filePath)
+    cachePath = getCachePath(filePath)
+    cacheKey = None
+    if useCache:
+        try:
+            cacheKey = _getCacheKey(filePath, mountLim)
+        except OSError, e:
+            raise RuntimeError(RO.StringUtil.strFromException(e))
+        try:
+            catData = _loadCache(cachePath, cacheKey, name)
+            if catData is not None:
+                return catData
+        except Exception, e:
+            sys.stderr.write("Could not read catalog cache %r: %s\n" % (cachePath, RO.StringUtil.strFromException(e)))
+
+    catData = CatalogFileParser(mountLim=mountLim).parseFile(filePath)
+
+    if useCache:
+        try:
+            _saveCache(cachePath, cacheKey, catData)
+        except Exception:
+            # the directory may be read-only, so silently give up
+            pass
+    return catData
+
+
+if __name__ == "__main__":
+    import time
+
+    fileName = "testCat.txt"
+    if len(sys.argv) > 1:
+        fileName = sys.argv[1]
+    for useCache in (False, True, True):
+        startTime = time.time()
+        catData = readCatalog(fileName, useCache=useCache)
+        print "Read %d objects from %r in %0.3f sec; useCache=%s" % \
+            (len(catData.valueDictList), fileName, time.time() - startTime, useCache)
+    print "Catalog name = %r, options = %r" % (catData.name, catData.catOptions)
+    for valueDict in catData.valueDictList[0:20]:
+        print valueDict
+    if catData.errList:
+        print "The following items could not be parsed:"
+        for item in catData.errList:
+            print item
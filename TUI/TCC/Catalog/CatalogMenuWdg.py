@@ -24,11 +24,19 @@ History:
 2005-01-05 ROwen    Changed level to severity.
 2010-02-18 ROwen    Fixed the test code.
 2012-07-10 ROwen    Removed use of update_idletasks.
+2026-10-19 JParejko Read catalogs using CatalogFile.readCatalog in a background thread,
+                    so large catalogs no longer freeze the user interface and reopening
+                    an unchanged catalog loads the cached parsed data.
+2026-10-19 JParejko Added a Browse... item to each catalog's menu, which opens a CatalogBrowser.
+                    Catalogs with more than _MaxMenuObjects objects are only listed in the browser.
+                    Each catalog has one cascade menu, which is filled in when first shown,
+                    and only the menus of catalogs that changed are rebuilt.
 """
 import os
 import sys
 import Tkinter
 import tkFileDialog
+from opscore.actor import ScriptRunner
 import RO.Constants
 import RO.CnvUtil
 import RO.StringUtil
@@ -36,11 +44,14 @@ import RO.Alg
 import RO.TkUtil
 import RO.Wdg
 import TUI.Base.Wdg
+import TUI.Models
 import TUI.TCC.UserModel
-import ParseCat
+import CatalogBrowserWdg
+import CatalogFile
 
 _NItems = 20    # number of items in partial menu
 _MaxItems = 25  # max # of items in a menu
+_MaxMenuObjects = 500 # catalogs with more objects are only listed in the browser
 
 class CatalogMenuWdg(Tkinter.Frame):
     """Display a catalog pop-up menu.
@@ -62,7 +73,10 @@ class CatalogMenuWdg(Tkinter.Frame):
     ):
         Tkinter.Frame.__init__(self, master)
         self.callFunc = callFunc
-        self._catParser = ParseCat.CatalogParser()
+        self.tccModel = TUI.Models.getModel("tcc")
+        self._loadSRDict = {} # dict of catalog file path: ScriptRunner loading that file
+        self._catMenuDict = {} # dict of catalog name: (catalog, cascade menu)
+        self._browserDict = {} # dict of catalog name: CatalogBrowserWdg.CatalogBrowser
         userModel = TUI.TCC.UserModel.Model()
         self.userCatDict = userModel.userCatDict
         self.statusBar = statusBar
@@ -139,11 +153,31 @@ class CatalogMenuWdg(Tkinter.Frame):
         # in case a Tcl object was returned...
         catFile = RO.CnvUtil.asStr(catFile)
         
-        # parse the catalog file
+        # read the catalog file in a background thread
         # print "loading catalog %r" % (catFile,)
         self.showMsg("Loading file %s" % (catFile,))
+        loadSR = ScriptRunner(
+            runFunc = RO.Alg.GenericCallback(self._loadCatalog, catFile),
+            name = "loadCatalog",
+        )
+        self._loadSRDict[catFile] = loadSR # keep a reference while loading
+        loadSR.start()
+
+    def _loadCatalog(self, catFile, sr):
+        """Read a catalog file and add it to userCatDict (a ScriptRunner run function)
+        """
+        yield sr.waitThread(_readCatalog, catFile, self._getMountLim())
+        catData, errMsg = sr.value
+        self._loadSRDict.pop(catFile, None)
+        if errMsg:
+            self.showMsg(
+                msgStr = "Could not load %s: %s" % (catFile, errMsg),
+                severity = RO.Constants.sevError,
+            )
+            return
+
         try:
-            objCat, errList = self._catParser.parseCat(catFile)
+            objCat = catData.makeCatalog()
         except (SystemExit, KeyboardInterrupt):
             raise
         except Exception, e:
@@ -156,8 +190,8 @@ class CatalogMenuWdg(Tkinter.Frame):
         catName = objCat.name
         
         # report errors, if any
-        if errList:
-            _CatalogErrBox(self, catFile, errList)
+        if catData.errList:
+            _CatalogErrBox(self, catFile, catData.errList)
         
         # update userCatDict in userModel
         # (automatically triggers menu rebuild)
@@ -168,82 +202,143 @@ class CatalogMenuWdg(Tkinter.Frame):
         # indicate completion
         self.showMsg("Catalog %s loaded" % (catName,))
 
+    def _getMountLim(self):
+        """Return ((min az, max az), (min alt, max alt)) for positions in Mount coordinates,
+        or None if the limits are not known
+        """
+        azLim = self.tccModel.azLim.valueList
+        altLim = self.tccModel.altLim.valueList
+        if None in azLim[0:2] or None in altLim[0:2]:
+            return None
+        return (tuple(azLim[0:2]), tuple(altLim[0:2]))
+
     def _addCatMenu(self, objCat):
-        """Add the menu(s) for a given catalog to the main menu.
+        """Add the menu for a given catalog to the main menu.
+
+        The menu is empty until it is first shown; see _fillCatMenu.
         """
         catName = objCat.name
+        menu = Tkinter.Menu(
+            master = self.menu,
+            tearoff = False,
+        )
+        menu["postcommand"] = RO.Alg.GenericCallback(self._fillCatMenu, objCat, menu)
+        self.menu.insert_cascade(
+            self._getCatMenuIndex(catName),
+            label = catName,
+            menu = menu,
+        )
+        self._catMenuDict[catName] = (objCat, menu)
+
+    def _buildMenu(self):
+        """Build the menu.
+        """
+        self.menu.add_command(
+            label = "Open...",
+            command = self._doOpen,
+        )
+        self._updUserCatDict()
+
+    def _doBrowse(self, catName):
+        """Show the object browser for the specified catalog.
+        """
+        browser = self._browserDict.get(catName)
+        if browser:
+            browser.deiconify()
+            browser.lift()
+            return
+        objCat = self._catMenuDict[catName][0]
+        browser = CatalogBrowserWdg.CatalogBrowser(self, objCat, callFunc=self._doMenu)
+        browser.bind("<Destroy>", RO.Alg.GenericCallback(self._browserDestroyed, catName, browser), add=True)
+        self._browserDict[catName] = browser
+
+    def _browserDestroyed(self, catName, browser, evt):
+        """A browser (or one of its widgets) has been destroyed.
+        """
+        if evt.widget == browser and self._browserDict.get(catName) == browser:
+            del self._browserDict[catName]
+
+    def _fillCatMenu(self, objCat, menu):
+        """Add the items to a catalog's menu, if not already done.
+        """
+        if menu.index("end") is not None:
+            return
+        catName = objCat.name
         objList = objCat.objList
         
-        # create new menu(s)
-        begInd = 0
-        nRemain = len(objList)
-        justOneMenu = True
-        while begInd < len(objList):
-            nRemain = len(objList) - begInd
-            if nRemain > _MaxItems:
-                nPick = _NItems
-                justOneMenu = False
-            else:
-                nPick = nRemain
-            endInd = begInd + nPick
+        menu.add_command(
+            label = "Browse...",
+            command = RO.Alg.GenericCallback(self._doBrowse, catName),
+        )
+        menu.add_separator()
 
-            # create submenu for items begInd:endInd
-            menu = Tkinter.Menu(
-                master = self.menu,
-                tearoff = False,
-            )
-            for obj in objList[begInd:endInd]:
-                item = str(obj)
-                menu.add_command(
-                    label = item,
-                    command = RO.Alg.GenericCallback(self._doMenu, obj),
+        if len(objList) <= _MaxItems:
+            self._fillObjMenu(objList, 0, len(objList), menu)
+        elif len(objList) <= _MaxMenuObjects:
+            # create a submenu for each group of _NItems objects
+            for begInd in range(0, len(objList), _NItems):
+                endInd = min(begInd + _NItems, len(objList))
+                subMenu = Tkinter.Menu(
+                    master = menu,
+                    tearoff = False,
                 )
-                
-            menu.add_separator()
-            
+                subMenu["postcommand"] = RO.Alg.GenericCallback(self._fillObjMenu, objList, begInd, endInd, subMenu)
+                menu.add_cascade(
+                    label = "%s-%s" % (begInd+1, endInd),
+                    menu = subMenu,
+                )
+        else:
             menu.add_command(
-                label = "Close",
-                command = RO.Alg.GenericCallback(self._doClose, catName),
+                label = "%s objects; use Browse..." % (len(objList),),
+                state = "disabled",
             )
             
-            # add entry to main menu
-            if justOneMenu:
-                entryName = catName
-            else:
-                entryName = "%s (%s-%s)" % (catName, begInd+1, endInd)
-            
-            self.menu.add_cascade(
-                label = entryName,
-                menu = menu,
+        menu.add_separator()
+        
+        menu.add_command(
+            label = "Close",
+            command = RO.Alg.GenericCallback(self._doClose, catName),
+        )
+
+    def _fillObjMenu(self, objList, begInd, endInd, menu):
+        """Add items for objList[begInd:endInd] to a menu, if not already done.
+        """
+        if menu.index("end") is not None:
+            return
+        for obj in objList[begInd:endInd]:
+            item = str(obj)
+            menu.add_command(
+                label = item,
+                command = RO.Alg.GenericCallback(self._doMenu, obj),
             )
-            
-            begInd = endInd
-    
-    def _buildMenu(self):
-        """Build or rebuild the entire menu.
+
+    def _getCatMenuIndex(self, catName):
+        """Return the index in the main menu for the specified catalog's menu
+        (whether or not it exists yet); catalog menus follow Open... and are sorted by name.
         """
-        # empty the current menu
-        self.menu.delete(0, "end")      
+        return 1 + len([name for name in self._catMenuDict if name < catName])
 
-        # add Open...
-        self.menu.add_command(
-            label = "Open...",
-            command = self._doOpen,
-        )
-        
-        catDict = self.userCatDict.get()
-        if not catDict:
-            return
-        
-        catNames = catDict.keys()
-        catNames.sort()
-        for catName in catNames:
-            self._addCatMenu(catDict[catName])
+    def _removeCatMenu(self, catName):
+        """Remove the menu (and browser, if any) for the specified catalog.
+        """
+        objCat, menu = self._catMenuDict.pop(catName)
+        self.menu.delete(self._getCatMenuIndex(catName))
+        menu.destroy()
+        browser = self._browserDict.pop(catName, None)
+        if browser:
+            browser.destroy()
     
     def _updUserCatDict(self, userCatDict=None):
-        """UserCatDict updated; update the menu accordingly.
+        """UserCatDict updated; update the menu accordingly,
+        rebuilding the menus of only those catalogs that have changed.
         """
-        self._buildMenu()
+        catDict = self.userCatDict.get()
+        for catName, (objCat, menu) in self._catMenuDict.items():
+            if catDict.get(catName) is not objCat:
+                self._removeCatMenu(catName)
+        for catName, objCat in catDict.iteritems():
+            if catName not in self._catMenuDict:
+                self._addCatMenu(objCat)
     
     def showMsg(self, msgStr, severity=RO.Constants.sevNormal):
         if self.statusBar:
@@ -255,6 +350,19 @@ class CatalogMenuWdg(Tkinter.Frame):
             sys.stderr.write(msgStr + "\n")
 
 
+def _readCatalog(catFile, mountLim):
+    """Read a catalog file; return (CatalogData, None) if successful, else (None, error message)
+
+    Called in a background thread.
+    """
+    try:
+        return CatalogFile.readCatalog(catFile, mountLim=mountLim), None
+    except (SystemExit, KeyboardInterrupt):
+        raise
+    except Exception, e:
+        return None, RO.StringUtil.strFromException(e)
+
+
 class _CatalogErrBox(Tkinter.Toplevel):
     def __init__(self,
         master,
@@ -20,9 +20,10 @@ History:
 2008-04-29 ROwen    Fixed reporting of exceptions that contain unicode arguments.
 2012-08-29 ROwen    Ditched obsolete "except (SystemExit, KeyboardInterrupt): raise" code
                     Removed use of deprecated dict.has_key method.
+2026-10-19 JParejko Moved posOptionRE and namePosOptionRE to CatalogFile, which has a faster,
+                    Tk-free parser (with a binary cache) that is used by CatalogMenuWdg.
 """
 import os.path
-import re
 import Tkinter
 import GetString
 import RO.Alg
@@ -34,6 +35,7 @@ import RO.ParseMsg.ParseData as ParseData
 import TUI.TCC.UserModel
 import TUI.TCC.TelTarget
 import TUI.TCC.SlewWdg.InputWdg
+from CatalogFile import posOptionRE, namePosOptionRE
 
 def listGet(aList, ind, defValue=None):
     try:
@@ -42,8 +44,6 @@ def listGet(aList, ind, defValue=None):
         return defValue
 
 
-posOptionRE = re.compile(r'[ \t]*([0-9+-.:]+)[ \t]+([0-9+-.:]+)(?:[ \t]+(.*))?')
-namePosOptionRE = re.compile(r'[ \t]*([^ \t,;]+)[ \t]+([0-9+-.:]+)[ \t]+([0-9+-.:]+)(?:[ \t]+(.*))?')
 
 # these options are never used to create an object
 # but are extracted and used when creating the final catalog
@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+"""Precomputed positions of catalog objects over a night, for planning observations.
+
+A CatalogEphem holds the position of every object in a TUI.TCC.TelTarget.Catalog
+on a coarse grid of times (every stepSec seconds). Positions between grid points are interpolated,
+so once the table is computed it is cheap to find positions, airmasses, rise and set times,
+time observable and slew time estimates for all objects, at any time covered by the table.
+
+Positions are stored as x,y degrees (x east, y north, as used by the sky window)
+rather than az,alt because objects move smoothly in x,y even near the zenith;
+with the default stepSec of 600 seconds the interpolation error above the horizon is about 0.02 degrees.
+
+Grid times are multiples of stepSec, so when the time range is changed (e.g. as the night progresses)
+update only computes the grid points that are not already in the table.
+The table is computed by TelTarget.Catalog.getAzAltTrackArr, which can use a pool of worker processes
+(update's numProc argument); the default is 1 because forking from the running application is not safe.
+
+Use getCatalogEphem to get the CatalogEphem shared by all users of a catalog
+(e.g. the sky window uses it, if it covers the times of interest).
+
+History:
+2026-10-19 JParejko Initial version.
+2026-10-19 JParejko Documented that GUI code must call update with numProc=1.
+2026-10-19 JParejko Changed the default numProc of update to 1, so worker processes are opt-in.
+"""
+import math
+import threading
+import time
+import weakref
+
+import numpy
+import RO.Astro.Tm
+
+__all__ = ["CatalogEphem", "getCatalogEphem", "airmassFromAltArr", "altFromAirmass"]
+
+DefStepSec = 600.0
+DefMaxAirmass = 2.0
+
+# approximate telescope slew rates, for slew time estimates
+DefAzVel = 1.5 # deg/sec
+DefAltVel = 1.5 # deg/sec
+DefSlewOverhead = 20.0 # sec; time to start, stop and settle
+
+# minimum altitude used to compute airmass (deg); the same as RO.Astro.Sph.airmass
+_MinAirmassAlt = 3.0
+
+# fields of the array returned by CatalogEphem.getObservability
+ObservabilityFields = (
+    "az", "alt", "airmass",
+    "riseTime", "setTime", "timeObservable",
+    "maxAlt", "maxAltTime", "slewTime",
+)
+
+def airmassFromAltArr(altArr):
+    """Array version of RO.Astro.Sph.airmass
+
+    Inputs:
+    - altArr: altitude (deg); an array or scalar. Altitudes below 3 degrees are treated as 3 degrees;
+        NaN values result in NaN.
+    """
+    with numpy.errstate(invalid="ignore"):
+        altArr = numpy.maximum(numpy.asarray(altArr, dtype=float), _MinAirmassAlt)
+    secM1 = (1.0 / numpy.sin(numpy.radians(altArr))) - 1.0
+    return 1.0 + secM1 * (0.9981833 - secM1 * (0.002875 + (0.0008083 * secM1)))
+
+def altFromAirmass(airmass):
+    """Return the altitude (deg) at which the airmass (as computed by RO.Astro.Sph.airmass) has the specified value
+
+    Airmass decreases monotonically with altitude, so the altitude is found by bisection.
+    Raise ValueError if airmass < 1.
+    """
+    if airmass < 1.0:
+        raise ValueError("airmass=%s; must be >= 1" % (airmass,))
+    minAlt, maxAlt = _MinAirmassAlt, 90.0
+    if airmass >= airmassFromAltArr(minAlt):
+        return minAlt
+    for i in range(50):
+        alt = (minAlt + maxAlt) / 2.0
+        if airmassFromAltArr(alt) > airmass:
+            minAlt = alt
+        else:
+            maxAlt = alt
+    return (minAlt + maxAlt) / 2.0
+
+def _xyDegFromAzAltArr(azAltArr):
+    """Array version of SkyWindow.xyDegFromAzAlt: convert az,alt deg (0 south, 90 east)
+    to x,y deg (x east, y north); works for arrays of any shape whose last axis has length 2
+    """
+    thetaRad = numpy.radians(azAltArr[..., 0] - 90.0)
+    r = 90.0 - azAltArr[..., 1]
+    return numpy.concatenate(((r * numpy.cos(thetaRad))[..., numpy.newaxis],
+        (r * numpy.sin(thetaRad))[..., numpy.newaxis]), axis=-1)
+
+def _azAltFromXYDegArr(xyDegArr):
+    """Array version of SkyWindow.azAltFromXYDeg, except that az is in the range [0, 360);
+    works for arrays of any shape whose last axis has length 2
+    """
+    az = numpy.mod(numpy.degrees(numpy.arctan2(xyDegArr[..., 1], xyDegArr[..., 0])) + 90.0, 360.0)
+    alt = 90.0 - numpy.hypot(xyDegArr[..., 0], xyDegArr[..., 1])
+    return numpy.concatenate((az[..., numpy.newaxis], alt[..., numpy.newaxis]), axis=-1)
+
+
+class CatalogEphem(object):
+    """Positions of all objects in a catalog on a grid of times
+
+    Inputs:
+    - catalog: a TUI.TCC.TelTarget.Catalog
+    - stepSec: interval between grid points (sec)
+
+    The table is initially empty; call update to compute it.
+    update may be called from a background thread while other methods are in use:
+    the table is replaced all at once when it is ready.
+    """
+    def __init__(self, catalog, stepSec=DefStepSec):
+        self.catalog = catalog
+        self.stepSec = float(stepSec)
+        self._updateLock = threading.Lock()
+        self._setTable(len(catalog.getObjList()), None, None)
+
+    @property
+    def numObj(self):
+        """Number of objects in the table"""
+        return self._table[0]
+
+    @property
+    def begPySec(self):
+        """Time of first grid point (python seconds), or None if the table is empty"""
+        gridNumArr = self._table[1]
+        if gridNumArr is None:
+            return None
+        return gridNumArr[0] * self.stepSec
+
+    @property
+    def endPySec(self):
+        """Time of last grid point (python seconds), or None if the table is empty"""
+        gridNumArr = self._table[1]
+        if gridNumArr is None:
+            return None
+        return gridNumArr[-1] * self.stepSec
+
+    def covers(self, begPySec, endPySec):
+        """Return True if the table covers the time range [begPySec, endPySec]
+        and is for the current object list of the catalog
+        """
+        numObj, gridNumArr, xyDegArr = self._table
+        if gridNumArr is None or numObj != len(self.catalog.getObjList()):
+            return False
+        return gridNumArr[0] * self.stepSec <= begPySec and endPySec <= gridNumArr[-1] * self.stepSec
+
+    def update(self, begPySec, endPySec, numProc=1):
+        """Compute the table for the time range [begPySec, endPySec] (python seconds)
+
+        Inputs:
+        - begPySec, endPySec: time range to cover
+        - numProc: number of worker processes; see TelTarget.Catalog.getAzAltTrackArr.
+            Specify more than 1 (or None for the number of CPUs) only from scripts and the command line.
+
+        Grid points already in the table are reused (unless the catalog's object list has changed
+        length); grid points outside the new time range are discarded.
+        Slow if many grid points must be computed, so call from a background thread.
+        """
+        if endPySec < begPySec:
+            raise ValueError("endPySec=%s < begPySec=%s" % (endPySec, begPySec))
+        begGridNum = int(math.floor(begPySec / self.stepSec))
+        endGridNum = max(int(math.ceil(endPySec / self.stepSec)), begGridNum + 1)
+        newGridNumArr = numpy.arange(begGridNum, endGridNum + 1)
+
+        self._updateLock.acquire()
+        try:
+            numObj = len(self.catalog.getObjList())
+            oldNumObj, oldGridNumArr, oldXYDegArr = self._table
+            newXYDegArr = numpy.empty((numObj, len(newGridNumArr), 2), dtype=numpy.float32)
+            if oldGridNumArr is not None and oldNumObj == numObj:
+                isOld = (newGridNumArr >= oldGridNumArr[0]) & (newGridNumArr <= oldGridNumArr[-1])
+                newXYDegArr[:, isOld] = oldXYDegArr[:, newGridNumArr[isOld] - oldGridNumArr[0]]
+            else:
+                isOld = numpy.zeros(len(newGridNumArr), dtype=bool)
+            missingGridNumArr = newGridNumArr[~isOld]
+            if len(missingGridNumArr) > 0:
+                dateList = [RO.Astro.Tm.utcFromPySec(gridNum * self.stepSec)
+                    for gridNum in missingGridNumArr.tolist()]
+                azAltTrackArr = self.catalog.getAzAltTrackArr(dateList, numProc=numProc)
+                newXYDegArr[:, ~isOld] = _xyDegFromAzAltArr(azAltTrackArr)
+            self._setTable(numObj, newGridNumArr, newXYDegArr)
+        finally:
+            self._updateLock.release()
+
+    def getXYDegArr(self, pySec):
+        """Return the x,y position (deg; x east, y north) of all objects at time pySec as an N x 2 array
+
+        Rows for objects with no position are NaN.
+        Raise ValueError if pySec is not covered by the table.
+        """
+        numObj, gridNumArr, xyDegArr = self._table
+        gridInd, frac = self._getGridIndFrac(gridNumArr, pySec)
+        begXYDeg = xyDegArr[:, gridInd].astype(float)
+        if frac == 0.0:
+            return begXYDeg
+        return begXYDeg + ((xyDegArr[:, gridInd + 1] - begXYDeg) * frac)
+
+    def getAzAltArr(self, pySec):
+        """Return the az,alt position (deg) of all objects at time pySec as an N x 2 array
+
+        Rows for objects with no position are NaN.
+        Raise ValueError if pySec is not covered by the table.
+        """
+        return _azAltFromXYDegArr(self.getXYDegArr(pySec))
+
+    def getAirmassArr(self, pySec):
+        """Return the airmass of all objects at time pySec as an N array
+
+        Values for objects with no position are NaN.
+        Raise ValueError if pySec is not covered by the table.
+        """
+        return airmassFromAltArr(self.getAzAltArr(pySec)[:,1])
+
+    def getSlewTimeArr(self, fromAzAlt, pySec,
+        azLim = None,
+        azVel = DefAzVel,
+        altVel = DefAltVel,
+        overhead = DefSlewOverhead,
+    ):
+        """Return the estimated time (sec) to slew from fromAzAlt to each object at time pySec, as an N array
+
+        Inputs:
+        - fromAzAlt: current az,alt of the telescope (deg)
+        - pySec: time of arrival (python seconds)
+        - azLim: (min, max) azimuth of the telescope (deg); if specified then the slew is to the
+            wrap of the object's azimuth nearest fromAzAlt[0] within these limits; if None (or no
+            wrap is within the limits) then the slew is by the shortest angular distance
+        - azVel, altVel: slew velocity in az and alt (deg/sec); the axes move at the same time
+        - overhead: time added to each slew (sec)
+
+        Values for objects with no position are NaN.
+        This is a rough estimate, since it ignores acceleration and the object's motion during the slew.
+        Raise ValueError if pySec is not covered by the table.
+        """
+        azAltArr = self.getAzAltArr(pySec)
+        return _slewTimeArr(fromAzAlt, azAltArr, azLim, azVel, altVel, overhead)
+
+    def getObservability(self,
+        maxAirmass = DefMaxAirmass,
+        pySec = None,
+        fromAzAlt = None,
+        azLim = None,
+    ):
+        """Return observability data for all objects as a numpy record array of N elements, for sorting or display
+
+        Inputs:
+        - maxAirmass: maximum airmass at which an object is observable
+        - pySec: current time (python seconds); if None then the current time
+        - fromAzAlt: current az,alt of the telescope (deg), for slew time estimates; may be None
+        - azLim: (min, max) azimuth of the telescope (deg); see getSlewTimeArr
+
+        The fields are (see also ObservabilityFields):
+        - az, alt, airmass: position (deg) and airmass at time pySec
+        - riseTime: time (python seconds) of the first grid interval in which the object rises above maxAirmass
+        - setTime: time (python seconds) at which the object sets below maxAirmass,
+            after riseTime, if the object rises, else after the start of the table
+        - timeObservable: time (sec) the object is above maxAirmass from pySec to the end of the table
+        - maxAlt, maxAltTime: maximum altitude (deg) and the time at which it occurs (python seconds),
+            from pySec to the end of the table (to the nearest grid point)
+        - slewTime: slew time estimate (sec) from fromAzAlt at time pySec; NaN if fromAzAlt is None
+
+        Times that do not exist (e.g. riseTime for an object that is up at the start of the table
+        or never rises) are NaN. az, alt, airmass and slewTime are NaN if pySec is not covered by the table.
+        All fields are NaN for objects with no position.
+
+        Uses linear interpolation of altitude between grid points. Fast compared to update.
+        """
+        if pySec is None:
+            pySec = time.time()
+        numObj, gridNumArr, xyDegArr = self._table
+        obsArr = numpy.empty(numObj, dtype=[(field, float) for field in ObservabilityFields])
+        for field in ObservabilityFields:
+            obsArr[field] = numpy.nan
+        if gridNumArr is None or numObj == 0:
+            return obsArr
+
+        minAlt = altFromAirmass(maxAirmass)
+        timeArr = gridNumArr * self.stepSec
+        altArr = 90.0 - numpy.hypot(xyDegArr[...,0], xyDegArr[...,1]).astype(float) # N x M
+
+        if timeArr[0] <= pySec <= timeArr[-1]:
+            azAltArr = self.getAzAltArr(pySec)
+            obsArr["az"] = azAltArr[:,0]
+            obsArr["alt"] = azAltArr[:,1]
+            obsArr["airmass"] = airmassFromAltArr(azAltArr[:,1])
+            if fromAzAlt is not None:
+                obsArr["slewTime"] = _slewTimeArr(fromAzAlt, azAltArr, azLim,
+                    DefAzVel, DefAltVel, DefSlewOverhead)
+
+        if len(timeArr) < 2:
+            return obsArr
+
+        # crossing times of the altitude limit in each grid interval (N x M-1; NaN if no crossing)
+        begAlt = altArr[:, :-1]
+        endAlt = altArr[:, 1:]
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            isRise = (begAlt < minAlt) & (endAlt >= minAlt)
+            isSet = (begAlt >= minAlt) & (endAlt < minAlt)
+            crossFrac = numpy.clip((minAlt - begAlt) / (endAlt - begAlt), 0.0, 1.0)
+        crossTimeArr = timeArr[:-1] + (crossFrac * self.stepSec)
+
+        riseInd = _firstTrueInd(isRise)
+        hasRise = riseInd >= 0
+        objInd = numpy.arange(numObj)
+        obsArr["riseTime"][hasRise] = crossTimeArr[objInd[hasRise], riseInd[hasRise]]
+        # only look for sets after the rise (if any)
+        isSet &= numpy.arange(len(timeArr) - 1) >= numpy.maximum(riseInd, 0)[:,numpy.newaxis]
+        setInd = _firstTrueInd(isSet)
+        hasSet = setInd >= 0
+        obsArr["setTime"][hasSet] = crossTimeArr[objInd[hasSet], setInd[hasSet]]
+
+        # time observable from pySec to the end of the table:
+        # the observable part of each grid interval, clipped to begin at pySec
+        with numpy.errstate(invalid="ignore"):
+            upBegTime = numpy.where(begAlt >= minAlt, timeArr[:-1], numpy.where(isRise, crossTimeArr, numpy.nan))
+            upEndTime = numpy.where(endAlt >= minAlt, timeArr[1:], numpy.where(isSet, crossTimeArr, numpy.nan))
+            upTime = numpy.clip(upEndTime - numpy.maximum(upBegTime, pySec), 0.0, None)
+        hasPos = numpy.all(numpy.isfinite(altArr), axis=1)
+        obsArr["timeObservable"][hasPos] = numpy.nansum(upTime[hasPos], axis=1)
+
+        # maximum altitude from pySec onwards
+        isFuture = timeArr >= pySec - self.stepSec
+        if numpy.any(isFuture) and numpy.any(hasPos):
+            futureAltArr = altArr[hasPos][:, isFuture]
+            maxInd = numpy.argmax(futureAltArr, axis=1)
+            obsArr["maxAlt"][hasPos] = futureAltArr[numpy.arange(len(maxInd)), maxInd]
+            obsArr["maxAltTime"][hasPos] = timeArr[isFuture][maxInd]
+        return obsArr
+
+    def _getGridIndFrac(self, gridNumArr, pySec):
+        """Return (index of grid point at or before pySec, fractional distance to the next grid point)
+
+        Raise ValueError if pySec is not covered by the table.
+        """
+        if gridNumArr is None:
+            raise ValueError("No positions computed")
+        gridPos = (pySec / self.stepSec) - gridNumArr[0]
+        if not 0 <= gridPos <= len(gridNumArr) - 1:
+            raise ValueError("Time %s not in range [%s, %s]" % \
+                (pySec, gridNumArr[0] * self.stepSec, gridNumArr[-1] * self.stepSec))
+        gridInd = min(int(math.floor(gridPos)), len(gridNumArr) - 2) if len(gridNumArr) > 1 else 0
+        return gridInd, gridPos - gridInd
+
+    def _setTable(self, numObj, gridNumArr, xyDegArr):
+        """Set the table all at once, so it is always self-consistent
+
+        Inputs:
+        - numObj: number of objects
+        - gridNumArr: grid point numbers (time = grid number * stepSec); None if the table is empty
+        - xyDegArr: x,y positions (deg): N x M x 2 float32 array; None if the table is empty
+        """
+        self._table = (numObj, gridNumArr, xyDegArr)
+
+
+def _firstTrueInd(boolArr):
+    """Return the index of the first True value in each row of a 2-d bool array; -1 if none
+    """
+    firstInd = numpy.argmax(boolArr, axis=1)
+    return numpy.where(boolArr[numpy.arange(len(boolArr)), firstInd], firstInd, -1)
+
+def _slewTimeArr(fromAzAlt, azAltArr, azLim, azVel, altVel, overhead):
+    """Return estimated slew times; see CatalogEphem.getSlewTimeArr
+    """
+    fromAz, fromAlt = [float(val) for val in fromAzAlt[0:2]]
+    azArr = azAltArr[:,0]
+    # shortest angular distance
+    with numpy.errstate(invalid="ignore"):
+        dAzArr = numpy.abs(numpy.mod(azArr - fromAz + 180.0, 360.0) - 180.0)
+        if azLim is not None:
+            # nearest wrap within the limits, if any
+            minAz, maxAz = azLim[0:2]
+            bestDAzArr = numpy.empty(len(azArr))
+            bestDAzArr.fill(numpy.inf)
+            for numWraps in range(int(math.floor((minAz - 360.0) / 360.0)), int(math.ceil(maxAz / 360.0)) + 1):
+                wrapAzArr = azArr + (360.0 * numWraps)
+                isIn = (wrapAzArr >= minAz) & (wrapAzArr <= maxAz)
+                bestDAzArr = numpy.where(isIn, numpy.minimum(bestDAzArr, numpy.abs(wrapAzArr - fromAz)), bestDAzArr)
+            dAzArr = numpy.where(numpy.isfinite(bestDAzArr), bestDAzArr, dAzArr)
+        dAltArr = numpy.abs(azAltArr[:,1] - fromAlt)
+        return numpy.maximum(dAzArr / azVel, dAltArr / altVel) + overhead
+
+
+_EphemDict = weakref.WeakKeyDictionary() # dict of catalog: CatalogEphem
+_EphemDictLock = threading.Lock()
+
+def getCatalogEphem(catalog, doCreate=True):
+    """Return the shared CatalogEphem for a catalog
+
+    Inputs:
+    - catalog: a TUI.TCC.TelTarget.Catalog
+    - doCreate: if True, create an (empty) CatalogEphem with the default stepSec if none exists;
+        if False, return None if none exists
+
+    The CatalogEphem is discarded when the catalog is.
+    """
+    _EphemDictLock.acquire()
+    try:
+        ephem = _EphemDict.get(catalog)
+        if ephem is None and doCreate:
+            ephem = CatalogEphem(catalog)
+            _EphemDict[catalog] = ephem
+        return ephem
+    finally:
+        _EphemDictLock.release()
+
+
+if __name__ == "__main__":
+    # compare interpolated positions to Catalog.getAzAltArr, then time update and getObservability
+    import random
+    import RO.CoordSys
+    import TUI.TCC.TelTarget
+
+    def makeCatalog(numObj):
+        objList = []
+        for ind in range(numObj):
+            objList.append(TUI.TCC.TelTarget.TelTarget(dict(
+                Name = "obj%d" % (ind,),
+                ObjPos = ("%0.6f" % (random.random() * 24.0,), "%0.6f" % (random.random() * 180.0 - 90.0,)),
+                CSys = RO.CoordSys.ICRS,
+            )))
+        return TUI.TCC.TelTarget.Catalog("test", objList)
+
+    catalog = makeCatalog(2000)
+    ephem = getCatalogEphem(catalog)
+    begPySec = time.time()
+    endPySec = begPySec + (12 * 3600)
+    ephem.update(begPySec, endPySec, numProc=None)
+    maxErrDeg = 0.0
+    for pySec in numpy.linspace(begPySec, endPySec, 17):
+        exactAzAltArr = catalog.getAzAltArr(RO.Astro.Tm.utcFromPySec(pySec))
+        isUp = exactAzAltArr[:,1] >= 0.0
+        exactXYDeg = _xyDegFromAzAltArr(exactAzAltArr[isUp])
+        errDeg = numpy.hypot(*(ephem.getXYDegArr(pySec)[isUp] - exactXYDeg).transpose())
+        maxErrDeg = max(maxErrDeg, errDeg.max())
+    print "Max interpolation error above the horizon = %0.3f deg" % (maxErrDeg,)
+
+    obsArr = ephem.getObservability(pySec=begPySec, fromAzAlt=(121.0, 30.0), azLim=(-190.0, 440.0))
+    print "Objects observable now with the most observable time remaining:"
+    for ind in numpy.argsort(-numpy.where(obsArr["airmass"] <= DefMaxAirmass, obsArr["timeObservable"], -1))[0:5]:
+        print "%s: %s" % (catalog.getObjList()[ind].name,
+            ", ".join("%s=%0.1f" % (field, obsArr[ind][field]) for field in ObservabilityFields))
+
+    for numObj in (10000, 100000):
+        catalog = makeCatalog(numObj)
+        ephem = CatalogEphem(catalog)
+        startTime = time.time()
+        ephem.update(begPySec, endPySec, numProc=None)
+        updateSec = time.time() - startTime
+        startTime = time.time()
+        ephem.update(begPySec + 3600, endPySec + 3600, numProc=None)
+        shiftSec = time.time() - startTime
+        startTime = time.time()
+        obsArr = ephem.getObservability(pySec=begPySec + 3600)
+        obsSec = time.time() - startTime
+        print "%6d objects: update %0.2f sec; update shifted 1 hour %0.2f sec; getObservability %0.2f sec" % \
+            (numObj, updateSec, shiftSec, obsSec)
@@ -46,9 +46,27 @@ History:
 2010-03-12 ROwen    Changed to use Models.getModel.
 2012-07-09 ROwen    Modified to use RO.TkUtil.Timer.
 2012-08-31 ROwen    Bug fix: change sr.isExecuting() to sr.isExecuting.
+2026-10-19 JParejko Compute catalog object positions using TelTarget.Catalog.getAzAltArr,
+                    which converts all objects at once; objects with no position are skipped.
+2026-10-19 JParejko findNearestStar uses a PixPosIndex (a uniform grid) for each catalog,
+                    rebuilt in the background whenever the catalog's positions are recomputed.
+2026-10-19 JParejko Catalogs with at least _RasterMinObjects visible objects are drawn as a single image,
+                    rasterized in the background, instead of one canvas item per object.
+                    The catalog object under the mouse pointer is highlighted with a canvas item.
+2026-10-19 JParejko Update catalog object positions incrementally: x,y positions and rates
+                    (a CatalogMotion) are recomputed every _CatRecomputeInterval seconds,
+                    when the window is resized or when the catalog changes;
+                    in between, positions are extrapolated and only objects whose pixel
+                    position changed are moved (or the image re-rasterized).
+                    PixPosIndex is built from arrays, without per-object Python code.
+2026-10-19 JParejko CatalogMotion uses the catalog's CatalogEphem, if it covers the time interval.
 """
 import math
+import time
+import numpy
 import Tkinter
+from PIL import Image, ImageTk
+import RO.Astro.Tm
 import RO.CanvasUtil
 import RO.CnvUtil
 import RO.MathUtil
@@ -57,6 +75,7 @@ import RO.Wdg
 from opscore.actor import ScriptRunner
 import TUI.Base.Wdg
 import TUI.Models
+import TUI.TCC.CatalogEphem
 import TUI.TCC.UserModel
 import TUI.TCC.SlewWdg.SlewWindow
 
@@ -75,7 +94,10 @@ def addWindow(tlSet):
 _HelpURL = "Telescope/SkyWin.html"
 
 # constants regarding redraw of catalog objects
-_CatRedrawDelay = 5.0
+_CatRedrawDelay = 5.0 # interval between updates of catalog object positions (sec)
+_CatRecomputeInterval = 300.0 # interval between full recomputation of catalog object positions (sec)
+_CatObjRad = 2 # radius of catalog objects (pixels)
+_RasterMinObjects = 1000 # catalogs with at least this many visible objects are drawn as an image
 
 def xyDegFromAzAlt (azAlt):
     """converts a point from az,alt degrees (0 south, 90 east)
@@ -115,11 +137,155 @@ class AzAltTarget(object):
     def __str__(self):
         return "%r %7.2f, %5.2f Mount" % (self.name, self.posAzAlt[0], self.posAzAlt[1])
 
+class PixPosIndex(object):
+    """A uniform grid of catalog objects by pixel position, for quickly finding the nearest object
+
+    Inputs:
+    - xyArr: pixel position of each object: an N x 2 array
+    - objList: list of catalog objects
+    - objIndArr: index into objList of each object in xyArr
+    - cellSize: size of each grid cell (pixels)
+
+    With no arguments the index is empty.
+
+    Building the index takes time proportional to the number of objects
+    (so it is built in the same background thread that computes the pixel positions);
+    findNearest only looks at objects in grid cells near the requested point.
+    """
+    def __init__(self, xyArr=(), objList=(), objIndArr=(), cellSize=8):
+        self.xyArr = numpy.array(xyArr, dtype=float).reshape(-1, 2)
+        self.objList = objList
+        self.objIndArr = numpy.array(objIndArr, dtype=int)
+        self.cellSize = float(cellSize)
+        self._cellDict = {} # dict of (x cell, y cell): array of indices into xyArr
+        if len(self.xyArr) == 0:
+            self._cellLim = None
+            return
+
+        cellArr = numpy.floor(self.xyArr / self.cellSize).astype(int)
+        minCell = cellArr.min(axis=0).tolist()
+        maxCell = cellArr.max(axis=0).tolist()
+        # (min x cell, min y cell, max x cell, max y cell)
+        self._cellLim = tuple(minCell) + tuple(maxCell)
+
+        # sort objects by cell, then split the sorted indices into one array per occupied cell
+        numYCells = maxCell[1] + 1 - minCell[1]
+        cellKeyArr = ((cellArr[:,0] - minCell[0]) * numYCells) + (cellArr[:,1] - minCell[1])
+        sortInd = numpy.argsort(cellKeyArr, kind="mergesort")
+        cellKeys, begInds = numpy.unique(cellKeyArr[sortInd], return_index=True)
+        endInds = numpy.append(begInds[1:], len(sortInd))
+        for cellKey, begInd, endInd in zip(cellKeys.tolist(), begInds.tolist(), endInds.tolist()):
+            cell = ((cellKey // numYCells) + minCell[0], (cellKey % numYCells) + minCell[1])
+            self._cellDict[cell] = sortInd[begInd:endInd]
+
+    def __len__(self):
+        return len(self.xyArr)
+
+    def getPosDict(self):
+        """Return a dict of object index (in objList): pixel position (x, y)
+        """
+        return dict(zip(self.objIndArr.tolist(), [tuple(xy) for xy in self.xyArr.tolist()]))
+
+    def samePos(self, pixIndex):
+        """Return True if pixIndex (another PixPosIndex) contains the same objects at the same positions
+        """
+        if pixIndex is None or len(pixIndex) != len(self):
+            return False
+        return numpy.array_equal(pixIndex.objIndArr, self.objIndArr) \
+            and numpy.array_equal(pixIndex.xyArr, self.xyArr)
+
+    def findNearest(self, xyPix, maxDistSq=9.0e99):
+        """Find the object nearest to xyPix, if within sqrt(maxDistSq) pixels
+
+        Returns (distSq, pixPos, obj), or (None, None, None) if no object found.
+        Objects exactly maxDistSq away are ignored.
+        """
+        if self._cellLim is None:
+            return (None, None, None)
+        ctrCellX = int(math.floor(xyPix[0] / self.cellSize))
+        ctrCellY = int(math.floor(xyPix[1] / self.cellSize))
+        # search rings of cells around the center cell until no closer object is possible
+        maxRing = max(
+            ctrCellX - self._cellLim[0], self._cellLim[2] - ctrCellX,
+            ctrCellY - self._cellLim[1], self._cellLim[3] - ctrCellY,
+        )
+        minDistSq = maxDistSq
+        minInd = None
+        for ring in range(max(maxRing, 0) + 1):
+            # objects in this ring or beyond are at least (ring - 1) * cellSize away
+            if (ring - 1) * self.cellSize > 0 and ((ring - 1) * self.cellSize)**2 >= minDistSq:
+                break
+            indArrList = []
+            for cellX in range(ctrCellX - ring, ctrCellX + ring + 1):
+                if ring == 0 or abs(cellX - ctrCellX) == ring:
+                    cellYList = range(ctrCellY - ring, ctrCellY + ring + 1)
+                else:
+                    cellYList = (ctrCellY - ring, ctrCellY + ring)
+                for cellY in cellYList:
+                    indArr = self._cellDict.get((cellX, cellY))
+                    if indArr is not None:
+                        indArrList.append(indArr)
+            if not indArrList:
+                continue
+            indArr = numpy.concatenate(indArrList)
+            xyArr = self.xyArr[indArr]
+            distSqArr = (xyArr[:,0] - xyPix[0])**2 + (xyArr[:,1] - xyPix[1])**2
+            nearInd = int(numpy.argmin(distSqArr))
+            if distSqArr[nearInd] < minDistSq:
+                minDistSq = float(distSqArr[nearInd])
+                minInd = int(indArr[nearInd])
+        if minInd is None:
+            return (None, None, None)
+        pixPos = tuple(self.xyArr[minInd].tolist())
+        obj = self.objList[self.objIndArr[minInd]]
+        return (minDistSq, pixPos, obj)
+
+
+class CatalogMotion(object):
+    """Positions and rates of motion of all objects in a catalog, for extrapolating positions
+
+    Inputs:
+    - catalog: a TUI.TCC.TelTarget.Catalog
+    - begPySec: start of the time interval (python seconds, as returned by time.time())
+    - duration: length of the time interval (sec)
+
+    Positions are x,y degrees (x east, y north), as returned by xyDegFromAzAlt,
+    rather than az,alt because objects move smoothly in x,y even near the zenith.
+    The rates are computed from the positions at the start and end of the interval,
+    so positions within the interval are interpolated along the chord; for an interval
+    of 300 seconds the error is under 0.01 degrees.
+
+    If the catalog's TUI.TCC.CatalogEphem covers the interval then positions are interpolated from it;
+    otherwise computing the positions takes two calls to catalog.getAzAltArr,
+    so it should be done in a background thread; getXYDegArr is cheap.
+    """
+    def __init__(self, catalog, begPySec, duration):
+        self.objList = catalog.getObjList()
+        self.begPySec = float(begPySec)
+        self.endPySec = self.begPySec + float(duration)
+        ephem = TUI.TCC.CatalogEphem.getCatalogEphem(catalog, doCreate=False)
+        if ephem and ephem.covers(self.begPySec, self.endPySec):
+            self.begXYDegArr = ephem.getXYDegArr(self.begPySec)
+            endXYDegArr = ephem.getXYDegArr(self.endPySec)
+        else:
+            self.begXYDegArr = _xyDegFromAzAltArr(catalog.getAzAltArr(RO.Astro.Tm.utcFromPySec(self.begPySec)))
+            endXYDegArr = _xyDegFromAzAltArr(catalog.getAzAltArr(RO.Astro.Tm.utcFromPySec(self.endPySec)))
+        self.xyDegRateArr = (endXYDegArr - self.begXYDegArr) / float(duration) # deg/sec
+
+    def getXYDegArr(self, pySec):
+        """Return the x,y position of all objects at time pySec, in degrees, as an N x 2 numpy array
+
+        Rows are in the same order as the object list; rows for objects with no position are NaN.
+        """
+        return self.begXYDegArr + (self.xyDegRateArr * (pySec - self.begPySec))
+
+
 class SkyWdg (Tkinter.Frame):
     TELCURRENT = "telCurrent"
     TELTARGET = "telTarget"
     TELPOTENTIAL = "telPotential"
     CATOBJECT = "catObject"
+    CATHIGHLIGHT = "catHighlight"
     AzWrapSpiralDRad = 10
     AzWrapItemRad = 3
     AzWrapMargin = 5
@@ -181,12 +347,17 @@ class SkyWdg (Tkinter.Frame):
         
         # various dictionaries whose keys are catalog name
         # note: if a catalog is deleted, it is removed from catDict
-        # and catPixPosObjDict, but not necessarily the others
+        # and catPixIndexDict, but not necessarily the others
         self.catDict = {}   # key=catalog name, value = catalog
         self.catRedrawTimerDict = {}    # key=catalog name, value = tk after id
         self.catColorDict = {}  # key=catalog name, value = color
-        self.catPixPosObjDict = {}  # key=catalog name, value = list of (pix pos, obj) pairs
+        self.catPixIndexDict = {}   # key=catalog name, value = PixPosIndex of the displayed objects
         self.catSRDict = {} # key=catalog name, value = scriptrunner script to redisplay catalog
+        self.catImageDict = {} # key=catalog name, value = PhotoImage of catalog objects (if rasterized)
+        self.catMotionDict = {} # key=catalog name, value = CatalogMotion used to update object positions
+        # key=catalog name, value = dict of object index: canvas item ID, or None if rasterized;
+        # a catalog that is missing must be redrawn from scratch
+        self.catItemDict = {}
 
         self.telCurrent = None
         self.telTarget = None
@@ -229,18 +400,30 @@ class SkyWdg (Tkinter.Frame):
 
     def _enterStar(self, event):
         xyPix = (event.x, event.y)
-        catObj = self.findNearestStar(xyPix, maxDistSq = 25.0)
+        catName, pixPos, catObj = self._findNearest(xyPix, maxDistSq = 25.0)
+        self.cnv.delete(SkyWdg.CATHIGHLIGHT)
         if catObj:
             self.currStarMsgID = self.currStarDisp.setMsg(
                 msgStr = str(catObj),
                 isTemp = True,
             )
+            # highlight the object with a canvas item, since it may be part of a catalog image
+            color = self.catColorDict.get(catName)
+            rad = _CatObjRad + 2
+            self.cnv.create_oval(
+                pixPos[0] - rad,     pixPos[1] - rad,
+                pixPos[0] + rad + 1, pixPos[1] + rad + 1,
+                tag = SkyWdg.CATHIGHLIGHT,
+                fill = color,
+                outline = color,
+            )
         else:
             self.currStarMsgID = self.currStarDisp.clearTempMsg(self.currStarMsgID)
         
     def _leaveStar(self, event):
         self.currStarMsgID = self.currStarDisp.clearTempMsg(self.currStarMsgID)
         self.currCatObjID = None
+        self.cnv.delete(SkyWdg.CATHIGHLIGHT)
 
     def _setSize(self):
         # size and center of canvas
@@ -356,7 +539,7 @@ class SkyWdg (Tkinter.Frame):
             self.removeCatalogByName(catName)
         
         self.catDict[catName] = catalog
-        self.catPixPosObjDict[catName] = []
+        self.catPixIndexDict[catName] = PixPosIndex()
         self.catRedrawTimerDict[catName] = Timer()
         self.catColorDict[catName] = catalog.getDispColor()
         
@@ -364,9 +547,13 @@ class SkyWdg (Tkinter.Frame):
             catName = catalog.name
             
             catTag = "cat_%s" % (catName,)
+            catOvalTag = "catOval_%s" % (catName,) # catalog objects drawn as individual canvas items
             
             if not catalog.getDoDisplay():
-                self.catPixPosObjDict[catName] = []
+                self.catPixIndexDict[catName] = PixPosIndex()
+                self.catImageDict.pop(catName, None)
+                self.catMotionDict.pop(catName, None)
+                self.catItemDict.pop(catName, None)
                 self.cnv.delete(catTag)
                 return
     
@@ -374,33 +561,74 @@ class SkyWdg (Tkinter.Frame):
             color = catalog.getDispColor()
             oldColor = self.catColorDict.get(catName)
             if color != oldColor:
-                self.cnv.itemconfigure(catTag, fill = color, outline = color)
+                self.cnv.itemconfigure(catOvalTag, fill = color, outline = color)
                 self.catColorDict[catName] = color
+            
+            # compute az/alt positions and rates from scratch, if necessary
+            motion = self.catMotionDict.get(catName)
+            if motion is None or time.time() > motion.endPySec:
+#               print "compute %s motion thread starting" % catName
+                yield sr.waitThread(CatalogMotion, catalog, time.time(), _CatRecomputeInterval)
+                motion = sr.value
+                self.catMotionDict[catName] = motion
                 
-#           print "compute %s thread starting" % catName
-            yield sr.waitThread(_UpdateCatalog, catalog.objList, self.center, self.azAltScale)
-            pixPosObjList = sr.value
-#           print "compute %s thread done" % catName
-
-            catName = catalog.name
-            catTag = "cat_%s" % (catName,)
-    
-            self.catPixPosObjDict[catName] = []
-            self.cnv.delete(catTag)
-    
-            color = catalog.getDispColor()      
-            rad = 2 # for now, eventually may wish to vary by magnitude or window size or...?
-            for pixPos, obj in pixPosObjList:
-                self.cnv.create_oval(
-                    pixPos[0] - rad,     pixPos[1] - rad,
-                    pixPos[0] + rad + 1, pixPos[1] + rad + 1,
-                    tag = (SkyWdg.CATOBJECT, catTag),
-                    fill = color,
-                    outline = color,
-                )
-            self.catPixPosObjDict[catName] = pixPosObjList
+            yield sr.waitThread(_UpdateCatalog, motion, time.time(), tuple(self.center), self.azAltScale)
+            pixIndex = sr.value
+
+            oldPixIndex = self.catPixIndexDict.get(catName)
+            isDrawn = catName in self.catItemDict
+            itemDict = self.catItemDict.get(catName)
+            if len(pixIndex) >= _RasterMinObjects:
+                # draw the catalog as an image, unless nothing has moved
+                if not isDrawn or itemDict is not None or not pixIndex.samePos(oldPixIndex):
+                    cnvSize = (self.cnv.winfo_width(), self.cnv.winfo_height())
+                    rgb = [val // 256 for val in self.cnv.winfo_rgb(color)]
+                    yield sr.waitThread(_RasterizeCatalog, pixIndex.xyArr, cnvSize, rgb)
+                    pilImage = sr.value
+
+                    self.cnv.delete(catTag)
+                    photoImage = ImageTk.PhotoImage(pilImage)
+                    self.cnv.create_image(0, 0,
+                        anchor = "nw",
+                        image = photoImage,
+                        tag = (SkyWdg.CATOBJECT, catTag),
+                    )
+                    self.catImageDict[catName] = photoImage # keep a reference or the image is erased
+                    self.catItemDict[catName] = None
+            else:
+                # draw the catalog as one canvas item per object, moving only the objects that have moved
+                if not isDrawn or itemDict is None:
+                    self.cnv.delete(catTag)
+                    self.catImageDict.pop(catName, None)
+                    itemDict = {}
+                    oldPosDict = {}
+                else:
+                    oldPosDict = oldPixIndex.getPosDict()
+                newPosDict = pixIndex.getPosDict()
+                for objInd in set(oldPosDict) - set(newPosDict):
+                    self.cnv.delete(itemDict.pop(objInd))
+                rad = _CatObjRad # for now, eventually may wish to vary by magnitude or window size or...?
+                for objInd, pixPos in newPosDict.iteritems():
+                    oldPixPos = oldPosDict.get(objInd)
+                    if pixPos == oldPixPos:
+                        continue
+                    coords = (
+                        pixPos[0] - rad,     pixPos[1] - rad,
+                        pixPos[0] + rad + 1, pixPos[1] + rad + 1,
+                    )
+                    if oldPixPos is None:
+                        itemDict[objInd] = self.cnv.create_oval(coords,
+                            tag = (SkyWdg.CATOBJECT, catTag, catOvalTag),
+                            fill = color,
+                            outline = color,
+                        )
+                    else:
+                        self.cnv.coords(itemDict[objInd], *coords)
+                self.catItemDict[catName] = itemDict
+            self.cnv.tag_raise(SkyWdg.CATHIGHLIGHT)
+            self.catPixIndexDict[catName] = pixIndex
             
-            self.catRedrawTimerDict[catName].start(_CatRedrawDelay, self._drawCatalog, catalog)
+            self.catRedrawTimerDict[catName].start(_CatRedrawDelay, self._updateCatalog, catalog)
         
         sr = ScriptRunner(
             runFunc = updateCat,
@@ -439,7 +667,7 @@ class SkyWdg (Tkinter.Frame):
         timer.cancel()
         
         # delete entry in other catalog dictionaries
-        for catDict in self.catPixPosObjDict, self.catColorDict:
+        for catDict in self.catPixIndexDict, self.catImageDict, self.catColorDict, self.catMotionDict, self.catItemDict:
             try:
                 del catDict[catName]
             except KeyError:
@@ -449,15 +677,20 @@ class SkyWdg (Tkinter.Frame):
         """Finds the catalog object nearest to xyPix, but only if
         the squared distance is within maxDistSq deg^2
         Returns the catalog object, or None if none found"""
-        minStar = None
+        return self._findNearest(xyPix, maxDistSq)[2]
+
+    def _findNearest(self, xyPix, maxDistSq=9.0e99):
+        """Find the catalog object nearest to xyPix, but only if
+        the squared distance is within maxDistSq deg^2
+        Returns (catalog name, pixPos, obj), or (None, None, None) if none found"""
+        minNearest = (None, None, None)
         minDistSq = maxDistSq
-        for pixPosCatObjList in self.catPixPosObjDict.itervalues():
-            for objPixPos, catObj in pixPosCatObjList:
-                distSq = (objPixPos[0] - xyPix[0])**2 + (objPixPos[1] - xyPix[1])**2
-                if distSq < minDistSq:
-                    minStar = catObj
-                    minDistSq = distSq
-        return minStar
+        for catName, pixIndex in self.catPixIndexDict.iteritems():
+            distSq, pixPos, catObj = pixIndex.findNearest(xyPix, minDistSq)
+            if catObj is not None:
+                minNearest = (catName, pixPos, catObj)
+                minDistSq = distSq
+        return minNearest
     
     def pixFromAzAlt(self, azAlt):
         """Convert a point from az,alt degrees (0 south, 90 east)
@@ -530,16 +763,29 @@ class SkyWdg (Tkinter.Frame):
     def _drawAllCatalogs(self):
         """Draw all objects in all catalogs, erasing all stars first.
         """
-        self.catPixPosObjDict = {}
+        self.catPixIndexDict = {}
+        self.catImageDict = {}
+        self.catItemDict = {}
         self.cnv.delete(SkyWdg.CATOBJECT)
         for catalog in self.catDict.itervalues():
             self._drawCatalog(catalog)
             
     def _drawCatalog(self, catalog):
-        """Draw the next portion of a catalog.
-        subind=0 for the first portion, 1 for the next, etc.
+        """Recompute the positions of all objects in a catalog and redraw it from scratch.
         """
 #       print "_drawCatalog(%r)" % (catalog.name)
+        self.catMotionDict.pop(catalog.name, None)
+        self.catItemDict.pop(catalog.name, None)
+        self._updateCatalog(catalog)
+
+    def _updateCatalog(self, catalog):
+        """Update the positions of the objects in a catalog.
+
+        Positions are extrapolated using the catalog's CatalogMotion
+        (which is recomputed every _CatRecomputeInterval seconds)
+        and only objects whose pixel position has changed are redrawn.
+        """
+#       print "_updateCatalog(%r)" % (catalog.name)
 
         catName = catalog.name
         
@@ -651,25 +897,62 @@ class SkyWdg (Tkinter.Frame):
         self._telPotentialAnimTimer.start(_CatRedrawDelay, self._drawTelPotential)
 
 
-def _UpdateCatalog(objList, center, azAltScale):
-    """Returns a list of [pixPos, obj] for the specified catalog.
+def _UpdateCatalog(motion, pySec, center, azAltScale):
+    """Returns a PixPosIndex of the objects in a catalog at time pySec
+    (python seconds, as returned by time.time()).
+    Objects below the horizon or with no position are omitted.
+    Pixel positions are rounded to the nearest integer, so unmoved objects can be recognized.
+
+    Inputs:
+    - motion: a CatalogMotion for the catalog
+    - pySec: time at which to compute positions; should be in the time range covered by motion
+    - center: position of center of canvas (pixels)
+    - azAltScale: scale of canvas (pixels/deg)
+
     Can be run as a background thread.
     """
-    pixPosObjList = []
-    for catObj in objList:
-        azAlt = catObj.getAzAlt()
-        if azAlt[1] < 0:
-            continue
-        
-        xyDeg = xyDegFromAzAlt(azAlt)
-        pixPos = (
-            center[0] - (xyDeg[0] * azAltScale),
-            center[1] - (xyDeg[1] * azAltScale),
-        )
+    xyDegArr = motion.getXYDegArr(pySec)
+    # objects above the horizon are within 90 degrees of the center
+    with numpy.errstate(invalid="ignore"):
+        indArr = numpy.nonzero((xyDegArr[:,0]**2) + (xyDegArr[:,1]**2) <= 90.0**2)[0]
+    # same as pixFromDeg, but for all objects at once
+    xyArr = numpy.array(center, dtype=float) - (xyDegArr[indArr] * azAltScale)
+    return PixPosIndex(numpy.floor(xyArr + 0.5), motion.objList, indArr)
+
+def _xyDegFromAzAltArr(azAltArr):
+    """Same as xyDegFromAzAlt, but for an N x 2 array of az,alt positions; returns an N x 2 array
+    """
+    thetaRad = numpy.radians(azAltArr[:,0] - 90.0)
+    r = 90.0 - azAltArr[:,1]
+    return numpy.column_stack((r * numpy.cos(thetaRad), r * numpy.sin(thetaRad)))
 
-        pixPosObjList.append((pixPos, catObj))
+def _RasterizeCatalog(xyArr, cnvSize, rgb):
+    """Returns a PIL RGBA image of the canvas showing the catalog objects as dots
+    (like the ovals drawn for small catalogs); pixels without objects are transparent.
 
-    return pixPosObjList
+    Inputs:
+    - xyArr: pixel position of each object, as an N x 2 array (e.g. PixPosIndex.xyArr)
+    - cnvSize: size of the canvas (pixels), including the border
+    - rgb: color of the objects as R, G, B (each 0-255)
+
+    Can be run as a background thread (it does not use Tkinter).
+    """
+    width, height = [max(int(val), 1) for val in cnvSize]
+    rgbaArr = numpy.zeros((height, width, 4), dtype=numpy.uint8)
+    if len(xyArr) > 0:
+        xyArr = numpy.asarray(xyArr, dtype=float)
+        xArr = numpy.floor(xyArr[:,0] + 0.5).astype(int)
+        yArr = numpy.floor(xyArr[:,1] + 0.5).astype(int)
+        rgba = numpy.array(tuple(rgb) + (255,), dtype=numpy.uint8)
+        for dx in range(-_CatObjRad, _CatObjRad + 1):
+            for dy in range(-_CatObjRad, _CatObjRad + 1):
+                if dx**2 + dy**2 > _CatObjRad**2 + 1:
+                    continue
+                dotX = xArr + dx
+                dotY = yArr + dy
+                isIn = (dotX >= 0) & (dotX < width) & (dotY >= 0) & (dotY < height)
+                rgbaArr[dotY[isIn], dotX[isIn]] = rgba
+    return Image.fromarray(rgbaArr, "RGBA")
 
 if __name__ == '__main__':
     import random
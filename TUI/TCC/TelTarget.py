@@ -14,16 +14,29 @@ History:
 2004-08-10 ROwen    Modified to use RO.Wdg.colorOK.
 2005-06-08 ROwen    Changed TelTarget to a new-style class.
 2005-07-07 ROwen    Modified for moved RO.TkUtil.
+2026-10-19 JParejko Added Catalog.getAzAltArr, which converts all objects in a catalog at once
+                    using numpy; per-object constants are computed once and cached as arrays.
+                    Added an optional date argument to TelTarget.getAzAlt.
+2026-10-19 JParejko Added Catalog.getAzAltTrackArr, which computes az/alt at many dates,
+                    using a pool of worker processes for objects in mean coordinate systems.
+2026-10-19 JParejko Documented that GUI code must call getAzAltTrackArr with numProc=1.
+2026-10-19 JParejko Changed the default numProc of getAzAltTrackArr to 1, so worker processes are opt-in.
 """
+import multiprocessing
 import sys
+import threading
 import time
+import numpy
 import RO.AddCallback
 import RO.SeqUtil
 import RO.StringUtil
 import RO.Astro.Cnv
 import RO.Astro.Sph
+import RO.Astro.llv
+import RO.Astro.Tm
 import RO.CoordSys
 import RO.MathUtil
+import RO.PhysConst
 import RO.TkUtil
 import TelConst
 
@@ -46,8 +59,12 @@ class TelTarget(object):
     def __init__(self, valueDict=None):
         self.setValueDict(valueDict)
 
-    def getAzAlt(self):
-        """Returns the current (az, alt) of the object, in degrees"""
+    def getAzAlt(self, date=None):
+        """Returns the (az, alt) of the object, in degrees
+
+        Inputs:
+        - date: date (UT1 MJD); if None then the current date
+        """
         if self.csysConst == None:
             return None
             
@@ -56,7 +73,7 @@ class TelTarget(object):
             fromSys = self.csysConst.name(),
             fromDate = self.dateFloat,
             toSys = self.TopoConst.name(),
-            toDate = None,
+            toDate = date,
             obsData = self.ObsData,
             fromPM = self.pm,
             fromParlax = self.parlax,
@@ -158,6 +175,227 @@ class TelTarget(object):
             csysStr = "=".join((csysStr, self.dateStr))
         return "%r %s, %s %s" % (self.name, self.posStr[0], self.posStr[1], csysStr)
 
+# constants for converting spherical to cartesian position and velocity;
+# these match RO.Astro.Sph.ccFromSCPV
+_MinParallax = 1.0e-7  # arcsec
+_RadPerYear_per_ASPerCy = RO.PhysConst.RadPerDeg / (RO.PhysConst.ArcSecPerDeg * 100.0)
+_AUPerYear_per_KMPerSec = RO.PhysConst.SecPerDay * RO.PhysConst.DayPerYear / RO.PhysConst.KmPerAU
+
+# mean coordinate systems handled by Catalog.getAzAltArr using numpy;
+# objects in other coordinate systems are converted one at a time
+_ArrCSysSet = set((RO.CoordSys.ICRS, RO.CoordSys.FK5, RO.CoordSys.FK4, RO.CoordSys.Galactic))
+
+def _ccFromSCPVArr(posArr, pmArr, parlaxArr, radVelArr):
+    """Array version of RO.Astro.Sph.ccFromSCPV
+    
+    Inputs:
+    - posArr: spherical positions (deg), an N x 2 array
+    - pmArr: proper motions ("/century), an N x 2 array
+    - parlaxArr: parallaxes (arcsec), an N array
+    - radVelArr: radial velocities (km/s, positive receding), an N array
+    
+    Returns p, v: cartesian positions (au) and velocities (au/year), each an N x 3 array
+    """
+    atInf = parlaxArr < _MinParallax
+    parlaxArr = numpy.where(atInf, _MinParallax, parlaxArr)
+    radVelArr = numpy.where(atInf, 0.0, radVelArr)
+    distAU = RO.PhysConst.AUPerParsec / parlaxArr
+
+    posRad = numpy.radians(posArr)
+    sinP0 = numpy.sin(posRad[:,0])
+    cosP0 = numpy.cos(posRad[:,0])
+    sinP1 = numpy.sin(posRad[:,1])
+    cosP1 = numpy.cos(posRad[:,1])
+
+    p = numpy.column_stack((cosP1 * cosP0, cosP1 * sinP0, sinP1)) * distAU[:,numpy.newaxis]
+
+    pmAUPerYr0 = pmArr[:,0] * distAU * _RadPerYear_per_ASPerCy
+    pmAUPerYr1 = pmArr[:,1] * distAU * _RadPerYear_per_ASPerCy
+    radVelAUPerYr = radVelArr * _AUPerYear_per_KMPerSec
+    v = numpy.column_stack((
+        - pmAUPerYr0*cosP1*sinP0 - pmAUPerYr1*sinP1*cosP0 + radVelAUPerYr*cosP1*cosP0,
+          pmAUPerYr0*cosP1*cosP0 - pmAUPerYr1*sinP1*sinP0 + radVelAUPerYr*cosP1*sinP0,
+                                   pmAUPerYr1*cosP1       + radVelAUPerYr*sinP1,
+    ))
+    return p, v
+
+def _azAltFromICRS2000Arr(p, v, date, obsData):
+    """Array version of converting ICRS at epoch 2000 to topocentric az/alt
+    
+    Performs the same steps as RO.Astro.Cnv.coordConv (geoFromICRS, then topoFromGeo)
+    followed by RO.Astro.Sph.scFromCC, but for many objects at once.
+    
+    Inputs:
+    - p: ICRS cartesian positions at epoch 2000 (au), an N x 3 array
+    - v: ICRS cartesian velocities (au/year), an N x 3 array
+    - date: date (UT1 MJD)
+    - obsData: an RO.Astro.Cnv.ObserverData object
+    
+    Returns (az, alt) in degrees as an N x 2 array, with az in the range [0, 360)
+    """
+    # geocentric apparent position; see RO.Astro.Cnv.geoFromICRS
+    agData = RO.Astro.Cnv.AppGeoData(RO.Astro.Tm.epJFromMJD(date))
+    p2 = p + (v * agData.dtPM) - agData.bPos
+    p2Mag = numpy.sqrt(numpy.sum(p2**2, axis=1))
+    dot2 = numpy.dot(p2, agData.bVelC) / p2Mag
+    vfac = p2Mag * (1.0 + dot2 / (1.0 + agData.bGamma))
+    p3 = ((p2 * agData.bGamma) + (vfac[:,numpy.newaxis] * agData.bVelC)) / (1.0 + dot2)[:,numpy.newaxis]
+    geoP = numpy.dot(p3, numpy.transpose(agData.pnMat))
+
+    # topocentric position; see RO.Astro.Cnv.topoFromGeo
+    last = RO.Astro.Tm.lastFromUT1(date, obsData.longitude)
+    sinLAST = RO.MathUtil.sind(last)
+    cosLAST = RO.MathUtil.cosd(last)
+    posB = numpy.column_stack((
+         cosLAST * geoP[:,0] + sinLAST * geoP[:,1],
+        -sinLAST * geoP[:,0] + cosLAST * geoP[:,1],
+         geoP[:,2],
+    )) - obsData.p
+    bMag = numpy.sqrt(numpy.sum(posB**2, axis=1))
+    diurAbScaleCorr = 1.0 - (obsData.diurAbVecMag * posB[:,1] / bMag)
+    posC0 = posB[:,0] * diurAbScaleCorr
+    posC1 = (posB[:,1] + (obsData.diurAbVecMag * bMag)) * diurAbScaleCorr
+    posC2 = posB[:,2] * diurAbScaleCorr
+
+    # az/alt; see RO.Astro.Cnv.azAltFromHADec and RO.Astro.Sph.scFromCC
+    sinLat = RO.MathUtil.sind(obsData.latitude)
+    cosLat = RO.MathUtil.cosd(obsData.latitude)
+    x = sinLat * posC0 - cosLat * posC2
+    y = posC1
+    z = cosLat * posC0 + sinLat * posC2
+    az = numpy.degrees(numpy.arctan2(y, x))
+    az = numpy.where(az < 0.0, az + 360.0, az)
+    alt = numpy.degrees(numpy.arctan2(z, numpy.sqrt(x**2 + y**2)))
+    return numpy.column_stack((az, alt))
+
+def _azAltTrackFromICRS2000Arr(args):
+    """Compute az/alt of many objects at several dates
+
+    Inputs: a single tuple (so this may be used with multiprocessing.Pool.map) containing:
+    - p: ICRS cartesian positions at epoch 2000 (au), an N x 3 array
+    - v: ICRS cartesian velocities (au/year), an N x 3 array
+    - dateList: M dates (UT1 MJD)
+    - obsData: an RO.Astro.Cnv.ObserverData object
+
+    Returns (az, alt) in degrees as an N x M x 2 float32 array
+    """
+    p, v, dateList, obsData = args
+    trackArr = numpy.empty((len(p), len(dateList), 2), dtype=numpy.float32)
+    for dateInd, date in enumerate(dateList):
+        trackArr[:, dateInd, :] = _azAltFromICRS2000Arr(p, v, date, obsData)
+    return trackArr
+
+class _CatalogCnvData(object):
+    """Per-object constants used by Catalog.getAzAltArr
+    
+    Objects in mean coordinate systems (see _ArrCSysSet) are converted to ICRS cartesian
+    position and velocity, precessed (if FK5) or rotated (if Galactic) but not yet
+    corrected for proper motion, so that the ICRS position at epoch 2000 is:
+        pos + vel * (2000 - epoch)
+    
+    Attributes:
+    - arrInd: indices (into the object list) of objects converted as arrays
+    - pos: ICRS cartesian positions (au), an N x 3 array
+    - vel: ICRS cartesian velocities (au/year), an N x 3 array
+    - epoch: Julian epoch of each position, an N array; NaN means the current date
+    - otherInd: indices of objects converted one at a time
+        (apparent coordinate systems and objects that are not TelTargets);
+        objects with no position are in neither list
+    - numObj: number of objects in the list
+    """
+    def __init__(self, objList):
+        self.numObj = len(objList)
+        self.otherInd = []
+        arrIndList = []
+        csysList = []
+        dateList = []
+        posList = []
+        pmList = []
+        parlaxList = []
+        radVelList = []
+        for ind, obj in enumerate(objList):
+            if not isinstance(obj, TelTarget):
+                self.otherInd.append(ind)
+                continue
+            if obj.csysConst is None:
+                continue
+            csys = obj.csysConst.name()
+            if csys not in _ArrCSysSet:
+                self.otherInd.append(ind)
+                continue
+            arrIndList.append(ind)
+            csysList.append(csys)
+            dateList.append(obj.dateFloat)
+            posList.append(obj.posDeg)
+            pmList.append(obj.pm)
+            parlaxList.append(obj.parlax)
+            radVelList.append(obj.radVel)
+        self.arrInd = numpy.array(arrIndList, dtype=int)
+        numArr = len(arrIndList)
+        if numArr == 0:
+            self.pos = numpy.zeros((0, 3))
+            self.vel = numpy.zeros((0, 3))
+            self.epoch = numpy.zeros(0)
+            return
+
+        self.pos, self.vel = _ccFromSCPVArr(
+            numpy.array(posList, dtype=float),
+            numpy.array(pmList, dtype=float),
+            numpy.array(parlaxList, dtype=float),
+            numpy.array(radVelList, dtype=float),
+        )
+        self.epoch = numpy.empty(numArr)
+        csysArr = numpy.array(csysList)
+        for csys in _ArrCSysSet:
+            isCSys = csysArr == csys
+            if not numpy.any(isCSys):
+                continue
+            defDate = None
+            if csys != RO.CoordSys.Galactic:
+                defDate = RO.CoordSys.getSysConst(csys).currDefaultDate()
+            for ind in numpy.nonzero(isCSys)[0]:
+                date = dateList[ind]
+                if date is None:
+                    date = defDate
+                self.epoch[ind] = numpy.nan if date is None else date
+            if csys == RO.CoordSys.FK5:
+                for date in numpy.unique(self.epoch[isCSys]):
+                    isDate = isCSys & (self.epoch == date)
+                    rotMat = numpy.transpose(RO.Astro.llv.prec(date, 2000.0))
+                    self.pos[isDate] = numpy.dot(self.pos[isDate], rotMat)
+                    self.vel[isDate] = numpy.dot(self.vel[isDate], rotMat)
+            elif csys == RO.CoordSys.Galactic:
+                rotMat = numpy.transpose(_getGalRotMat())
+                self.pos[isCSys] = numpy.dot(self.pos[isCSys], rotMat)
+                self.vel[isCSys] = numpy.dot(self.vel[isCSys], rotMat)
+            elif csys == RO.CoordSys.FK4:
+                # FK4 conversion is not a rotation; convert to ICRS at 2000 one at a time
+                for ind in numpy.nonzero(isCSys)[0]:
+                    self.pos[ind], self.vel[ind] = RO.Astro.Cnv.coordConv(
+                        self.pos[ind], self.vel[ind], csys, self.epoch[ind], RO.CoordSys.ICRS, 2000.0)
+                self.epoch[isCSys] = 2000.0
+
+    def getPos2000(self):
+        """Return ICRS cartesian positions at epoch 2000 (au) of the objects in arrInd, as an N x 3 array
+        """
+        epoch = self.epoch
+        if numpy.any(numpy.isnan(epoch)):
+            currEpoch = RO.CoordSys.getSysConst(RO.CoordSys.Galactic).currDefaultDate()
+            epoch = numpy.where(numpy.isnan(epoch), currEpoch, epoch)
+        return self.pos + (self.vel * (2000.0 - epoch)[:,numpy.newaxis])
+
+_GalRotMat = None
+
+def _getGalRotMat():
+    """Return the matrix that rotates Galactic cartesian coordinates to ICRS
+    """
+    global _GalRotMat
+    if _GalRotMat is None:
+        zeroV = numpy.zeros(3)
+        _GalRotMat = numpy.column_stack([RO.Astro.Cnv.icrsFromGal(unitV, zeroV, 2000.0)[0]
+            for unitV in numpy.identity(3)])
+    return _GalRotMat
+
 class Catalog(RO.AddCallback.BaseMixin):
     """A catalog of TelTarget objects.
     
@@ -186,6 +424,8 @@ class Catalog(RO.AddCallback.BaseMixin):
         if not RO.SeqUtil.isSequence(objList):
             raise RuntimeError("objList=%r; must be a sequence" % objList)
         self.objList = objList
+        self._cnvData = None
+        self._cnvLock = threading.Lock()
 
         self.setDoDisplay(doDisplay)
         self.setDispColor(dispColor)
@@ -203,6 +443,89 @@ class Catalog(RO.AddCallback.BaseMixin):
         """
         return self._doDisplay
     
+    def getAzAltArr(self, date=None):
+        """Return the (az, alt) of all objects, in degrees, as an N x 2 numpy array
+
+        Inputs:
+        - date: date (UT1 MJD); if None then the current date
+
+        Rows are in the same order as the object list; rows for objects with no position are NaN.
+        The result matches calling getAzAlt for each object, but objects in mean coordinate systems
+        are converted all at once using numpy. The per-object constants are computed
+        the first time this is called (or if the length of the object list changes) and cached.
+
+        May be called from a background thread.
+        """
+        if date is None:
+            date = TelTarget.TopoConst.currDefaultDate()
+        cnvData = self._getCnvData()
+        azAltArr = numpy.empty((cnvData.numObj, 2))
+        azAltArr.fill(numpy.nan)
+        if len(cnvData.arrInd) > 0:
+            azAltArr[cnvData.arrInd] = _azAltFromICRS2000Arr(
+                cnvData.getPos2000(), cnvData.vel, date, TelTarget.ObsData)
+        for ind in cnvData.otherInd:
+            obj = self.objList[ind]
+            if isinstance(obj, TelTarget):
+                azAlt = obj.getAzAlt(date)
+            else:
+                azAlt = obj.getAzAlt()
+            if azAlt is not None:
+                azAltArr[ind] = azAlt
+        return azAltArr
+
+    def getAzAltTrackArr(self, dateList, numProc=1):
+        """Return the (az, alt) of all objects at each of several dates, in degrees, as an N x M x 2 float32 array
+
+        Inputs:
+        - dateList: M dates (UT1 MJD)
+        - numProc: number of worker processes used to convert objects in mean coordinate systems;
+            if None then the number of CPUs; if <= 1 then everything is computed in this process.
+            Worker processes are forked, which is not safe in a running Tk application
+            (Python 2 has no "spawn" start method and forked children may hang on MacOS),
+            so specify more than 1 (or None) only from scripts and the command line.
+
+        Element [i, j] is the position of object i at dateList[j]; it is NaN for objects with no position.
+        Takes about M times as long as getAzAltArr (divided by the number of processes),
+        so call it from a background thread.
+        """
+        dateList = [float(date) for date in dateList]
+        cnvData = self._getCnvData()
+        trackArr = numpy.empty((cnvData.numObj, len(dateList), 2), dtype=numpy.float32)
+        trackArr.fill(numpy.nan)
+        if len(cnvData.arrInd) > 0 and dateList:
+            if numProc is None:
+                numProc = multiprocessing.cpu_count()
+            numProc = max(1, min(numProc, len(dateList)))
+            pos2000 = cnvData.getPos2000()
+            # split the dates into one contiguous chunk per process
+            chunkBegInds = [(len(dateList) * procInd) // numProc for procInd in range(numProc + 1)]
+            argsList = [(pos2000, cnvData.vel, dateList[begInd:endInd], TelTarget.ObsData)
+                for begInd, endInd in zip(chunkBegInds[:-1], chunkBegInds[1:])]
+            if numProc > 1:
+                pool = multiprocessing.Pool(numProc)
+                try:
+                    chunkTrackList = pool.map(_azAltTrackFromICRS2000Arr, argsList)
+                    pool.close()
+                except:
+                    pool.terminate()
+                    raise
+                finally:
+                    pool.join()
+            else:
+                chunkTrackList = map(_azAltTrackFromICRS2000Arr, argsList)
+            trackArr[cnvData.arrInd] = numpy.concatenate(chunkTrackList, axis=1)
+        for ind in cnvData.otherInd:
+            obj = self.objList[ind]
+            for dateInd, date in enumerate(dateList):
+                if isinstance(obj, TelTarget):
+                    azAlt = obj.getAzAlt(date)
+                else:
+                    azAlt = obj.getAzAlt()
+                if azAlt is not None:
+                    trackArr[ind, dateInd] = azAlt
+        return trackArr
+
     def getObjList(self):
         """Return the object list.
 
@@ -233,3 +556,80 @@ class Catalog(RO.AddCallback.BaseMixin):
 #       print "setDoDisplay(%r)" % (doDisplay,)
         self._doDisplay = bool(doDisplay)
         self._doCallbacks()
+
+    def _getCnvData(self):
+        """Return cached _CatalogCnvData for the object list, computing it if necessary
+        """
+        self._cnvLock.acquire()
+        try:
+            if self._cnvData is None or self._cnvData.numObj != len(self.objList):
+                self._cnvData = _CatalogCnvData(self.objList)
+            return self._cnvData
+        finally:
+            self._cnvLock.release()
+
+
+if __name__ == "__main__":
+    # compare Catalog.getAzAltArr to TelTarget.getAzAlt and time both
+    import random
+    
+    MaxErrArcSec = 0.001
+    CSysList = (
+        RO.CoordSys.ICRS, RO.CoordSys.FK5, RO.CoordSys.FK4, RO.CoordSys.Galactic,
+        RO.CoordSys.Geocentric, RO.CoordSys.Observed,
+    )
+
+    date = TelTarget.TopoConst.currDefaultDate()
+
+    def makeObjList(numObj, csysList=CSysList):
+        objList = []
+        for ind in range(numObj):
+            csys = random.choice(csysList)
+            valueDict = dict(
+                Name = "obj%d" % (ind,),
+                ObjPos = ("%0.6f" % (random.random() * 24.0,), "%0.6f" % (random.random() * 180.0 - 90.0,)),
+                CSys = csys,
+                Date = random.choice(("", "1975.5", "2010.25")),
+                PM = ("%0.3f" % (random.gauss(0, 10),), "%0.3f" % (random.gauss(0, 10),)),
+                Px = random.choice(("", "0.0", "0.5")),
+                Rv = random.choice(("", "30.0")),
+            )
+            if csys in (RO.CoordSys.Geocentric, RO.CoordSys.Observed):
+                # specify the date, else the result depends on when getAzAlt is called
+                valueDict["Date"] = "%0.8f" % (date,)
+            objList.append(TelTarget(valueDict))
+        return objList
+
+    catalog = Catalog("test", makeObjList(2000))
+    azAltArr = catalog.getAzAltArr(date)
+    nFailures = 0
+    maxErrArcSec = 0.0
+    for obj, azAlt in zip(catalog.getObjList(), azAltArr):
+        scalarAzAlt = obj.getAzAlt(date)
+        azErr = RO.MathUtil.wrapCtr(azAlt[0] - scalarAzAlt[0]) * RO.MathUtil.cosd(scalarAzAlt[1])
+        altErr = azAlt[1] - scalarAzAlt[1]
+        errArcSec = max(abs(azErr), abs(altErr)) * RO.PhysConst.ArcSecPerDeg
+        maxErrArcSec = max(maxErrArcSec, errArcSec)
+        if errArcSec > MaxErrArcSec:
+            print "failed on %s: scalar az/alt=%s; array az/alt=%s; error=%0.4f arcsec" % \
+                (obj, scalarAzAlt, azAlt, errArcSec)
+            nFailures += 1
+    print "%d failures in %d objects; max error = %0.2g arcsec" % (nFailures, len(azAltArr), maxErrArcSec)
+
+    numScalar = 1000
+    scalarObjList = makeObjList(numScalar, CSysList[0:4])
+    startTime = time.time()
+    for obj in scalarObjList:
+        obj.getAzAlt(date)
+    scalarSec = (time.time() - startTime) / numScalar
+    print "getAzAlt: %0.1f usec/object" % (scalarSec * 1.0e6,)
+    for numObj in (1000, 10000, 100000):
+        catalog = Catalog("test", makeObjList(numObj, CSysList[0:4]))
+        startTime = time.time()
+        catalog.getAzAltArr(date)
+        firstSec = time.time() - startTime
+        startTime = time.time()
+        catalog.getAzAltArr(date)
+        nextSec = time.time() - startTime
+        print "getAzAltArr for %6d objects: first %0.3f sec, later %0.4f sec; getAzAlt would take %0.2f sec" % \
+            (numObj, firstSec, nextSec, scalarSec * numObj)
@@ -4,25 +4,223 @@
 2005-07-08 ROwen
 2009-09-14 ROwen    Added WindowName variable; tweaked default geometry.
 2010-03-10 ROwen    Compute WindowName from TUI.Version.ApplicationName
+2026-10-19 JParejko Added DownloadsWdg, which reuses connections to the hub's http server
+                    (HTTP keep-alive), records per-transfer timing and shows aggregate bandwidth.
+                    Transfers are now queued so that at most _MaxTransfers run at once.
+2026-10-19 JParejko Use HTTPGetWdg.getFile and RO.Comm.HTTPGet.HTTPGet instead of copies of their code:
+                    timing is recorded by TransferTimes (a state callback) and keep-alive
+                    is enabled by setting the Tcl http package's default.
 """
+import collections
+import time
+import weakref
 import RO.Alg
+import RO.Constants
+import RO.Wdg
 import RO.Wdg.HTTPGetWdg
 import TUI.Version
 
 _MaxLines = 100
 _MaxTransfers = 5
+_NumStats = 50 # number of recent transfers used for aggregate statistics
 
 WindowName = "%s.Downloads" % (TUI.Version.ApplicationName,)
 
 def addWindow(tlSet, visible=False):
     tlSet.createToplevel (
         name = WindowName,
-        defGeom = "403x374+1235+23",
+        defGeom = "403x394+1235+23",
         wdgFunc = RO.Alg.GenericCallback(
-            RO.Wdg.HTTPGetWdg.HTTPGetWdg,
+            DownloadsWdg,
             maxTransfers = _MaxTransfers,
             maxLines = _MaxLines,
             helpURL = "TUIMenu/DownloadsWin.html",
         ),
         visible = visible,
     )
+
+
+class TransferTimes(object):
+    """Timing of one RO.Comm.HTTPGet transfer
+
+    Register update as a state callback of the transfer before starting it.
+
+    Timing attributes (unix time, or None if not yet known):
+    - queueTime: time this object was created (normally when the transfer was queued)
+    - startTime: time the transfer was started (connecting began)
+    - firstByteTime: time the first data was received
+    - endTime: time the transfer ended (successfully or not)
+    """
+    def __init__(self):
+        self.queueTime = time.time()
+        self.startTime = None
+        self.firstByteTime = None
+        self.endTime = None
+        self.readBytes = 0
+
+    def update(self, httpGet):
+        """State callback for the transfer
+
+        HTTPGet reports the first progress (and every state change) immediately,
+        so the times are accurate.
+        """
+        currTime = time.time()
+        if self.startTime is None and httpGet.state != httpGet.Queued:
+            self.startTime = currTime
+        self.readBytes = httpGet.readBytes
+        if self.firstByteTime is None and self.readBytes > 0:
+            self.firstByteTime = currTime
+        if httpGet.isDone and self.endTime is None:
+            self.endTime = currTime
+            if self.firstByteTime is None and self.startTime is not None:
+                # no progress reported (e.g. a very small file)
+                self.firstByteTime = self.endTime
+
+    @property
+    def queueSec(self):
+        """Time spent waiting to start (sec), or None if not started"""
+        if self.startTime is None:
+            return None
+        return self.startTime - self.queueTime
+
+    @property
+    def firstByteSec(self):
+        """Time from start to first data (sec), including connecting and server latency;
+        None if no data received
+        """
+        if self.startTime is None or self.firstByteTime is None:
+            return None
+        return self.firstByteTime - self.startTime
+
+    @property
+    def transferSec(self):
+        """Time spent receiving data (sec), or None if not done"""
+        if self.firstByteTime is None or self.endTime is None:
+            return None
+        return self.endTime - self.firstByteTime
+
+    @property
+    def bytesPerSec(self):
+        """Throughput from start to end (bytes/sec), or None if not done"""
+        if self.startTime is None or self.endTime is None:
+            return None
+        return self.readBytes / max(self.endTime - self.startTime, 1.0e-6)
+
+
+class DownloadsWdg(RO.Wdg.HTTPGetWdg.HTTPGetWdg):
+    """HTTPGetWdg with connection reuse and transfer statistics
+
+    Sets the Tcl http package's default to keep-alive, so connections to the hub's http server
+    can be reused (by Tcl http 2.8 and later; earlier versions ignore the setting).
+    Each transfer records how long it waited in the queue, the time to the first byte
+    and the time spent transferring data. Statistics for recent transfers are shown at the
+    bottom of the window:
+    - rate: bytes transferred / time during which at least one transfer was running;
+        if this is well below the network bandwidth while wait is large,
+        the client is the bottleneck (too few simultaneous transfers)
+    - wait: mean time queued before starting
+    - first byte: mean time from start to first byte (connection setup and server latency)
+    - transfer: mean time from first byte to end
+
+    Inputs: the same as RO.Wdg.HTTPGetWdg.HTTPGetWdg
+    """
+    def __init__(self,
+        master,
+        maxTransfers = 1,
+        maxLines = 500,
+        helpURL = None,
+    **kargs):
+        RO.Wdg.HTTPGetWdg.HTTPGetWdg.__init__(self,
+            master = master,
+            maxTransfers = maxTransfers,
+            maxLines = maxLines,
+            helpURL = helpURL,
+        **kargs)
+        self.tk.eval("package require http; set ::http::defaultKeepalive 1")
+        self._timesDict = weakref.WeakKeyDictionary() # dict of HTTPGet: TransferTimes
+        self.statsList = collections.deque(maxlen=_NumStats) # TransferTimes of recently finished transfers
+
+        self.statsWdg = RO.Wdg.StrLabel(
+            master = self,
+            anchor = "w",
+            helpText = "Statistics for the last %d successful downloads" % (_NumStats,),
+            helpURL = helpURL and helpURL + "#Stats",
+        )
+        self.statsWdg.grid(row=2, column=0, columnspan=2, sticky="ew")
+
+    def getFile(self, fromURL, toPath, startNow=True, **kargs):
+        """Get a file
+
+        Inputs: the same as for RO.Comm.HTTPGet.HTTPGet, except:
+        - startNow: if True, start the transfer as soon as fewer than maxTransfers are running
+
+        Returns an RO.Comm.HTTPGet.HTTPGet
+        """
+        httpGet = RO.Wdg.HTTPGetWdg.HTTPGetWdg.getFile(self,
+            fromURL = fromURL,
+            toPath = toPath,
+            startNow = False,
+        **kargs)
+        times = TransferTimes()
+        self._timesDict[httpGet] = times
+        httpGet.addCallback(times.update, callNow=False)
+        httpGet.addDoneCallback(self._recordStats)
+        if startNow:
+            # HTTPGetWdg.getFile starts transfers immediately unless startNow is False;
+            # start it through the queue so at most maxTransfers run at once
+            self._startNew()
+        return httpGet
+
+    def getTransferTimes(self, httpGet):
+        """Return the TransferTimes for a transfer, or None if unknown"""
+        return self._timesDict.get(httpGet)
+
+    def _recordStats(self, httpGet):
+        """Record statistics for a finished transfer"""
+        times = self._timesDict.get(httpGet)
+        if times is not None and httpGet.state == httpGet.Done:
+            self.statsList.append(times)
+        self._updStats()
+
+    def _updStats(self):
+        """Display aggregate statistics for recent transfers"""
+        if not self.statsList:
+            self.statsWdg.set("")
+            return
+        numBytes = sum(times.readBytes for times in self.statsList)
+        numGets = len(self.statsList)
+
+        # compute time during which at least one transfer was running
+        busySec = 0.0
+        begTime = endTime = None
+        for startTime, doneTime in sorted((times.startTime, times.endTime) for times in self.statsList):
+            if endTime is None or startTime > endTime:
+                if endTime is not None:
+                    busySec += endTime - begTime
+                begTime, endTime = startTime, doneTime
+            else:
+                endTime = max(endTime, doneTime)
+        busySec += endTime - begTime
+
+        meanWait = sum(times.queueSec for times in self.statsList) / numGets
+        meanFirstByte = sum(times.firstByteSec for times in self.statsList) / numGets
+        meanTransfer = sum(times.transferSec for times in self.statsList) / numGets
+        self.statsWdg.set("%s/s; wait %0.2f s; first byte %0.2f s; transfer %0.2f s" % \
+            (_fmtBytes(numBytes / max(busySec, 1.0e-6)), meanWait, meanFirstByte, meanTransfer))
+
+    def _updDetailStatus(self):
+        """Update the detail status for self.selHTTPGet"""
+        RO.Wdg.HTTPGetWdg.HTTPGetWdg._updDetailStatus(self)
+        httpGet = self.selHTTPGet
+        times = self._timesDict.get(httpGet) if httpGet else None
+        if times is not None and httpGet.state == httpGet.Done:
+            self.stateWdg.set("Done: %s at %s/s; wait %0.2f s; first byte %0.2f s" % \
+                (_fmtBytes(times.readBytes), _fmtBytes(times.bytesPerSec),
+                times.queueSec, times.firstByteSec),
+                severity = RO.Constants.sevNormal)
+
+def _fmtBytes(numBytes):
+    """Format a number of bytes as a short string"""
+    if numBytes >= 1.0e6:
+        return "%0.1f MB" % (numBytes / 1.0e6,)
+    return "%0.1f kB" % (numBytes / 1.0e3,)
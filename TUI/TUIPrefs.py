@@ -47,6 +47,8 @@ History:
 2010-03-18 ROwen    Moved _getPrefsFile to TUI.TUIPaths.getPrefsFile.
 2012-07-10 ROwen    Added "Menu Font" preference. This fixes an issue in aqua Tcl/Tk 8.5
                     where menu items showed up in the "Misc Font"..
+2026-10-19 JParejko Added "Progressive Guide Display" preference.
+2026-10-19 JParejko Added "Guide History Length" and "Guide History Size" preferences.
 """
 import os
 import sys
@@ -280,6 +282,33 @@ class TUIPrefs(PrefVar.PrefSet):
                 helpURL = _HelpURL,
             ),
             
+            PrefVar.BoolPrefVar(
+                name = "Progressive Guide Display",
+                category = "Guiding",
+                defValue = True,
+                helpText = "Show a quick preview of large guide images before the full image?",
+                helpURL = _HelpURL,
+            ),
+            PrefVar.IntPrefVar(
+                name = "Guide History Length",
+                category = "Guiding",
+                defValue = 100,
+                minValue = 2,
+                maxValue = 10000,
+                helpText = "Maximum number of guide images to keep",
+                helpURL = _HelpURL,
+            ),
+            PrefVar.IntPrefVar(
+                name = "Guide History Size",
+                category = "Guiding",
+                defValue = 500,
+                minValue = 10,
+                maxValue = 100000,
+                units = "MB",
+                helpText = "Maximum disk space used by downloaded guide images (per guider)",
+                helpURL = _HelpURL,
+            ),
+            
             PrefVar.BoolPrefVar(
                 name = "Play Sounds",
                 category = "Sounds",